@@ -59,6 +59,7 @@ export async function GET(request: Request) {
       duration: track.duration || 0,
       audioUrl: track.audio_url || "",
       coverArt: track.cover_art || "", // ✅ ARTWORK
+      waveformUrl: track.waveform_url || undefined,
       moodTags: {
         mood: track.mood ? JSON.parse(track.mood) : [],
         feeling: [],
@@ -0,0 +1,278 @@
+#!/usr/bin/env python3
+"""
+Spectral fingerprints and duplicate detection for public/audio
+Decodes each file once to low-rate mono, reduces every frame to its strongest
+spectral peaks (all frames at once with NumPy), and indexes the fingerprints
+so perceptually identical tracks - re-encodes, or generated tones whose
+parameters collapse to the same values - are found in a single streaming pass.
+
+Usage:
+    python3 scripts/audio_fingerprint.py            # report duplicates
+    python3 scripts/audio_fingerprint.py --link     # hard-link byte-identical ones to one copy
+"""
+
+import argparse
+import base64
+import filecmp
+import json
+import os
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, Optional
+
+import numpy as np
+
+import audio_probe
+import generate_mood_matched_audio as gen
+
+AUDIO_DIR = Path(__file__).parent.parent / 'public' / 'audio'
+INDEX_FILE = Path(__file__).parent.parent / 'data' / 'audio_fingerprints.json'
+INDEX_VERSION = 1
+
+FINGERPRINT_RATE = 11025
+FRAME_SIZE = 2048
+HOP_SIZE = 1024
+# Frames are zero-padded so peak positions are resolved to ~1.35 Hz, enough
+# to tell apart tones a quarter-tone apart down to ~100 Hz
+FFT_SIZE = 8192
+# Only the opening of each file is fingerprinted; that is plenty to tell
+# tracks apart and keeps decode time and index size bounded
+MAX_SECONDS = 30
+# Each frame is reduced to its strongest spectral peaks (FFT bin numbers);
+# peaks more than PEAK_FLOOR_DB below the frame's strongest, and frames
+# quieter than SILENCE_POWER, count as no peak (bin 0)
+PEAKS_PER_FRAME = 3
+PEAK_FLOOR_DB = 20
+SILENCE_POWER = 1e-6
+# Two files are duplicates if their durations agree and this fraction of
+# their common frames have the same peaks, give or take PEAK_TOLERANCE bins
+MIN_MATCHING_FRAMES = 0.9
+PEAK_TOLERANCE = 1
+MAX_DURATION_DIFF = 1.0
+# Candidates are bucketed by their typical lowest peak, KEY_BINS bins wide
+KEY_BINS = 8
+
+def fingerprint_samples(samples: np.ndarray) -> np.ndarray:
+    """(frames, PEAKS_PER_FRAME) uint16 peak bins, ascending, for mono samples at FINGERPRINT_RATE
+
+    All frames are windowed and transformed in one batch; peaks are picked
+    per frame with argpartition rather than a Python loop.
+    """
+    if len(samples) < FRAME_SIZE:
+        samples = np.pad(samples, (0, FRAME_SIZE - len(samples)))
+    frames = np.lib.stride_tricks.sliding_window_view(samples, FRAME_SIZE)[::HOP_SIZE]
+    power = np.abs(np.fft.rfft(frames * np.hanning(FRAME_SIZE), FFT_SIZE, axis=1)) ** 2
+    power[:, 0] = 0
+
+    # Local maxima only, so one loud tone doesn't fill every slot with its skirt
+    is_peak = np.zeros_like(power, dtype=bool)
+    is_peak[:, 1:-1] = (power[:, 1:-1] > power[:, :-2]) & (power[:, 1:-1] >= power[:, 2:])
+    loudest = power.max(axis=1, keepdims=True)
+    is_peak &= power >= loudest * 10 ** (-PEAK_FLOOR_DB / 10)
+    is_peak &= loudest >= SILENCE_POWER
+    candidates = np.where(is_peak, power, 0)
+
+    peaks = np.argpartition(-candidates, PEAKS_PER_FRAME, axis=1)[:, :PEAKS_PER_FRAME]
+    peaks[np.take_along_axis(candidates, peaks, axis=1) == 0] = 0
+    return np.sort(peaks, axis=1).astype(np.uint16)
+
+def summary_key(fingerprint: np.ndarray) -> int:
+    """Bucket of a file's typical lowest peak, used to find candidates"""
+    lowest = np.where(fingerprint == 0, np.iinfo(np.uint16).max, fingerprint).min(axis=1)
+    voiced = lowest[lowest != np.iinfo(np.uint16).max]
+    return int(np.median(voiced)) // KEY_BINS if len(voiced) else -1
+
+def frame_match_rate(a: np.ndarray, b: np.ndarray) -> float:
+    """Fraction of the frames both fingerprints cover whose peaks agree"""
+    n = min(len(a), len(b))
+    if not n:
+        return 0.0
+    diff = np.abs(a[:n].astype(np.int32) - b[:n])
+    return float(np.mean(np.all(diff <= PEAK_TOLERANCE, axis=1)))
+
+def decode(path: Path, sample_rate: int = FINGERPRINT_RATE) -> np.ndarray:
+    """Decode the opening of an audio file to mono float32 samples with ffmpeg"""
+    cmd = ['ffmpeg', '-v', 'error', '-i', str(path), '-t', str(MAX_SECONDS),
+           '-f', 'f32le', '-ac', '1', '-ar', str(sample_rate), 'pipe:1']
+    result = subprocess.run(cmd, check=True, capture_output=True)
+    return np.frombuffer(result.stdout, dtype='<f4')
+
+def fingerprint_file(path: Path) -> Dict:
+    """Index entry (duration and encoded fingerprint) for one file"""
+    fingerprint = fingerprint_samples(decode(path))
+    return {'duration': audio_probe.probe(path)['duration'],
+            'fingerprint': base64.b64encode(fingerprint.tobytes()).decode('ascii')}
+
+def entry_fingerprint(entry: Dict) -> np.ndarray:
+    return np.frombuffer(base64.b64decode(entry['fingerprint']), dtype=np.uint16).reshape(-1, PEAKS_PER_FRAME)
+
+class DuplicateIndex:
+    """Canonical fingerprints, bucketed by summary key
+
+    A file is only compared in full against files in its own bucket and the
+    two neighbouring ones, so each lookup touches a handful of fingerprints
+    however large the index grows.
+    """
+
+    def __init__(self):
+        self.buckets = {}
+        self.entries = {}
+
+    def find(self, entry: Dict, fingerprint: np.ndarray) -> Optional[str]:
+        """Name of an indexed file this one duplicates, if any"""
+        key = summary_key(fingerprint)
+        candidates = set()
+        for neighbour in (key - 1, key, key + 1):
+            candidates.update(self.buckets.get(neighbour, ()))
+        for name in sorted(candidates):
+            other, other_fingerprint = self.entries[name]
+            if (abs(other['duration'] - entry['duration']) <= MAX_DURATION_DIFF
+                    and frame_match_rate(fingerprint, other_fingerprint) >= MIN_MATCHING_FRAMES):
+                return name
+        return None
+
+    def add(self, name: str, entry: Dict, fingerprint: np.ndarray):
+        self.entries[name] = (entry, fingerprint)
+        self.buckets.setdefault(summary_key(fingerprint), []).append(name)
+
+def load_index(index_file: Path = INDEX_FILE) -> Dict:
+    """Load the fingerprint index, or an empty one if missing or incompatible"""
+    try:
+        with open(index_file, 'r') as f:
+            index = json.load(f)
+        if index.get('version') == INDEX_VERSION:
+            return index
+    except (FileNotFoundError, json.JSONDecodeError):
+        pass
+    return {'version': INDEX_VERSION, 'files': {}}
+
+def save_index(index: Dict, index_file: Path = INDEX_FILE):
+    """Write the index atomically so an interrupted run can't corrupt it"""
+    index_file.parent.mkdir(parents=True, exist_ok=True)
+    tmp_file = index_file.with_suffix('.tmp')
+    with open(tmp_file, 'w') as f:
+        json.dump(index, f, indent=2, sort_keys=True)
+    os.replace(tmp_file, index_file)
+
+def iter_entries(paths: Iterable[Path], audio_dir: Path, cached: Dict, workers: int) -> Iterator[tuple]:
+    """(name, stat, entry, decoded) for each path in order, decoding only new or changed files"""
+    def fingerprint(path):
+        name = str(path.relative_to(audio_dir))
+        stat = path.stat()
+        entry = cached.get(name)
+        if entry and entry['size'] == stat.st_size and entry['mtime_ns'] == stat.st_mtime_ns:
+            return name, stat, entry, False
+        try:
+            entry = fingerprint_file(path)
+        except (subprocess.CalledProcessError, audio_probe.InvalidAudio, OSError) as e:
+            print(f"⚠️  Could not decode {name}: {e}")
+            return name, stat, None, False
+        entry.update({'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns})
+        return name, stat, entry, True
+
+    # ffmpeg decodes in its own process and the FFTs release the GIL, so a
+    # thread pool overlaps them; map() keeps the pass in a stable order
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        yield from executor.map(fingerprint, paths)
+
+def hard_link(duplicate: Path, canonical: Path) -> bool:
+    """Replace duplicate with a hard link to canonical, returning True if bytes were freed
+
+    Only byte-identical files are linked. Files that merely sound the same
+    (re-encodes, tones a few cents apart) are reported but keep their own
+    audio, since linking them would swap in another track's.
+    """
+    if os.path.samefile(duplicate, canonical) or not filecmp.cmp(duplicate, canonical, shallow=False):
+        return False
+    tmp_path = duplicate.with_name(duplicate.name + '.link')
+    os.link(canonical, tmp_path)
+    os.replace(tmp_path, duplicate)
+    return True
+
+def update_render_manifest(audio_dir: Path, names: Iterable[str], manifest_file: Path = gen.MANIFEST_FILE) -> int:
+    """Record the new size and mtime of linked files in the render manifest, returning how many changed
+
+    A link takes on the canonical file's inode and mtime, so without this the
+    next render run would see the file as stale and render it again, undoing
+    the link. The bytes are unchanged, so the entry's render hash still holds.
+    """
+    if audio_dir.resolve() != gen.AUDIO_DIR.resolve():
+        return 0
+    manifest = gen.load_manifest(manifest_file)
+    updated = 0
+    for name in names:
+        entry = manifest.get(Path(name).stem)
+        if entry is None or Path(name) != Path(f'{Path(name).stem}.mp3'):
+            continue
+        stat = (audio_dir / name).stat()
+        entry.update({'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns})
+        updated += 1
+    if updated:
+        gen.save_manifest(manifest, manifest_file)
+    return updated
+
+def deduplicate(audio_dir: Path = AUDIO_DIR, index_file: Path = INDEX_FILE, link: bool = False,
+                workers: Optional[int] = None) -> Dict:
+    """Fingerprint every audio file under audio_dir and find (optionally link) duplicates
+
+    Files are visited in name order; the first of each duplicate group is
+    its canonical copy, and every later one records it as duplicate_of.
+    """
+    index = load_index(index_file)
+    # Renditions sound the same as their track but must keep their own bytes
+    paths = audio_probe.audio_files(audio_dir)
+    duplicates = DuplicateIndex()
+    files = {}
+    linked_names = []
+    stats = {'files': 0, 'decoded': 0, 'duplicates': 0, 'duplicate_bytes': 0, 'linked_bytes': 0}
+
+    for name, stat, entry, decoded in iter_entries(paths, audio_dir, index['files'], workers or os.cpu_count() or 1):
+        if entry is None:
+            continue
+        stats['files'] += 1
+        stats['decoded'] += decoded
+        fingerprint = entry_fingerprint(entry)
+        canonical = duplicates.find(entry, fingerprint)
+        entry = dict(entry, duplicate_of=canonical)
+        files[name] = entry
+        if canonical is None:
+            duplicates.add(name, entry, fingerprint)
+            continue
+        stats['duplicates'] += 1
+        stats['duplicate_bytes'] += stat.st_size
+        if link and hard_link(audio_dir / name, audio_dir / canonical):
+            stats['linked_bytes'] += stat.st_size
+            linked = (audio_dir / name).stat()
+            entry.update({'size': linked.st_size, 'mtime_ns': linked.st_mtime_ns})
+            linked_names.append(name)
+
+    index['files'] = files
+    save_index(index, index_file)
+    update_render_manifest(audio_dir, linked_names)
+    return stats
+
+def main():
+    parser = argparse.ArgumentParser(description='Fingerprint audio files and find duplicates')
+    parser.add_argument('--audio-dir', type=Path, default=AUDIO_DIR)
+    parser.add_argument('--index', type=Path, default=INDEX_FILE)
+    parser.add_argument('--link', action='store_true',
+                        help='Replace byte-identical duplicates with hard links to one copy')
+    parser.add_argument('--jobs', '-j', type=int, default=None, help='Parallel decodes (default: CPU count)')
+    args = parser.parse_args()
+
+    print(f"🔎 Fingerprinting audio in {args.audio_dir}...")
+    stats = deduplicate(args.audio_dir, args.index, args.link, args.jobs)
+    index = load_index(args.index)
+    for name, entry in sorted(index['files'].items()):
+        if entry['duplicate_of']:
+            print(f"  {name} duplicates {entry['duplicate_of']}")
+
+    print(f"\n✅ {stats['files']} files fingerprinted ({stats['decoded']} decoded), "
+          f"{stats['duplicates']} duplicates ({stats['duplicate_bytes'] / 1e6:.1f} MB)")
+    if args.link:
+        print(f"   Hard-linked byte-identical duplicates, freeing {stats['linked_bytes'] / 1e6:.1f} MB")
+    print(f"   Index: {args.index}")
+
+if __name__ == '__main__':
+    main()
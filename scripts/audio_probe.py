@@ -0,0 +1,338 @@
+#!/usr/bin/env python3
+"""
+In-process audio header validation
+Reads just enough of an MP3 (frame sync, Xing/Info/VBRI headers), WAV or FLAC
+file to confirm it is audio and pull out duration, sample rate, channels and
+bitrate, instead of starting an ffprobe process per file.
+
+Usage:
+    python3 scripts/audio_probe.py                 # validate public/audio/
+    python3 scripts/audio_probe.py --deep          # also run ffprobe on every file
+"""
+
+import argparse
+import json
+import os
+import struct
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, Optional
+
+AUDIO_DIR = Path(__file__).parent.parent / 'public' / 'audio'
+MANIFEST_FILE = Path(__file__).parent.parent / 'data' / 'audio_validation_manifest.json'
+MANIFEST_VERSION = 1
+AUDIO_EXTENSIONS = {'.mp3', '.wav', '.flac'}
+# Extra renditions of each track (lower bitrates, previews) live here; scans
+# of the audio directory leave them out
+RENDITIONS_DIR = 'renditions'
+# How far into an MP3 to look for the first frame past any leading junk
+MP3_SYNC_WINDOW = 64 * 1024
+
+# MPEG audio header tables, indexed by the header's version/layer/bitrate bits
+MPEG_VERSIONS = {0b00: 2.5, 0b10: 2, 0b11: 1}
+MPEG_LAYERS = {0b01: 3, 0b10: 2, 0b11: 1}
+MPEG_SAMPLE_RATES = {1: (44100, 48000, 32000), 2: (22050, 24000, 16000), 2.5: (11025, 12000, 8000)}
+MPEG_BITRATES = {
+    (1, 1): (0, 32, 64, 96, 128, 160, 192, 224, 256, 288, 320, 352, 384, 416, 448),
+    (1, 2): (0, 32, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320, 384),
+    (1, 3): (0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320),
+    (2, 1): (0, 32, 48, 56, 64, 80, 96, 112, 128, 144, 160, 176, 192, 224, 256),
+    (2, 2): (0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160),
+    (2, 3): (0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160),
+}
+
+class InvalidAudio(ValueError):
+    """The file is not a readable MP3, WAV or FLAC file"""
+
+def skip_id3v2(f) -> int:
+    """Offset just past a leading ID3v2 tag (0 if there is none)"""
+    f.seek(0)
+    header = f.read(10)
+    if len(header) < 10 or header[:3] != b'ID3':
+        return 0
+    # Tag size is a 28-bit "syncsafe" integer; the footer flag adds 10 bytes
+    size = (header[6] & 0x7f) << 21 | (header[7] & 0x7f) << 14 | (header[8] & 0x7f) << 7 | (header[9] & 0x7f)
+    return 10 + size + (10 if header[5] & 0x10 else 0)
+
+def parse_mpeg_header(header: bytes) -> Optional[Dict]:
+    """Decode a 4-byte MPEG audio frame header, or None if it isn't one"""
+    if len(header) < 4 or header[0] != 0xff or header[1] & 0xe0 != 0xe0:
+        return None
+    version = MPEG_VERSIONS.get(header[1] >> 3 & 0b11)
+    layer = MPEG_LAYERS.get(header[1] >> 1 & 0b11)
+    bitrate_index = header[2] >> 4
+    rate_index = header[2] >> 2 & 0b11
+    if version is None or layer is None or bitrate_index in (0, 15) or rate_index == 3:
+        return None
+
+    bitrate = MPEG_BITRATES[(min(version, 2), layer)][bitrate_index] * 1000
+    sample_rate = MPEG_SAMPLE_RATES[version][rate_index]
+    padding = header[2] >> 1 & 1
+    channels = 1 if header[3] >> 6 == 0b11 else 2
+    if layer == 1:
+        samples_per_frame = 384
+        frame_length = (12 * bitrate // sample_rate + padding) * 4
+    else:
+        samples_per_frame = 576 if layer == 3 and version != 1 else 1152
+        frame_length = samples_per_frame // 8 * bitrate // sample_rate + padding
+    return {'version': version, 'layer': layer, 'bitrate': bitrate, 'sample_rate': sample_rate,
+            'channels': channels, 'samples_per_frame': samples_per_frame, 'frame_length': frame_length}
+
+def probe_mp3(f, file_size: int) -> Dict:
+    """MP3 stream info from the first frame and any Xing/Info or VBRI header"""
+    start = skip_id3v2(f)
+    f.seek(start)
+    window = f.read(MP3_SYNC_WINDOW)
+
+    # A frame only counts if the next one starts where its length says it
+    # should, so stray 0xFF bytes in tags or artwork aren't mistaken for audio
+    frame = None
+    offset = window.find(b'\xff')
+    while offset != -1 and offset + 4 <= len(window):
+        frame = parse_mpeg_header(window[offset:offset + 4])
+        if frame:
+            f.seek(start + offset + frame['frame_length'])
+            next_header = f.read(4)
+            if len(next_header) < 4 or parse_mpeg_header(next_header):
+                break
+        frame = None
+        offset = window.find(b'\xff', offset + 1)
+    if frame is None:
+        raise InvalidAudio('no MPEG audio frame sync found')
+    audio_start = start + offset
+    f.seek(audio_start)
+    first_frame = f.read(frame['frame_length'])
+
+    # The side info before Xing/Info depends on version and channel count
+    if frame['version'] == 1:
+        side_info = 32 if frame['channels'] == 2 else 17
+    else:
+        side_info = 17 if frame['channels'] == 2 else 9
+    xing = first_frame[4 + side_info:4 + side_info + 16]
+    num_frames = None
+    if xing[:4] in (b'Xing', b'Info'):
+        flags = struct.unpack('>I', xing[4:8])[0]
+        if flags & 1:
+            num_frames = struct.unpack('>I', xing[8:12])[0]
+    elif first_frame[36:40] == b'VBRI':
+        num_frames = struct.unpack('>I', first_frame[50:54])[0]
+
+    audio_end = file_size
+    f.seek(max(file_size - 128, 0))
+    if f.read(3) == b'TAG':
+        audio_end -= 128
+    audio_bytes = audio_end - audio_start
+    if num_frames:
+        duration = num_frames * frame['samples_per_frame'] / frame['sample_rate']
+        bitrate = int(audio_bytes * 8 / duration) if duration else frame['bitrate']
+    else:
+        # No frame count: assume constant bitrate throughout
+        bitrate = frame['bitrate']
+        duration = audio_bytes * 8 / bitrate
+    return {'format': 'mp3', 'duration': duration, 'sample_rate': frame['sample_rate'],
+            'channels': frame['channels'], 'bitrate': bitrate}
+
+def probe_wav(f, file_size: int) -> Dict:
+    """WAV stream info from the RIFF fmt and data chunks"""
+    f.seek(12)
+    fmt = None
+    while True:
+        chunk = f.read(8)
+        if len(chunk) < 8:
+            raise InvalidAudio('RIFF file has no data chunk')
+        chunk_id, size = chunk[:4], struct.unpack('<I', chunk[4:])[0]
+        if chunk_id == b'fmt ':
+            body = f.read(size)
+            if len(body) < 16:
+                raise InvalidAudio('truncated fmt chunk')
+            fmt = struct.unpack('<HHIIHH', body[:16])
+            f.seek(size & 1, os.SEEK_CUR)
+        elif chunk_id == b'data':
+            if fmt is None:
+                raise InvalidAudio('data chunk before fmt chunk')
+            # Streamed WAVs leave the size unset; use what is actually there
+            data_size = min(size, file_size - f.tell())
+            break
+        else:
+            f.seek(size + (size & 1), os.SEEK_CUR)
+
+    _, channels, sample_rate, byte_rate, _, _ = fmt
+    if not channels or not sample_rate or not byte_rate:
+        raise InvalidAudio('fmt chunk has zero channels, sample rate or byte rate')
+    return {'format': 'wav', 'duration': data_size / byte_rate, 'sample_rate': sample_rate,
+            'channels': channels, 'bitrate': byte_rate * 8}
+
+def probe_flac(f, file_size: int, start: int = 0) -> Dict:
+    """FLAC stream info from the STREAMINFO metadata block"""
+    f.seek(start + 4)
+    block = f.read(4 + 34)
+    if len(block) < 38 or block[0] & 0x7f != 0:
+        raise InvalidAudio('FLAC stream does not start with STREAMINFO')
+    # 20 bits sample rate, 3 bits channels - 1, 5 bits bits-per-sample - 1,
+    # 36 bits total samples
+    packed = int.from_bytes(block[4 + 10:4 + 18], 'big')
+    sample_rate = packed >> 44
+    channels = (packed >> 41 & 0b111) + 1
+    total_samples = packed & (1 << 36) - 1
+    if not sample_rate:
+        raise InvalidAudio('STREAMINFO has a zero sample rate')
+    duration = total_samples / sample_rate
+    return {'format': 'flac', 'duration': duration, 'sample_rate': sample_rate, 'channels': channels,
+            'bitrate': int((file_size - start) * 8 / duration) if duration else 0}
+
+def probe(path: Path) -> Dict:
+    """Duration, sample rate, channels and bitrate of an audio file
+
+    Raises InvalidAudio if the file isn't a readable MP3, WAV or FLAC file.
+    """
+    file_size = os.path.getsize(path)
+    if not file_size:
+        raise InvalidAudio('empty file')
+    with open(path, 'rb') as f:
+        magic = f.read(12)
+        if magic[:4] == b'RIFF' and magic[8:12] == b'WAVE':
+            info = probe_wav(f, file_size)
+        elif magic[:4] == b'fLaC':
+            info = probe_flac(f, file_size)
+        else:
+            start = skip_id3v2(f)
+            f.seek(start)
+            if f.read(4) == b'fLaC':
+                info = probe_flac(f, file_size, start)
+            else:
+                info = probe_mp3(f, file_size)
+    if info['duration'] <= 0:
+        raise InvalidAudio('stream has no audio')
+    return info
+
+def ffprobe(path: Path) -> Dict:
+    """Stream info from ffprobe, which decodes far more than the header check"""
+    try:
+        result = subprocess.run(
+            ['ffprobe', '-v', 'error', '-show_entries',
+             'format=format_name,duration,bit_rate:stream=sample_rate,channels', '-of', 'json', str(path)],
+            capture_output=True,
+            text=True
+        )
+    except FileNotFoundError:
+        raise InvalidAudio('ffprobe is not installed')
+    if result.returncode != 0:
+        raise InvalidAudio(result.stderr.strip() or 'ffprobe rejected the file')
+    data = json.loads(result.stdout)
+    stream = (data.get('streams') or [{}])[0]
+    fmt = data.get('format', {})
+    return {'format': fmt.get('format_name'), 'duration': float(fmt.get('duration', 0)),
+            'sample_rate': int(stream.get('sample_rate', 0)), 'channels': stream.get('channels', 0),
+            'bitrate': int(fmt.get('bit_rate', 0))}
+
+def validate(path: Path, deep: bool = False) -> Dict:
+    """Validation result for one file: ok, error and the stream info
+
+    With deep=True ffprobe also has to accept the file, and formats the
+    header check doesn't know are left to ffprobe alone.
+    """
+    result = {'ok': False, 'error': None}
+    try:
+        if path.suffix.lower() in AUDIO_EXTENSIONS:
+            result.update(probe(path))
+            if deep:
+                ffprobe(path)
+        elif deep:
+            result.update(ffprobe(path))
+        else:
+            raise InvalidAudio(f'unsupported extension {path.suffix}')
+        result['ok'] = True
+    except (InvalidAudio, OSError, struct.error) as e:
+        result['error'] = str(e)
+    return result
+
+def load_manifest(manifest_file: Path = MANIFEST_FILE) -> Dict:
+    """Load the validation manifest, or an empty one if missing or incompatible"""
+    try:
+        with open(manifest_file, 'r') as f:
+            manifest = json.load(f)
+        if manifest.get('version') == MANIFEST_VERSION:
+            return manifest
+    except (FileNotFoundError, json.JSONDecodeError):
+        pass
+    return {'version': MANIFEST_VERSION, 'files': {}}
+
+def save_manifest(manifest: Dict, manifest_file: Path = MANIFEST_FILE):
+    """Write the manifest atomically so an interrupted run can't corrupt it"""
+    manifest_file.parent.mkdir(parents=True, exist_ok=True)
+    tmp_file = manifest_file.with_suffix('.tmp')
+    with open(tmp_file, 'w') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    os.replace(tmp_file, manifest_file)
+
+def audio_files(audio_dir: Path = AUDIO_DIR) -> list:
+    """Every audio file under audio_dir in name order, outside the renditions directory"""
+    return sorted(p for p in audio_dir.rglob('*') if p.is_file() and p.suffix.lower() in AUDIO_EXTENSIONS
+                  and RENDITIONS_DIR not in p.relative_to(audio_dir).parts)
+
+def validate_directory(audio_dir: Path = AUDIO_DIR, manifest_file: Path = MANIFEST_FILE,
+                       workers: Optional[int] = None, deep: bool = False, force: bool = False) -> Dict:
+    """Validate every audio file under audio_dir in parallel and record the results
+
+    Files whose size and mtime match their manifest entry are not re-read
+    unless force is set.
+    """
+    manifest = load_manifest(manifest_file)
+    entries = manifest['files']
+    # deep only adds ffprobe to the check: peaks files, manifests and the
+    # like sitting next to the audio are still not audio
+    paths = audio_files(audio_dir)
+
+    def check(path):
+        key = str(path.relative_to(audio_dir))
+        stat = path.stat()
+        entry = entries.get(key)
+        if (not force and entry and entry['size'] == stat.st_size and entry['mtime_ns'] == stat.st_mtime_ns
+                and entry['deep'] >= deep):
+            return key, entry, True
+        result = validate(path, deep)
+        result.update({'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns, 'deep': deep})
+        return key, result, False
+
+    # Header checks are a few small reads per file, so threads keep the disk busy
+    with ThreadPoolExecutor(max_workers=workers or min(32, (os.cpu_count() or 1) * 4)) as executor:
+        results = list(executor.map(check, paths))
+
+    manifest['files'] = {key: entry for key, entry, _ in results}
+    save_manifest(manifest, manifest_file)
+    return {'checked': sum(not cached for _, _, cached in results),
+            'cached': sum(cached for _, _, cached in results),
+            'invalid': {key: entry['error'] for key, entry, _ in results if not entry['ok']}}
+
+def main():
+    parser = argparse.ArgumentParser(description='Validate audio files without spawning ffprobe')
+    parser.add_argument('paths', nargs='*', type=Path, help='Files to probe (default: validate --audio-dir)')
+    parser.add_argument('--audio-dir', type=Path, default=AUDIO_DIR)
+    parser.add_argument('--manifest', type=Path, default=MANIFEST_FILE)
+    parser.add_argument('--jobs', '-j', type=int, default=None, help='Parallel validation threads')
+    parser.add_argument('--deep', action='store_true', help='Also require ffprobe to accept every file')
+    parser.add_argument('--force', action='store_true', help='Re-check files the manifest already covers')
+    args = parser.parse_args()
+
+    if args.paths:
+        for path in args.paths:
+            result = validate(path, args.deep)
+            if result['ok']:
+                print(f"✓ {path}: {result['format']}, {result['duration']:.2f}s, {result['sample_rate']} Hz, "
+                      f"{result['channels']} ch, {result['bitrate'] // 1000} kb/s")
+            else:
+                print(f"✗ {path}: {result['error']}")
+        return
+
+    print(f"🔎 Validating audio in {args.audio_dir}...")
+    summary = validate_directory(args.audio_dir, args.manifest, args.jobs, args.deep, args.force)
+    for key, error in sorted(summary['invalid'].items()):
+        print(f"✗ {key}: {error}")
+    total = summary['checked'] + summary['cached']
+    print(f"\n✅ {total - len(summary['invalid'])}/{total} valid "
+          f"({summary['checked']} checked, {summary['cached']} unchanged since last run)")
+    print(f"   Manifest: {args.manifest}")
+
+if __name__ == '__main__':
+    main()
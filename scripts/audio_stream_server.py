@@ -0,0 +1,347 @@
+#!/usr/bin/env python3
+"""
+Serve mood-matched track audio on demand instead of pre-rendering it
+GET /audio/track-N.mp3 resolves the track's render plan with the same logic as
+generate_mood_matched_audio.py, and on first request renders and encodes it
+with ffmpeg straight to the response, streaming chunks as the encoder emits
+them. Finished renders are kept in a size-bounded LRU cache - small ones in
+memory, all of them on disk - keyed by render key, so tracks that share a
+plan share one render, and a request for a render already in progress
+follows that render instead of starting another.
+
+Usage:
+    python3 scripts/audio_stream_server.py                      # http://127.0.0.1:8765/audio/track-1.mp3
+    python3 scripts/audio_stream_server.py --cache-mb 512 --jobs 4
+    python3 scripts/benchmark_pipeline.py --only stream         # time-to-first-byte and stream capacity
+"""
+
+import argparse
+import http.server
+import io
+import os
+import re
+import subprocess
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Iterator, Optional
+
+import generate_mood_matched_audio as gen
+import instrumentation
+
+CACHE_DIR = Path(__file__).parent.parent / 'data' / 'audio_stream_cache'
+DEFAULT_PORT = 8765
+DEFAULT_CACHE_MB = 256
+DEFAULT_MEMORY_MB = 32
+# Renders larger than this share of the memory budget are only cached on disk,
+# so one long track can't flush every other render out of memory
+MEMORY_ITEM_SHARE = 0.125
+CHUNK_SIZE = 16 * 1024
+TRACK_PATH = re.compile(r'^/audio/(track-\d+)\.mp3$')
+
+class RenderCache:
+    """Finished renders by render key: an LRU of small ones in memory over an LRU directory on disk
+
+    Both tiers evict least-recently-used renders once over their byte budget.
+    Files already in the directory count towards the disk budget, oldest
+    first, so the cache survives restarts.
+    """
+
+    def __init__(self, cache_dir: Path, disk_bytes: int, memory_bytes: int):
+        self.cache_dir = cache_dir
+        self.disk_bytes = disk_bytes
+        self.memory_bytes = memory_bytes
+        self.lock = threading.Lock()
+        self.disk = OrderedDict()
+        self.memory = OrderedDict()
+        self.disk_used = 0
+        self.memory_used = 0
+        cache_dir.mkdir(parents=True, exist_ok=True)
+        # Partial renders left behind by a server that was stopped mid-encode
+        for path in cache_dir.glob('*.tmp'):
+            path.unlink(missing_ok=True)
+        for path in sorted(cache_dir.glob('*.mp3'), key=lambda p: p.stat().st_mtime_ns):
+            self.disk[path.stem] = path.stat().st_size
+            self.disk_used += self.disk[path.stem]
+        with self.lock:
+            self._evict()
+
+    def path(self, key: str) -> Path:
+        return self.cache_dir / f'{key}.mp3'
+
+    def get(self, key: str):
+        """('memory', bytes), ('disk', open file) or None"""
+        with self.lock:
+            if key in self.memory:
+                self.memory.move_to_end(key)
+                self.disk.move_to_end(key)
+                return 'memory', self.memory[key]
+            if key in self.disk:
+                self.disk.move_to_end(key)
+                try:
+                    # Opened under the lock so eviction can't remove it first
+                    return 'disk', open(self.path(key), 'rb')
+                except FileNotFoundError:
+                    self.disk_used -= self.disk.pop(key)
+        return None
+
+    def put(self, key: str, tmp_file: Path, data: bytes):
+        """Move a finished render into the cache"""
+        os.replace(tmp_file, self.path(key))
+        with self.lock:
+            self.disk_used += len(data) - self.disk.pop(key, 0)
+            self.disk[key] = len(data)
+            if len(data) <= self.memory_bytes * MEMORY_ITEM_SHARE:
+                self.memory_used += len(data) - len(self.memory.pop(key, b''))
+                self.memory[key] = data
+            self._evict()
+
+    def _evict(self):
+        while self.memory_used > self.memory_bytes and self.memory:
+            _, data = self.memory.popitem(last=False)
+            self.memory_used -= len(data)
+        while self.disk_used > self.disk_bytes and self.disk:
+            key, size = self.disk.popitem(last=False)
+            self.disk_used -= size
+            if key in self.memory:
+                self.memory_used -= len(self.memory.pop(key))
+            # Readers that already opened the file keep reading it after the unlink
+            self.path(key).unlink(missing_ok=True)
+
+class Render:
+    """One in-flight encode: chunks are kept as ffmpeg produces them and any number of readers follow
+
+    The encode runs on its own thread, so a slow or disconnected listener
+    never holds up the render or stops it reaching the cache.
+    """
+
+    def __init__(self, key: str, cmd: list):
+        self.key = key
+        self.cmd = cmd
+        self.chunks = []
+        self.done = False
+        self.ok = False
+        self.condition = threading.Condition()
+
+    def run(self, cache: RenderCache, slots: threading.Semaphore, on_finish):
+        tmp_file = cache.path(self.key).with_suffix(f'.{threading.get_ident()}.tmp')
+        started = time.perf_counter()
+        try:
+            with slots, open(tmp_file, 'wb') as out:
+                process = subprocess.Popen(self.cmd, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+                # read1() hands over whatever the encoder has flushed, so the
+                # first frames go out without waiting for a full chunk
+                while chunk := process.stdout.read1(CHUNK_SIZE):
+                    out.write(chunk)
+                    with self.condition:
+                        self.chunks.append(chunk)
+                        self.condition.notify_all()
+                returncode = process.wait()
+            self.ok = returncode == 0 and bool(self.chunks)
+            if self.ok:
+                cache.put(self.key, tmp_file, b''.join(self.chunks))
+            else:
+                print(f"⚠️  Render {self.key[:12]} failed: ffmpeg exited with {returncode} "
+                      f"after {sum(len(c) for c in self.chunks)} bytes")
+        except OSError as e:
+            print(f"⚠️  Could not render {self.key[:12]}: {e}")
+            self.ok = False
+        finally:
+            tmp_file.unlink(missing_ok=True)
+            with self.condition:
+                self.done = True
+                self.condition.notify_all()
+            on_finish(self)
+            instrumentation.event('stream.render', render_key=self.key, ok=self.ok,
+                                  seconds=round(time.perf_counter() - started, 6),
+                                  bytes=sum(len(c) for c in self.chunks))
+
+    def follow(self) -> Iterator[bytes]:
+        """Every chunk from the start, blocking for new ones until the render ends"""
+        i = 0
+        while True:
+            with self.condition:
+                while i >= len(self.chunks) and not self.done:
+                    self.condition.wait()
+                if i >= len(self.chunks):
+                    return
+                chunk = self.chunks[i]
+            i += 1
+            yield chunk
+
+class AudioService:
+    """Track records to audio: cached renders, renders in flight, or a new render"""
+
+    def __init__(self, tracks: Dict[str, dict], cache: RenderCache, jobs: int):
+        self.tracks = tracks
+        self.cache = cache
+        self.slots = threading.Semaphore(jobs)
+        self.lock = threading.Lock()
+        self.in_flight = {}
+
+    def render_command(self, track: dict):
+        """(render key, ffmpeg argv writing MP3 to stdout) for a track record"""
+        _, _, plan, cmd, _ = gen.build_render_job(*gen.track_render_params(track))
+        return gen.render_key(plan), cmd[:-1] + ['-f', 'mp3', 'pipe:1']
+
+    def open(self, track_key: str):
+        """(source, payload) for a track: 'memory'/'disk' with bytes/a file, or 'render'/'joined' with the Render
+
+        None if the track is unknown or its render fails before any audio.
+        """
+        track = self.tracks.get(track_key)
+        if track is None:
+            return None
+        key, cmd = self.render_command(track)
+        with self.lock:
+            cached = self.cache.get(key)
+            if cached:
+                return cached
+            render = self.in_flight.get(key)
+            source = 'joined'
+            if render is None:
+                source = 'render'
+                render = self.in_flight[key] = Render(key, cmd)
+                threading.Thread(target=render.run, args=(self.cache, self.slots, self.finished),
+                                 daemon=True).start()
+        # Wait for the first audio, so a render that fails outright is a 500
+        if next(render.follow(), None) is None:
+            return None
+        return source, render
+
+    def finished(self, render: Render):
+        with self.lock:
+            if self.in_flight.get(render.key) is render:
+                del self.in_flight[render.key]
+
+def parse_range(header: Optional[str], size: int):
+    """(start, end) inclusive for a single 'bytes=a-b' range within size, else None"""
+    match = re.fullmatch(r'bytes=(\d*)-(\d*)', (header or '').strip())
+    if not match or not any(match.groups()):
+        return None
+    start, end = match.groups()
+    if not start:
+        start, end = max(0, size - int(end)), size - 1
+    else:
+        start, end = int(start), min(int(end) if end else size - 1, size - 1)
+    return (start, end) if start <= end else None
+
+class AudioRequestHandler(http.server.BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    service: AudioService = None
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        match = TRACK_PATH.match(self.path.split('?', 1)[0])
+        if not match:
+            self.send_error(404)
+            return
+        started = time.perf_counter()
+        opened = self.service.open(match.group(1))
+        if opened is None:
+            self.send_error(404 if match.group(1) not in self.service.tracks else 500)
+            return
+        source, payload = opened
+        sent = 0
+        try:
+            if source == 'render' or source == 'joined':
+                # Length is unknown until the encoder finishes, so stream chunked
+                self.send_response(200)
+                self.send_headers(source, {'Transfer-Encoding': 'chunked'})
+                for chunk in payload.follow():
+                    self.wfile.write(b'%x\r\n%s\r\n' % (len(chunk), chunk))
+                    sent += len(chunk)
+                if payload.ok:
+                    self.wfile.write(b'0\r\n\r\n')
+                else:
+                    # The encode failed part-way; closing without the last
+                    # chunk tells the client the audio is truncated
+                    self.close_connection = True
+            elif source == 'disk':
+                with payload:
+                    sent = self.send_cached(source, payload, os.fstat(payload.fileno()).st_size)
+            else:
+                sent = self.send_cached(source, io.BytesIO(payload), len(payload))
+        except (BrokenPipeError, ConnectionResetError):
+            self.close_connection = True
+        instrumentation.event('stream', track=match.group(1), source=source, bytes=sent,
+                              seconds=round(time.perf_counter() - started, 6))
+
+    def send_headers(self, source: str, headers: dict):
+        self.send_header('Content-Type', 'audio/mpeg')
+        self.send_header('Cache-Control', 'public, max-age=86400')
+        self.send_header('X-Render-Cache', source)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.end_headers()
+
+    def send_cached(self, source: str, f, size: int) -> int:
+        """Send a finished render from f, honouring a single byte range for seeking"""
+        byte_range = parse_range(self.headers.get('Range'), size)
+        if byte_range:
+            start, end = byte_range
+            self.send_response(206)
+            self.send_headers(source, {'Content-Length': end - start + 1, 'Accept-Ranges': 'bytes',
+                                       'Content-Range': f'bytes {start}-{end}/{size}'})
+        else:
+            start, end = 0, size - 1
+            self.send_response(200)
+            self.send_headers(source, {'Content-Length': size, 'Accept-Ranges': 'bytes'})
+        f.seek(start)
+        remaining = end - start + 1
+        while remaining > 0:
+            chunk = f.read(min(CHUNK_SIZE * 4, remaining))
+            if not chunk:
+                break
+            self.wfile.write(chunk)
+            remaining -= len(chunk)
+        return end - start + 1 - remaining
+
+def load_tracks(tracks_file) -> Dict[str, dict]:
+    """{track id: record} from a JSON array or NDJSON tracks file"""
+    with gen.open_tracks(tracks_file) as f:
+        return {track['id']: track for track in gen.iter_track_records(f)}
+
+def make_server(tracks: Dict[str, dict], host: str = '127.0.0.1', port: int = DEFAULT_PORT,
+                cache_dir: Path = CACHE_DIR, cache_mb: float = DEFAULT_CACHE_MB,
+                memory_mb: float = DEFAULT_MEMORY_MB, jobs: Optional[int] = None):
+    """A ThreadingHTTPServer serving tracks; call serve_forever() on it"""
+    cache = RenderCache(cache_dir, int(cache_mb * 1e6), int(memory_mb * 1e6))
+    service = AudioService(tracks, cache, jobs or os.cpu_count() or 1)
+    handler = type('Handler', (AudioRequestHandler,), {'service': service})
+    server = http.server.ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    return server
+
+def main():
+    parser = argparse.ArgumentParser(description='Render and stream mood-matched track audio on demand')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    parser.add_argument('--tracks-file', default=gen.TRACKS_FILE, metavar='FILE',
+                        help='Track records as a JSON array or NDJSON')
+    parser.add_argument('--cache-dir', type=Path, default=CACHE_DIR)
+    parser.add_argument('--cache-mb', type=float, default=DEFAULT_CACHE_MB, help='Disk cache budget in MB')
+    parser.add_argument('--memory-mb', type=float, default=DEFAULT_MEMORY_MB, help='In-memory cache budget in MB')
+    parser.add_argument('--jobs', '-j', type=int, default=os.cpu_count() or 1,
+                        help='Renders run at once; further first requests wait for a slot (default: CPU count)')
+    instrumentation.add_arguments(parser)
+    args = parser.parse_args()
+    instrumentation.configure(args.metrics)
+
+    tracks = load_tracks(args.tracks_file)
+    server = make_server(tracks, args.host, args.port, args.cache_dir, args.cache_mb, args.memory_mb, args.jobs)
+    print(f"🎧 Serving {len(tracks)} tracks at http://{args.host}:{server.server_address[1]}/audio/track-N.mp3 "
+          f"({args.jobs} render slots, cache {args.cache_mb:g} MB disk / {args.memory_mb:g} MB memory)")
+    with instrumentation.profiled(args.profile, 'audio_stream_server'):
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            print("\n👋 Stopped")
+        finally:
+            server.server_close()
+
+if __name__ == '__main__':
+    main()
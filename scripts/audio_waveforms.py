@@ -0,0 +1,295 @@
+#!/usr/bin/env python3
+"""
+Waveform peaks for public/audio, so clients can draw tracks without decoding them
+Each audio file is decoded once, streamed from ffmpeg in blocks, and reduced
+to one min/max pair per SAMPLES_PER_PEAK samples with NumPy (a whole block at
+a time). The peaks are written next to the file - track-1.mp3 gets
+track-1.peaks.dat - in the audiowaveform layout that waveform players such as
+peaks.js read directly. The seed tracks.json gets a waveformUrl for every
+track whose audio has them, and the scraper catalog (data/tracks.json and
+data/music.db) gets its waveform_url filled in the same way. A five-minute
+track's peaks are about 26 KB.
+
+Usage:
+    python3 scripts/audio_waveforms.py                    # new or changed files only
+    python3 scripts/audio_waveforms.py --format json --force
+"""
+
+import argparse
+import json
+import os
+import sqlite3
+import struct
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, Iterator, Optional
+
+import numpy as np
+
+import generate_mood_matched_audio as gen
+import generate_seed_data
+import instrumentation
+from audio_probe import AUDIO_DIR, audio_files
+
+TRACKS_FILE = Path(__file__).parent.parent / 'data' / 'mock' / 'tracks.json'
+# The scraper catalog, with snake_case audio_url and waveform_url fields
+CATALOG_FILE = Path(__file__).parent.parent / 'data' / 'tracks.json'
+CATALOG_DB = Path(__file__).parent.parent / 'data' / 'music.db'
+# 11025 Hz mono with 256 samples per peak is ~43 peaks a second: finer than a
+# full-width player needs for a typical track, at 2 bytes per peak
+PEAK_RATE = 11025
+SAMPLES_PER_PEAK = 256
+BLOCK_PEAKS = 4096
+PEAK_FORMATS = {'dat': '.peaks.dat', 'json': '.peaks.json'}
+# audiowaveform .dat header: version, flags (bit 0: 8-bit samples),
+# sample rate, samples per pixel, number of min/max pairs
+DAT_HEADER = struct.Struct('<iIiiI')
+DAT_VERSION = 1
+DAT_FLAG_8BIT = 1
+
+class PeakAccumulator:
+    """Min/max of every SAMPLES_PER_PEAK samples, fed blocks of any length"""
+
+    def __init__(self, samples_per_peak: int = SAMPLES_PER_PEAK):
+        self.samples_per_peak = samples_per_peak
+        self.carry = np.empty(0, dtype=np.float32)
+        self.mins = []
+        self.maxs = []
+
+    def add(self, samples: np.ndarray):
+        if len(self.carry):
+            samples = np.concatenate([self.carry, samples])
+        whole = len(samples) - len(samples) % self.samples_per_peak
+        if whole:
+            frames = samples[:whole].reshape(-1, self.samples_per_peak)
+            self.mins.append(frames.min(axis=1))
+            self.maxs.append(frames.max(axis=1))
+        self.carry = samples[whole:]
+
+    def finish(self) -> np.ndarray:
+        """Interleaved min, max int8 pairs (the last peak may cover fewer samples)"""
+        if len(self.carry):
+            self.mins.append(self.carry.min(keepdims=True))
+            self.maxs.append(self.carry.max(keepdims=True))
+            self.carry = self.carry[:0]
+        if not self.mins:
+            return np.empty(0, dtype=np.int8)
+        peaks = np.empty(2 * sum(len(m) for m in self.mins), dtype=np.float32)
+        peaks[0::2] = np.concatenate(self.mins)
+        peaks[1::2] = np.concatenate(self.maxs)
+        return np.clip(np.round(peaks * 127), -128, 127).astype(np.int8)
+
+def compute_peaks(path: Path, sample_rate: int = PEAK_RATE, samples_per_peak: int = SAMPLES_PER_PEAK) -> np.ndarray:
+    """Interleaved int8 min/max peaks of an audio file, decoded and reduced a block at a time"""
+    cmd = ['ffmpeg', '-v', 'error', '-i', str(path), '-f', 'f32le', '-ac', '1', '-ar', str(sample_rate), 'pipe:1']
+    accumulator = PeakAccumulator(samples_per_peak)
+    process = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    try:
+        while block := process.stdout.read(BLOCK_PEAKS * samples_per_peak * 4):
+            accumulator.add(np.frombuffer(block, dtype='<f4'))
+        stderr = process.stderr.read()
+    finally:
+        process.stdout.close()
+        process.stderr.close()
+        process.wait()
+    if process.returncode:
+        raise subprocess.CalledProcessError(process.returncode, cmd, stderr=stderr)
+    return accumulator.finish()
+
+def peaks_path(path: Path, fmt: str = 'dat') -> Path:
+    return path.with_name(path.stem + PEAK_FORMATS[fmt])
+
+def write_peaks(path: Path, peaks: np.ndarray, fmt: str = 'dat', sample_rate: int = PEAK_RATE,
+                samples_per_peak: int = SAMPLES_PER_PEAK):
+    """Atomically write peaks as an audiowaveform .dat (binary) or JSON file"""
+    tmp_path = path.with_name(path.name + '.tmp')
+    with open(tmp_path, 'wb') as f:
+        if fmt == 'dat':
+            f.write(DAT_HEADER.pack(DAT_VERSION, DAT_FLAG_8BIT, sample_rate, samples_per_peak, len(peaks) // 2))
+            f.write(peaks.tobytes())
+        else:
+            f.write(json.dumps({'version': 2, 'channels': 1, 'sample_rate': sample_rate,
+                                'samples_per_pixel': samples_per_peak, 'bits': 8, 'length': len(peaks) // 2,
+                                'data': peaks.tolist()}, separators=(',', ':')).encode('utf-8'))
+    os.replace(tmp_path, path)
+
+def read_settings(path: Path, fmt: str = 'dat') -> Optional[tuple]:
+    """(sample rate, samples per peak) a peaks file was made with, or None if unreadable"""
+    try:
+        with open(path, 'rb') as f:
+            if fmt == 'dat':
+                version, flags, sample_rate, samples_per_peak, _ = DAT_HEADER.unpack(f.read(DAT_HEADER.size))
+                return (sample_rate, samples_per_peak) if version == DAT_VERSION else None
+            header = json.load(f)
+            return header['sample_rate'], header['samples_per_pixel']
+    except (OSError, struct.error, ValueError, KeyError):
+        return None
+
+def is_up_to_date(audio_file: Path, fmt: str = 'dat') -> bool:
+    """True if the peaks file is newer than the audio and made with the current settings"""
+    output = peaks_path(audio_file, fmt)
+    try:
+        if output.stat().st_mtime_ns < audio_file.stat().st_mtime_ns:
+            return False
+    except FileNotFoundError:
+        return False
+    return read_settings(output, fmt) == (PEAK_RATE, SAMPLES_PER_PEAK)
+
+def iter_waveforms(paths: list, fmt: str = 'dat', force: bool = False, workers: int = 1) -> Iterator[tuple]:
+    """(path, status, bytes written) per file, where status is 'computed', 'current' or 'failed'"""
+    def process(path):
+        if not force and is_up_to_date(path, fmt):
+            return path, 'current', 0
+        try:
+            peaks = compute_peaks(path)
+        except (subprocess.CalledProcessError, OSError) as e:
+            print(f"⚠️  Could not decode {path.name}: {e}")
+            return path, 'failed', 0
+        output = peaks_path(path, fmt)
+        write_peaks(output, peaks, fmt)
+        return path, 'computed', output.stat().st_size
+
+    # ffmpeg decodes in its own process and the reductions release the GIL,
+    # so threads keep every core busy; map() keeps the log in name order
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        yield from executor.map(process, paths)
+
+def waveform_url(audio_url: str, fmt: str = 'dat', audio_dir: Path = AUDIO_DIR) -> Optional[str]:
+    """URL of the peaks for a track's audioUrl, if its audio is local and has them"""
+    if not audio_url or not audio_url.startswith('/'):
+        return None
+    audio_file = audio_dir.parent / audio_url.lstrip('/')
+    output = peaks_path(audio_file, fmt)
+    if not output.is_file():
+        return None
+    return '/' + output.relative_to(audio_dir.parent).as_posix()
+
+def catalog_waveform_url(current: Optional[str], url: Optional[str]) -> str:
+    """New waveform_url of a scraper catalog row: ours if it has peaks, else what
+    it had, unless that was peaks of ours that are gone (scrapers may store
+    remote waveform URLs there)"""
+    if url:
+        return url
+    current = current or ''
+    if current.startswith('/') and current.endswith(tuple(PEAK_FORMATS.values())):
+        return ''
+    return current
+
+def with_waveform_url(track: Dict, url: Optional[str]) -> Dict:
+    """The track with its waveform URL set (or cleared)
+
+    Seed tracks get waveformUrl placed after audioUrl (or removed); scraper
+    catalog rows keep their own waveform_url field in place.
+    """
+    if 'audio_url' in track:
+        return {**track, 'waveform_url': catalog_waveform_url(track.get('waveform_url'), url)}
+    updated = {}
+    for key, value in track.items():
+        if key == 'waveformUrl':
+            continue
+        updated[key] = value
+        if key == 'audioUrl' and url:
+            updated['waveformUrl'] = url
+    return updated
+
+def update_tracks(tracks_file: Path, fmt: str = 'dat', audio_dir: Path = AUDIO_DIR) -> Optional[int]:
+    """Fill in the waveform URLs in a tracks file, returning how many tracks have one
+
+    The file keeps its layout (pretty or compact JSON array, or NDJSON), and
+    is only rewritten if a URL changed, so stages keyed on its mtime don't
+    rerun for nothing. Returns None if it can't be read as track records.
+    """
+    def updated_tracks():
+        with gen.open_tracks(tracks_file) as f:
+            for track in gen.iter_track_records(f):
+                url = waveform_url(track.get('audioUrl', track.get('audio_url')), fmt, audio_dir)
+                yield track, with_waveform_url(track, url), url
+
+    try:
+        linked = 0
+        changed = False
+        for track, updated, url in updated_tracks():
+            linked += url is not None
+            changed = changed or list(updated.items()) != list(track.items())
+        if changed:
+            with open(tracks_file, 'r') as f:
+                head = f.read(2)
+            output_format = 'ndjson' if not head.startswith('[') else 'json' if head == '[\n' else 'compact'
+            generate_seed_data.write_records(str(tracks_file), (updated for _, updated, _ in updated_tracks()),
+                                             output_format)
+    except json.JSONDecodeError as e:
+        print(f"⚠️  {tracks_file} is not valid JSON ({e}); waveform URLs not filled in")
+        return None
+    return linked
+
+def update_database(db_path: Path, fmt: str = 'dat', audio_dir: Path = AUDIO_DIR) -> Optional[int]:
+    """Fill in waveform_url in a catalog database's tracks table, returning how many rows have one
+
+    Only rows whose value changes are written. Returns None if the database
+    has no such table.
+    """
+    conn = sqlite3.connect(db_path)
+    try:
+        with conn:
+            linked = 0
+            updates = []
+            for row_id, audio_url, current in conn.execute('SELECT id, audio_url, waveform_url FROM tracks'):
+                url = waveform_url(audio_url, fmt, audio_dir)
+                linked += url is not None
+                value = catalog_waveform_url(current, url)
+                if value != (current or ''):
+                    updates.append((value, row_id))
+            conn.executemany('UPDATE tracks SET waveform_url = ? WHERE id = ?', updates)
+    except sqlite3.Error as e:
+        print(f"⚠️  Could not update {db_path} ({e}); waveform_url not filled in")
+        return None
+    finally:
+        conn.close()
+    return linked
+
+def main():
+    parser = argparse.ArgumentParser(description='Compute waveform peaks for audio files and link them from tracks')
+    parser.add_argument('--audio-dir', type=Path, default=AUDIO_DIR)
+    parser.add_argument('--tracks-file', type=Path, default=TRACKS_FILE,
+                        help='Seed tracks (JSON array or NDJSON) whose waveformUrl to fill in')
+    parser.add_argument('--catalog-file', type=Path, default=CATALOG_FILE,
+                        help='Scraper catalog JSON whose waveform_url to fill in')
+    parser.add_argument('--database', type=Path, default=CATALOG_DB,
+                        help='Scraper catalog database whose tracks.waveform_url to fill in')
+    parser.add_argument('--format', choices=list(PEAK_FORMATS), default='dat',
+                        help='audiowaveform binary .dat (default, 2 bytes per peak) or JSON')
+    parser.add_argument('--force', action='store_true', help='Recompute peaks even where they are current')
+    parser.add_argument('--jobs', '-j', type=int, default=os.cpu_count() or 1,
+                        help='Files decoded in parallel (default: CPU count)')
+    instrumentation.add_arguments(parser)
+    args = parser.parse_args()
+    instrumentation.configure(args.metrics)
+
+    with instrumentation.profiled(args.profile, 'audio_waveforms'), instrumentation.span('waveforms') as stage:
+        # Renditions share their track's peaks
+        paths = audio_files(args.audio_dir)
+        print(f"〰️  Computing waveform peaks for {len(paths)} files in {args.audio_dir}...")
+        counts = {'computed': 0, 'current': 0, 'failed': 0}
+        written = 0
+        with instrumentation.span('waveforms.peaks'):
+            for path, status, size in iter_waveforms(paths, args.format, args.force, max(1, args.jobs)):
+                counts[status] += 1
+                written += size
+        with instrumentation.span('waveforms.tracks'):
+            linked = {path: update_tracks(path, args.format, args.audio_dir)
+                      for path in (args.tracks_file, args.catalog_file) if path.exists()}
+            if args.database.exists():
+                linked[args.database] = update_database(args.database, args.format, args.audio_dir)
+        stage.set(files=len(paths), bytes=written, **counts)
+
+    print(f"\n✅ {counts['computed']} peak files written ({written / 1e3:.1f} KB), "
+          f"{counts['current']} already current")
+    if counts['failed']:
+        print(f"⚠️  {counts['failed']} files could not be decoded")
+    for path, count in linked.items():
+        if count is not None:
+            print(f"🔗 {count} tracks in {path} have a waveform URL")
+
+if __name__ == '__main__':
+    main()
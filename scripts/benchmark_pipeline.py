@@ -0,0 +1,405 @@
+#!/usr/bin/env python3
+"""
+Benchmark the Python data pipeline
+Times track generation, seed data generation at several catalog sizes,
+playlist matching, mood audio rendering per mood, the on-demand audio stream
+service under concurrent listeners, downloading/validating audio against a
+local HTTP server, and waveform peak extraction. Every benchmark runs in a
+fresh process so its peak RSS is its own, and each run is saved as JSON so
+throughput and memory regressions show up when runs are compared.
+
+Usage:
+    python3 scripts/benchmark_pipeline.py
+    python3 scripts/benchmark_pipeline.py --sizes 150x50 1000000x100000
+    python3 scripts/benchmark_pipeline.py --only seed_data --compare data/benchmarks/pipeline-<old>.json
+"""
+
+import argparse
+import functools
+import http.server
+import json
+import multiprocessing
+import platform
+import random
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import wave
+from contextlib import redirect_stdout
+from datetime import datetime, timezone
+from io import StringIO
+from pathlib import Path
+
+import generate_seed_data
+
+RESULTS_DIR = Path(__file__).parent.parent / 'data' / 'benchmarks'
+DEFAULT_SIZES = ['150x50', '10000x1000', '100000x10000']
+QUICK_SIZES = ['150x50', '10000x1000']
+# A benchmark whose throughput drops by more than this against the baseline
+# is reported as a regression
+DEFAULT_THRESHOLD = 0.10
+
+def parse_size(value):
+    """Parse 'TRACKSxPLAYLISTS' into (tracks, playlists)"""
+    tracks, _, playlists = value.lower().partition('x')
+    return int(tracks), int(playlists or 50)
+
+def have_numpy():
+    try:
+        import numpy  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+# Benchmarks: each does its own setup, times only the work being measured,
+# and returns the elapsed seconds with how many items it processed
+
+def bench_generate_track(count=20000):
+    """generate_track() calls, cycling through the moods"""
+    rng = random.Random(1)
+    moods = generate_seed_data.MOODS
+    genres = generate_seed_data.GENRES
+    started = time.perf_counter()
+    for i in range(count):
+        generate_seed_data.generate_track(i + 1, moods[i % len(moods)], genres, rng)
+    return {'seconds': time.perf_counter() - started, 'items': count, 'unit': 'tracks'}
+
+def bench_vectorized_tracks(count=200000):
+    """Tracks from the NumPy batch generator"""
+    import vectorized_tracks
+    rng = vectorized_tracks.shard_generator(1, 0)
+    started = time.perf_counter()
+    for _ in vectorized_tracks.iter_track_range(1, count + 1, count, rng):
+        pass
+    return {'seconds': time.perf_counter() - started, 'items': count, 'unit': 'tracks'}
+
+def bench_seed_data(num_tracks, num_playlists, seed=1, engine='python', playlist_match='tags'):
+    """Generate and write a catalog of the given size as NDJSON"""
+    with tempfile.TemporaryDirectory(prefix='seed-bench-') as out_dir:
+        started = time.perf_counter()
+        with redirect_stdout(StringIO()):
+            generate_seed_data.generate_seed_data(
+                num_tracks=num_tracks,
+                num_artists=max(50, num_tracks // 100),
+                num_albums=max(30, num_tracks // 10),
+                num_playlists=num_playlists,
+                seed=seed,
+                out_dir=out_dir,
+                fmt='ndjson',
+                engine=engine,
+                playlist_match=playlist_match,
+            )
+        return {'seconds': time.perf_counter() - started, 'items': num_tracks, 'unit': 'tracks'}
+
+def bench_playlist_matching(num_tracks, num_playlists, playlist_match='tags'):
+    """Stream tracks through TrackCollector and assemble every playlist"""
+    rng = random.Random(1)
+    specs = generate_seed_data.draw_playlist_specs(num_playlists, rng)
+    tracks = list(generate_seed_data.iter_tracks(num_tracks, rng.getrandbits(64)))
+    started = time.perf_counter()
+    collector = generate_seed_data.TrackCollector(num_tracks, 30, specs, playlist_match)
+    for _ in collector.observe(tracks):
+        pass
+    for i in range(num_playlists):
+        collector.tracks_for_playlist(i)
+    return {'seconds': time.perf_counter() - started, 'items': num_tracks, 'unit': 'tracks'}
+
+def mood_render_jobs(mood, count, audio_dir):
+    """count render jobs for a mood, with that mood's typical feelings and vibes"""
+    import generate_mood_matched_audio as gen
+    gen.AUDIO_DIR = Path(audio_dir)
+    config = generate_seed_data.get_mood_config(mood)
+    rng = random.Random(mood)
+    return [gen.build_render_job(i + 1, mood, rng.sample(config['feelings'], 2),
+                                 rng.randint(*config['vibe_range']), 30000)
+            for i in range(count)]
+
+def bench_mood_audio(mood, count=4):
+    """generate_mood_audio()'s ffmpeg render of 30 s tracks for one mood"""
+    import generate_mood_matched_audio as gen
+    with tempfile.TemporaryDirectory(prefix='audio-bench-') as audio_dir:
+        jobs = mood_render_jobs(mood, count, audio_dir)
+        started = time.perf_counter()
+        for i, (_, _, _, cmd, _) in enumerate(jobs):
+            gen.run_ffmpeg(i + 1, cmd)
+        return {'seconds': time.perf_counter() - started, 'items': count, 'unit': 'tracks'}
+
+def bench_mood_synth(mood, count=4):
+    """NumPy synthesis (no encoding) of 30 s tracks for one mood"""
+    import mood_synth
+    with tempfile.TemporaryDirectory(prefix='audio-bench-') as audio_dir:
+        jobs = mood_render_jobs(mood, count, audio_dir)
+        started = time.perf_counter()
+        for _, _, plan, _, _ in jobs:
+            mood_synth.render_plan(plan)
+        return {'seconds': time.perf_counter() - started, 'items': count, 'unit': 'tracks'}
+
+def stream_test_tracks(count):
+    """Track records whose render plans all differ (each has its own duration), so none share a render"""
+    import generate_mood_matched_audio as gen
+    moods = list(gen.MOOD_AUDIO_CONFIG)
+    return {f'track-{i + 1}': {'id': f'track-{i + 1}', 'duration': 20000 + 100 * i,
+                               'moodTags': {'mood': moods[i % len(moods)], 'feelings': [], 'vibe': 50}}
+            for i in range(count)}
+
+def fetch_stream(url):
+    """(seconds to first byte, seconds to last byte, bytes) for one GET"""
+    import urllib.request
+    started = time.perf_counter()
+    with urllib.request.urlopen(url) as response:
+        received = len(response.read(1))
+        first_byte = time.perf_counter() - started
+        while chunk := response.read(64 * 1024):
+            received += len(chunk)
+    return first_byte, time.perf_counter() - started, received
+
+def bench_stream_service(streams, warm=False):
+    """audio_stream_server under `streams` concurrent listeners, each on a different track
+    
+    Cold runs render every stream on demand; warm runs request tracks already
+    in the cache. Besides time-to-first-byte, realtime_min is the slowest
+    stream's audio seconds delivered per wall second: below 1 some listener
+    would have stalled, which is where stream capacity runs out.
+    """
+    import audio_stream_server
+    from concurrent.futures import ThreadPoolExecutor
+    tracks = stream_test_tracks(streams)
+    with tempfile.TemporaryDirectory(prefix='stream-bench-') as tmp:
+        server = audio_stream_server.make_server(tracks, port=0, cache_dir=Path(tmp))
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        try:
+            urls = [f'http://127.0.0.1:{server.server_address[1]}/audio/{key}.mp3' for key in tracks]
+            with ThreadPoolExecutor(max_workers=streams) as executor:
+                if warm:
+                    list(executor.map(fetch_stream, urls))
+                started = time.perf_counter()
+                results = list(executor.map(fetch_stream, urls))
+                elapsed = time.perf_counter() - started
+        finally:
+            server.shutdown()
+            server.server_close()
+    first_bytes = sorted(r[0] for r in results)
+    realtime = [track['duration'] / 1000 / r[1] for track, r in zip(tracks.values(), results)]
+    return {'seconds': elapsed, 'items': streams, 'unit': 'streams', 'bytes': sum(r[2] for r in results),
+            'ttfb_p50_ms': round(first_bytes[len(first_bytes) // 2] * 1000, 1),
+            'ttfb_p95_ms': round(first_bytes[min(len(first_bytes) - 1, int(len(first_bytes) * 0.95))] * 1000, 1),
+            'realtime_min': round(min(realtime), 2)}
+
+def write_test_wav(path, seconds, sample_rate=22050):
+    """Mono 16-bit noise, a stand-in for downloaded audio"""
+    rng = random.Random(str(path))
+    with wave.open(str(path), 'wb') as w:
+        w.setnchannels(1)
+        w.setsampwidth(2)
+        w.setframerate(sample_rate)
+        w.writeframes(rng.randbytes(int(seconds * sample_rate) * 2))
+
+def write_test_mp3(path, seconds):
+    """Silent 128 kb/s 44.1 kHz MPEG-1 Layer III frames (headers are all the validator reads)"""
+    header = bytes([0xff, 0xfb, 0x90, 0x00])
+    frame = header + bytes(417 - len(header))
+    with open(path, 'wb') as f:
+        f.write(frame * int(seconds * 44100 / 1152))
+
+def make_audio_files(directory, count, seconds):
+    """Alternate WAV and MP3 test files in directory"""
+    paths = []
+    for i in range(count):
+        path = Path(directory) / f'track-{i + 1}.{"wav" if i % 2 else "mp3"}'
+        (write_test_wav if i % 2 else write_test_mp3)(path, seconds)
+        paths.append(path)
+    return paths
+
+class QuietHandler(http.server.SimpleHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+def bench_download(count=40, seconds=20):
+    """download_batch() with header validation, against a local HTTP server"""
+    import download_pixabay_music
+    with tempfile.TemporaryDirectory(prefix='download-bench-') as tmp:
+        served = Path(tmp) / 'served'
+        fetched = Path(tmp) / 'fetched'
+        served.mkdir()
+        fetched.mkdir()
+        paths = make_audio_files(served, count, seconds)
+        handler = functools.partial(QuietHandler, directory=str(served))
+        server = http.server.ThreadingHTTPServer(('127.0.0.1', 0), handler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        try:
+            base = f'http://127.0.0.1:{server.server_address[1]}'
+            jobs = [(f'{base}/{p.name}', fetched / p.name) for p in paths]
+            started = time.perf_counter()
+            with redirect_stdout(StringIO()):
+                results = download_pixabay_music.download_batch(jobs)
+            elapsed = time.perf_counter() - started
+        finally:
+            server.shutdown()
+        if not all(r['ok'] for r in results):
+            raise RuntimeError(f"{sum(not r['ok'] for r in results)} downloads failed")
+        return {'seconds': elapsed, 'items': count, 'unit': 'files',
+                'bytes': sum(r['bytes'] for r in results)}
+
+def bench_validate(count=200, seconds=20):
+    """audio_probe.validate_directory() over fresh files (no manifest hits)"""
+    import audio_probe
+    with tempfile.TemporaryDirectory(prefix='validate-bench-') as tmp:
+        audio_dir = Path(tmp) / 'audio'
+        audio_dir.mkdir()
+        make_audio_files(audio_dir, count, seconds)
+        started = time.perf_counter()
+        summary = audio_probe.validate_directory(audio_dir, Path(tmp) / 'manifest.json', force=True)
+        elapsed = time.perf_counter() - started
+        if summary['invalid']:
+            raise RuntimeError(f"{len(summary['invalid'])} test files failed validation")
+        return {'seconds': elapsed, 'items': count, 'unit': 'files'}
+
+def bench_waveforms(count=100, seconds=20):
+    """audio_waveforms peak computation over fresh files (decode plus min/max reduction)"""
+    import audio_waveforms
+    with tempfile.TemporaryDirectory(prefix='waveform-bench-') as tmp:
+        paths = make_audio_files(tmp, count, seconds)
+        started = time.perf_counter()
+        with redirect_stdout(StringIO()):
+            statuses = [status for _, status, _ in audio_waveforms.iter_waveforms(paths, force=True,
+                                                                                   workers=multiprocessing.cpu_count())]
+        elapsed = time.perf_counter() - started
+        if 'failed' in statuses:
+            raise RuntimeError(f"{statuses.count('failed')} test files could not be decoded")
+        return {'seconds': elapsed, 'items': count, 'unit': 'files'}
+
+def peak_rss_mb():
+    """Peak resident set size of this process so far, in MB"""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and kilobytes elsewhere
+    return peak / (1 << 20) if sys.platform == 'darwin' else peak / 1024
+
+def run_benchmark(task):
+    """Worker: best of `repeat` runs of one benchmark, plus this process's peak RSS"""
+    name, func_name, params, repeat = task
+    runs = [globals()[func_name](**params) for _ in range(repeat)]
+    best = min(runs, key=lambda r: r['seconds'])
+    return dict(best, name=name, params=params, repeat=repeat,
+                throughput=best['items'] / best['seconds'] if best['seconds'] > 0 else 0.0,
+                peak_rss_mb=round(peak_rss_mb(), 1))
+
+def build_suite(sizes, quick=False):
+    """(name, function name, params) for every benchmark that can run here"""
+    scale = 10 if quick else 1
+    suite = [('generate_track', 'bench_generate_track', {'count': 20000 // scale})]
+    if have_numpy():
+        suite.append(('vectorized_tracks', 'bench_vectorized_tracks', {'count': 200000 // scale}))
+    for num_tracks, num_playlists in sizes:
+        size = f'{num_tracks}x{num_playlists}'
+        suite.append((f'seed_data[{size}]', 'bench_seed_data',
+                      {'num_tracks': num_tracks, 'num_playlists': num_playlists}))
+        suite.append((f'playlist_matching[{size}]', 'bench_playlist_matching',
+                      {'num_tracks': num_tracks, 'num_playlists': num_playlists}))
+        if have_numpy():
+            suite.append((f'playlist_similarity[{size}]', 'bench_playlist_matching',
+                          {'num_tracks': num_tracks, 'num_playlists': num_playlists,
+                           'playlist_match': 'similarity'}))
+    import generate_mood_matched_audio as gen
+    for mood in gen.MOOD_AUDIO_CONFIG:
+        if shutil.which('ffmpeg'):
+            suite.append((f'mood_audio[{mood}]', 'bench_mood_audio', {'mood': mood}))
+        if have_numpy():
+            suite.append((f'mood_synth[{mood}]', 'bench_mood_synth', {'mood': mood}))
+    if shutil.which('ffmpeg'):
+        for streams in ((1, 8) if quick else (1, 8, 32)):
+            for warm in (False, True):
+                suite.append((f"stream_service[{'warm' if warm else 'cold'}x{streams}]", 'bench_stream_service',
+                              {'streams': streams, 'warm': warm}))
+    suite.append(('download', 'bench_download', {'count': 40 // scale}))
+    suite.append(('validate', 'bench_validate', {'count': 200 // scale}))
+    if shutil.which('ffmpeg') and have_numpy():
+        suite.append(('waveforms', 'bench_waveforms', {'count': 100 // scale}))
+    return suite
+
+def git_commit():
+    try:
+        result = subprocess.run(['git', 'rev-parse', 'HEAD'], capture_output=True, text=True,
+                                cwd=Path(__file__).parent)
+        return result.stdout.strip() or None
+    except FileNotFoundError:
+        return None
+
+def compare(results, baseline_file, threshold):
+    """Print each benchmark's change against a saved run, returning the regressions"""
+    with open(baseline_file, 'r') as f:
+        baseline = {r['name']: r for r in json.load(f)['results']}
+    regressions = []
+    print(f"\n📊 Against {baseline_file}:")
+    for result in results:
+        old = baseline.get(result['name'])
+        if not old or not old['throughput']:
+            continue
+        change = result['throughput'] / old['throughput'] - 1
+        rss_change = result['peak_rss_mb'] - old['peak_rss_mb']
+        regressed = change < -threshold
+        if regressed:
+            regressions.append(result['name'])
+        print(f"{'⚠️ ' if regressed else '  '} {result['name']:<32} throughput {change:+7.1%}   "
+              f"peak RSS {rss_change:+8.1f} MB")
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the Python data pipeline')
+    parser.add_argument('--sizes', nargs='+', type=parse_size, default=None,
+                        metavar='TRACKSxPLAYLISTS', help=f"Catalog sizes (default: {' '.join(DEFAULT_SIZES)})")
+    parser.add_argument('--quick', action='store_true', help=f"Smaller workloads (sizes {' '.join(QUICK_SIZES)})")
+    parser.add_argument('--only', nargs='+', metavar='NAME', help='Only run benchmarks whose name contains NAME')
+    parser.add_argument('--repeat', type=int, default=1, help='Runs per benchmark; the fastest is kept')
+    parser.add_argument('--output', type=Path, default=None,
+                        help='Results file (default: data/benchmarks/pipeline-<UTC time>.json)')
+    parser.add_argument('--compare', type=Path, metavar='BASELINE', help='Earlier results file to compare against')
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                        help=f'Throughput drop that counts as a regression (default: {DEFAULT_THRESHOLD * 100:.0f}%%)')
+    args = parser.parse_args()
+
+    sizes = args.sizes or [parse_size(s) for s in (QUICK_SIZES if args.quick else DEFAULT_SIZES)]
+    suite = build_suite(sizes, args.quick)
+    if args.only:
+        suite = [b for b in suite if any(pattern in b[0] for pattern in args.only)]
+
+    # Each benchmark gets a fresh interpreter so ru_maxrss is its own peak
+    context = multiprocessing.get_context('spawn')
+    results = []
+    print(f"⏱️  Running {len(suite)} benchmarks")
+    for name, func_name, params in suite:
+        with context.Pool(1) as pool:
+            result = pool.apply(run_benchmark, ((name, func_name, params, max(1, args.repeat)),))
+        results.append(result)
+        extra = f", {result['bytes'] / result['seconds'] / 1e6:.1f} MB/s" if 'bytes' in result else ''
+        if 'ttfb_p50_ms' in result:
+            extra += (f", TTFB p50 {result['ttfb_p50_ms']:.0f} ms / p95 {result['ttfb_p95_ms']:.0f} ms, "
+                      f"slowest stream {result['realtime_min']:.1f}x realtime")
+        print(f"  {name:<32} {result['seconds']:8.3f}s  {result['throughput']:>12,.1f} {result['unit']}/s"
+              f"{extra}  peak RSS {result['peak_rss_mb']:7.1f} MB")
+
+    started_at = datetime.now(timezone.utc)
+    output = args.output or RESULTS_DIR / f"pipeline-{started_at.strftime('%Y%m%dT%H%M%SZ')}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump({
+            'timestamp': started_at.isoformat(),
+            'commit': git_commit(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpus': multiprocessing.cpu_count(),
+            'results': results,
+        }, f, indent=2)
+    print(f"\n✅ Results written to {output}")
+
+    if args.compare:
+        regressions = compare(results, args.compare, args.threshold)
+        if regressions:
+            print(f"\n⚠️  {len(regressions)} benchmarks regressed by more than {args.threshold:.0%}")
+            sys.exit(1)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,393 @@
+#!/usr/bin/env python3
+"""
+Columnar, dictionary-encoded catalog format for the EmPulse mock data
+A compact alternative to the pretty-printed data/mock/*.json files:
+
+- every field is a flat little-endian binary column (one file per column)
+- strings (moods, feelings, genres, formats, qualities, titles...) are stored
+  as integer codes into a per-column dictionary
+- "track-N" style ids are stored as integers, and URLs as the varying part
+  of one shared template
+- album and playlist track lists are offset arrays of row indexes into the
+  track table, instead of embedded {id, name, duration} copies
+
+Columns can be memory-mapped with NumPy (or read with the array module when
+NumPy is not installed), and the catalog converts back to today's JSON.
+
+Usage:
+    python3 scripts/generate_seed_data.py --format columnar --out-dir data/mock
+    python3 scripts/compact_catalog.py data/mock/catalog --to-json data/mock
+"""
+
+import argparse
+import json
+import os
+import sys
+from array import array
+
+try:
+    import numpy as np
+except ImportError:  # columns fall back to array.array
+    np = None
+
+FORMAT_VERSION = 1
+MANIFEST_NAME = 'catalog.json'
+
+# Shared URL templates; '{}' is the part stored per record
+TEMPLATES = {
+    'unsplash': 'https://images.unsplash.com/{}?w=400&h=400&fit=crop&q=80',
+    'audio': '/audio/track-{}.mp3',
+}
+
+# Per entity, in the key order of the JSON records: (path, kind, arg)
+#   id        "<arg>N" stored as int32 N
+#   int/bool  int32 / uint8
+#   str       dictionary code
+#   strs      list of dictionary codes (offsets + codes)
+#   template  TEMPLATES[arg] with the varying part dictionary-encoded
+#   self-url  TEMPLATES[arg] filled with the record's own id number; not stored
+#   track-refs  [{id, name, duration}] stored as offsets + track row indexes
+SCHEMA = {
+    'tracks': [
+        ('id', 'id', 'track-'),
+        ('name', 'str', None),
+        ('artist', 'str', None),
+        ('artistId', 'id', 'artist-'),
+        ('album', 'str', None),
+        ('albumId', 'id', 'album-'),
+        ('duration', 'int', None),
+        ('audioUrl', 'self-url', 'audio'),
+        ('coverArt', 'template', 'unsplash'),
+        ('moodTags.mood', 'str', None),
+        ('moodTags.feelings', 'strs', None),
+        ('moodTags.vibe', 'int', None),
+        ('moodTags.genres', 'strs', None),
+        ('format', 'str', None),
+        ('quality', 'str', None),
+        ('releaseDate', 'str', None),
+    ],
+    'artists': [
+        ('id', 'id', 'artist-'),
+        ('name', 'str', None),
+        ('image', 'template', 'unsplash'),
+        ('followers', 'int', None),
+        ('verified', 'bool', None),
+        ('bio', 'str', None),
+        ('genre', 'strs', None),
+    ],
+    'albums': [
+        ('id', 'id', 'album-'),
+        ('name', 'str', None),
+        ('artist.id', 'id', 'artist-'),
+        ('artist.name', 'str', None),
+        ('artist.image', 'template', 'unsplash'),
+        ('artist.followers', 'int', None),
+        ('artist.verified', 'bool', None),
+        ('coverArt', 'template', 'unsplash'),
+        ('tracks', 'track-refs', None),
+        ('releaseDate', 'str', None),
+        ('label', 'str', None),
+        ('copyright', 'str', None),
+        ('totalDuration', 'int', None),
+    ],
+    'playlists': [
+        ('id', 'id', 'playlist-'),
+        ('name', 'str', None),
+        ('description', 'str', None),
+        ('coverArt', 'template', 'unsplash'),
+        ('owner', 'str', None),
+        ('ownerId', 'str', None),
+        ('tracks', 'track-refs', None),
+        ('moodTags.mood', 'str', None),
+        ('moodTags.feelings', 'strs', None),
+        ('moodTags.vibe', 'int', None),
+        ('moodTags.genres', 'strs', None),
+        ('totalDuration', 'int', None),
+        ('createdAt', 'str', None),
+        ('updatedAt', 'str', None),
+    ],
+}
+
+FIXED_TYPECODES = {'id': 'i', 'int': 'i', 'bool': 'B'}
+NUMPY_DTYPES = {'B': '<u1', 'H': '<u2', 'I': '<u4', 'i': '<i4'}
+FLUSH_EVERY = 65536
+
+def code_typecode(size):
+    """Narrowest unsigned typecode that can hold codes 0..size-1"""
+    if size <= 1 << 8:
+        return 'B'
+    if size <= 1 << 16:
+        return 'H'
+    return 'I'
+
+def get_path(record, path):
+    for key in path.split('.'):
+        record = record[key]
+    return record
+
+def set_path(record, path, value):
+    keys = path.split('.')
+    for key in keys[:-1]:
+        record = record.setdefault(key, {})
+    record[keys[-1]] = value
+
+def strip_template(value, template):
+    """The part of value that fills template's '{}' slot"""
+    prefix, _, suffix = template.partition('{}')
+    if not (value.startswith(prefix) and value.endswith(suffix)):
+        raise ValueError(f"{value!r} does not match URL template {template!r}")
+    return value[len(prefix):len(value) - len(suffix)]
+
+def parse_id(value, prefix):
+    if not value.startswith(prefix):
+        raise ValueError(f"{value!r} is not a {prefix}N id")
+    return int(value[len(prefix):])
+
+def narrow_codes(path, dictionary_size):
+    """Rewrite a uint32 code column with the narrowest typecode that fits"""
+    typecode = code_typecode(dictionary_size)
+    if typecode == 'I':
+        return typecode
+    tmp_path = path + '.tmp'
+    with open(path, 'rb') as src, open(tmp_path, 'wb') as dst:
+        while True:
+            chunk = array('I')
+            chunk.frombytes(src.read(FLUSH_EVERY * 4))
+            if not chunk:
+                break
+            if sys.byteorder != 'little':
+                chunk.byteswap()
+            narrowed = array(typecode, chunk)
+            if sys.byteorder != 'little':
+                narrowed.byteswap()
+            narrowed.tofile(dst)
+    os.replace(tmp_path, path)
+    return typecode
+
+class Column:
+    """One on-disk column, appended to in chunks so memory stays bounded"""
+
+    def __init__(self, path, typecode):
+        self.path = path
+        self.typecode = typecode
+        self.buffer = array(typecode)
+        self.length = 0
+        self.last = None
+        self.file = open(path, 'wb')
+
+    def append(self, value):
+        self.buffer.append(value)
+        self.last = value
+        if len(self.buffer) >= FLUSH_EVERY:
+            self.flush()
+
+    def flush(self):
+        if sys.byteorder != 'little':
+            self.buffer.byteswap()
+        self.buffer.tofile(self.file)
+        self.length += len(self.buffer)
+        self.buffer = array(self.typecode)
+
+    def close(self):
+        self.flush()
+        self.file.close()
+
+class CatalogWriter:
+    """Encodes entity record streams into a columnar catalog directory"""
+
+    def __init__(self, out_dir):
+        self.out_dir = out_dir
+        os.makedirs(out_dir, exist_ok=True)
+        self.entities = {}
+
+    def _open(self, name, typecode):
+        return Column(os.path.join(self.out_dir, f'{name}.bin'), typecode)
+
+    def write(self, kind, records):
+        """Encode every record of an entity kind, returning how many were written"""
+        schema = SCHEMA[kind]
+        columns = {}
+        dictionaries = {}
+        for path, field_kind, _ in schema:
+            name = f'{kind}.{path}'
+            if field_kind in FIXED_TYPECODES:
+                columns[path] = {'values': self._open(name, FIXED_TYPECODES[field_kind])}
+            elif field_kind in ('str', 'template'):
+                columns[path] = {'values': self._open(name, 'I')}
+            elif field_kind == 'strs':
+                columns[path] = {'offsets': self._open(f'{name}.offsets', 'I'),
+                                 'values': self._open(name, 'I')}
+                columns[path]['offsets'].append(0)
+            elif field_kind == 'track-refs':
+                columns[path] = {'offsets': self._open(f'{name}.offsets', 'I'),
+                                 'values': self._open(name, 'i')}
+                columns[path]['offsets'].append(0)
+            dictionaries[path] = {}
+
+        def encode(path, value):
+            codes = dictionaries[path]
+            code = codes.get(value)
+            if code is None:
+                code = codes[value] = len(codes)
+            return code
+
+        count = 0
+        for record in records:
+            record_id = None
+            for path, field_kind, arg in schema:
+                value = get_path(record, path)
+                column = columns.get(path)
+                if field_kind == 'id':
+                    number = parse_id(value, arg)
+                    if path == 'id':
+                        record_id = number
+                    column['values'].append(number)
+                elif field_kind == 'int':
+                    column['values'].append(value)
+                elif field_kind == 'bool':
+                    column['values'].append(int(value))
+                elif field_kind == 'str':
+                    column['values'].append(encode(path, value))
+                elif field_kind == 'template':
+                    column['values'].append(encode(path, strip_template(value, TEMPLATES[arg])))
+                elif field_kind == 'self-url':
+                    if value != TEMPLATES[arg].format(record_id):
+                        raise ValueError(f"{value!r} does not follow URL template {TEMPLATES[arg]!r}")
+                elif field_kind == 'strs':
+                    for item in value:
+                        column['values'].append(encode(path, item))
+                    column['offsets'].append(column['offsets'].last + len(value))
+                elif field_kind == 'track-refs':
+                    for ref in value:
+                        # Track ids are sequential, so track-N lives in row N-1
+                        column['values'].append(parse_id(ref['id'], 'track-') - 1)
+                    column['offsets'].append(column['offsets'].last + len(value))
+            count += 1
+
+        manifest_columns = {}
+        for path, field_kind, arg in schema:
+            entry = {'kind': field_kind}
+            if arg is not None:
+                entry['prefix' if field_kind == 'id' else 'template'] = arg
+            column = columns.get(path)
+            if column:
+                for part in column.values():
+                    part.close()
+                entry['file'] = os.path.basename(column['values'].path)
+                entry['typecode'] = column['values'].typecode
+                if 'offsets' in column:
+                    entry['offsets'] = os.path.basename(column['offsets'].path)
+                if field_kind in ('str', 'template', 'strs'):
+                    entry['dictionary'] = list(dictionaries[path])
+                    entry['typecode'] = narrow_codes(column['values'].path, len(dictionaries[path]))
+            manifest_columns[path] = entry
+        self.entities[kind] = {'count': count, 'columns': manifest_columns}
+        return count
+
+    def close(self):
+        with open(os.path.join(self.out_dir, MANIFEST_NAME), 'w') as f:
+            json.dump({'version': FORMAT_VERSION, 'templates': TEMPLATES, 'entities': self.entities}, f, indent=2)
+
+def read_column(path, typecode, use_numpy=True):
+    """Load one column: a read-only NumPy memmap, or an array.array without NumPy"""
+    if np is not None and use_numpy:
+        if os.path.getsize(path) == 0:
+            return np.zeros(0, dtype=NUMPY_DTYPES[typecode])
+        return np.memmap(path, dtype=NUMPY_DTYPES[typecode], mode='r')
+    values = array(typecode)
+    with open(path, 'rb') as f:
+        values.frombytes(f.read())
+    if sys.byteorder != 'little':
+        values.byteswap()
+    return values
+
+class Catalog:
+    """A columnar catalog opened for reading"""
+
+    def __init__(self, catalog_dir, use_numpy=True):
+        self.catalog_dir = catalog_dir
+        with open(os.path.join(catalog_dir, MANIFEST_NAME), 'r') as f:
+            self.manifest = json.load(f)
+        if self.manifest.get('version') != FORMAT_VERSION:
+            raise ValueError(f"Unsupported catalog version {self.manifest.get('version')}")
+        self.templates = self.manifest['templates']
+        self.use_numpy = use_numpy
+        self._columns = {}
+
+    def count(self, kind):
+        return self.manifest['entities'][kind]['count']
+
+    def column(self, kind, path):
+        """(values, offsets, dictionary) for one column; offsets is None unless it is a list column"""
+        key = (kind, path)
+        if key not in self._columns:
+            entry = self.manifest['entities'][kind]['columns'][path]
+            values = offsets = None
+            if 'file' in entry:
+                values = read_column(os.path.join(self.catalog_dir, entry['file']), entry['typecode'],
+                                     self.use_numpy)
+            if 'offsets' in entry:
+                offsets = read_column(os.path.join(self.catalog_dir, entry['offsets']), 'I', self.use_numpy)
+            self._columns[key] = (values, offsets, entry.get('dictionary'))
+        return self._columns[key]
+
+    def iter_records(self, kind):
+        """Rebuild the JSON records of an entity kind, in order and key order"""
+        schema = SCHEMA[kind]
+        name_codes, _, names = self.column('tracks', 'name')
+        durations = self.column('tracks', 'duration')[0]
+        columns = [(path, field_kind, arg, self.column(kind, path)) for path, field_kind, arg in schema]
+        for row in range(self.count(kind)):
+            record = {}
+            for path, field_kind, arg, (values, offsets, dictionary) in columns:
+                if field_kind == 'id':
+                    value = f"{arg}{int(values[row])}"
+                elif field_kind == 'int':
+                    value = int(values[row])
+                elif field_kind == 'bool':
+                    value = bool(values[row])
+                elif field_kind == 'str':
+                    value = dictionary[values[row]]
+                elif field_kind == 'template':
+                    value = self.templates[arg].format(dictionary[values[row]])
+                elif field_kind == 'self-url':
+                    value = self.templates[arg].format(record['id'].rsplit('-', 1)[1])
+                elif field_kind == 'strs':
+                    value = [dictionary[c] for c in values[offsets[row]:offsets[row + 1]]]
+                else:  # track-refs
+                    value = [{"id": f"track-{int(t) + 1}",
+                              "name": names[name_codes[t]],
+                              "duration": int(durations[t])}
+                             for t in values[offsets[row]:offsets[row + 1]]]
+                set_path(record, path, value)
+            yield record
+
+def main():
+    import generate_seed_data
+
+    parser = argparse.ArgumentParser(description='Inspect or convert a columnar catalog')
+    parser.add_argument('catalog_dir', help='Catalog directory (contains catalog.json)')
+    parser.add_argument('--to-json', metavar='OUT_DIR', help='Convert back to tracks/artists/albums/playlists files')
+    parser.add_argument('--format', dest='fmt', choices=['json', 'compact', 'ndjson'], default='json',
+                        help='Output format for --to-json (default: json)')
+    args = parser.parse_args()
+
+    catalog = Catalog(args.catalog_dir)
+    if not args.to_json:
+        total = 0
+        for name in sorted(os.listdir(args.catalog_dir)):
+            total += os.path.getsize(os.path.join(args.catalog_dir, name))
+        for kind in SCHEMA:
+            print(f"{kind}: {catalog.count(kind)}")
+        print(f"{total / 1e6:.2f} MB on disk")
+        return
+
+    os.makedirs(args.to_json, exist_ok=True)
+    ext = generate_seed_data.OUTPUT_FORMATS[args.fmt]
+    for kind in SCHEMA:
+        path = os.path.join(args.to_json, f'{kind}{ext}')
+        count = generate_seed_data.write_records(path, catalog.iter_records(kind), args.fmt)
+        print(f"✓ Wrote {count} {kind} to {path}")
+
+if __name__ == '__main__':
+    main()
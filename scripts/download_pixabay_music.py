@@ -7,16 +7,27 @@ Pixabay Music: https://pixabay.com/music/
 - Searchable by genre/mood
 """
 
+import argparse
+import hashlib
 import json
 import requests
 import os
-import subprocess
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
-from typing import List, Dict
+from typing import List, Dict, Optional
+from urllib.parse import urlsplit
+
+from requests.adapters import HTTPAdapter
+
+import audio_probe
+import instrumentation
 
 # Pixabay API (you can get a free key at https://pixabay.com/api/docs/)
 # For demo purposes, we'll use a public approach or provide instructions
-PIXABAY_API_KEY = ""  # Get from https://pixabay.com/service/terms/
+PIXABAY_API_KEY = os.environ.get('PIXABAY_API_KEY', "")  # Get from https://pixabay.com/service/terms/
 
 # Alternative: Use direct download links from known royalty-free sources
 ROYALTY_FREE_SOURCES = {
@@ -33,72 +44,364 @@ ROYALTY_FREE_SOURCES = {
     # ... etc
 }
 
-def download_track(url: str, output_path: Path) -> bool:
-    """Download a track from URL"""
+# Batch download settings: how many files are fetched at once overall, and
+# how many of those may hit the same host, so one slow CDN can't starve the rest
+DEFAULT_WORKERS = 8
+DEFAULT_PER_HOST = 4
+DEFAULT_RETRIES = 4
+BACKOFF_BASE = 0.5
+BACKOFF_MAX = 30.0
+CHUNK_SIZE = 256 * 1024
+# Status codes worth retrying; anything else in 4xx is a permanent failure
+RETRY_STATUSES = {408, 425, 429, 500, 502, 503, 504}
+
+class RetryableError(Exception):
+    """A failed attempt that a later attempt may get past"""
+    
+    def __init__(self, message: str, transferred: int = 0, retry_after: Optional[str] = None):
+        super().__init__(message)
+        self.transferred = transferred
+        self.retry_after = retry_after
+
+def new_session(pool_size: int = DEFAULT_WORKERS) -> requests.Session:
+    """A requests.Session whose connection pool can serve every worker"""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
+
+class HostLimiter:
+    """Bounds how many downloads run against any one host at a time"""
+    
+    def __init__(self, per_host: int = DEFAULT_PER_HOST):
+        self.per_host = per_host
+        self.lock = threading.Lock()
+        self.semaphores = {}
+    
+    def __call__(self, url: str) -> threading.BoundedSemaphore:
+        host = urlsplit(url).netloc
+        with self.lock:
+            if host not in self.semaphores:
+                self.semaphores[host] = threading.BoundedSemaphore(self.per_host)
+            return self.semaphores[host]
+
+def backoff_delay(attempt: int, retry_after: Optional[str] = None) -> float:
+    """Seconds to wait before retry number attempt (exponential, jittered)"""
+    if retry_after and retry_after.isdigit():
+        return min(float(retry_after), BACKOFF_MAX)
+    return min(BACKOFF_BASE * 2 ** attempt, BACKOFF_MAX) * random.uniform(0.5, 1.0)
+
+def part_path(output_path: Path) -> Path:
+    """Where an in-progress download of output_path is kept"""
+    return output_path.with_name(output_path.name + '.part')
+
+def fetch_once(session: requests.Session, url: str, part: Path) -> int:
+    """One attempt at completing part, resuming from its current size
+    
+    Returns the bytes transferred by this attempt. Raises RetryableError for
+    failures a later attempt may get past (the partial file is kept).
+    """
+    offset = part.stat().st_size if part.exists() else 0
+    headers = {'Range': f'bytes={offset}-'} if offset else {}
+    written = 0
     try:
-        response = requests.get(url, stream=True, timeout=30)
-        response.raise_for_status()
-        
-        with open(output_path, 'wb') as f:
-            for chunk in response.iter_content(chunk_size=8192):
-                f.write(chunk)
-        
-        # Verify it's a valid audio file
-        result = subprocess.run(
-            ['ffprobe', '-v', 'error', '-show_entries', 'format=duration', '-of', 'json', str(output_path)],
-            capture_output=True,
-            text=True
-        )
-        
-        if result.returncode == 0:
-            return True
+        with session.get(url, headers=headers, stream=True, timeout=30) as response:
+            if response.status_code == 416:
+                # Nothing left past offset: the part file is already complete
+                # if the server's total size agrees, otherwise start over
+                total = response.headers.get('Content-Range', '').rpartition('/')[2]
+                if total.isdigit() and int(total) == offset:
+                    return 0
+                part.unlink()
+                raise RetryableError(f"range {offset}- not satisfiable, restarting")
+            if response.status_code in RETRY_STATUSES:
+                raise RetryableError(f"HTTP {response.status_code}",
+                                     retry_after=response.headers.get('Retry-After'))
+            response.raise_for_status()
+            
+            # A server that ignores Range sends the whole file again
+            resumed = response.status_code == 206
+            expected = response.headers.get('Content-Length')
+            with open(part, 'ab' if resumed else 'wb') as f:
+                for chunk in response.iter_content(chunk_size=CHUNK_SIZE):
+                    f.write(chunk)
+                    written += len(chunk)
+            if expected is not None and written < int(expected):
+                raise RetryableError(f"connection closed after {written} of {expected} bytes", written)
+            return written
+    except (requests.ConnectionError, requests.Timeout, requests.exceptions.ChunkedEncodingError) as e:
+        raise RetryableError(str(e), written) from e
+
+def verify_audio(path: Path, deep: bool = False) -> bool:
+    """Check that path is a readable audio file (deep: also run ffprobe)"""
+    return audio_probe.validate(path, deep)['ok']
+
+def fetch(url: str, output_path: Path, session: Optional[requests.Session] = None,
+          limiter: Optional[HostLimiter] = None, retries: int = DEFAULT_RETRIES, verify: bool = True,
+          deep: bool = False) -> Dict:
+    """Download url to output_path, resuming and retrying, and report how it went
+    
+    Data goes to output_path + '.part' and is only renamed into place once
+    complete, so an interrupted run picks up where it stopped. The result has
+    ok, bytes (transferred by this run), resumed_from, seconds, attempts and error.
+    """
+    session = session or new_session(1)
+    limiter = limiter or HostLimiter()
+    part = part_path(output_path)
+    result = {'url': url, 'path': str(output_path), 'ok': False, 'bytes': 0,
+              'resumed_from': part.stat().st_size if part.exists() else 0,
+              'seconds': 0.0, 'attempts': 0, 'error': None}
+    started = time.perf_counter()
+    try:
+        for attempt in range(retries + 1):
+            result['attempts'] = attempt + 1
+            try:
+                with limiter(url):
+                    result['bytes'] += fetch_once(session, url, part)
+                break
+            except RetryableError as e:
+                result['bytes'] += e.transferred
+                result['error'] = str(e)
+                retry_after = e.retry_after
+            except Exception as e:
+                result['error'] = str(e)
+                result['seconds'] = time.perf_counter() - started
+                return result
+            if attempt < retries:
+                time.sleep(backoff_delay(attempt, retry_after))
         else:
+            result['seconds'] = time.perf_counter() - started
+            return result
+    
+        os.replace(part, output_path)
+        result['seconds'] = time.perf_counter() - started
+        if verify and not verify_audio(output_path, deep):
             output_path.unlink()  # Delete invalid file
-            return False
-    except Exception as e:
-        print(f"Error downloading {url}: {e}")
-        if output_path.exists():
-            output_path.unlink()
-        return False
+            result['error'] = 'not a valid audio file'
+            return result
+        result['ok'] = True
+        result['error'] = None
+        return result
+    finally:
+        instrumentation.event('download', url=url, ok=result['ok'], bytes=result['bytes'],
+                              seconds=round(result['seconds'], 6), attempts=result['attempts'],
+                              resumed_from=result['resumed_from'],
+                              bytes_per_sec=round(result['bytes'] / max(result['seconds'], 1e-9)))
+
+def download_track(url: str, output_path: Path, **kwargs) -> bool:
+    """Download a track from URL"""
+    result = fetch(url, output_path, **kwargs)
+    if result['error']:
+        print(f"Error downloading {url}: {result['error']}")
+    return result['ok']
+
+def format_rate(num_bytes: int, seconds: float) -> str:
+    return f"{num_bytes / max(seconds, 1e-9) / 1e6:.2f} MB/s"
+
+def download_batch(jobs: List[tuple], workers: int = DEFAULT_WORKERS, per_host: int = DEFAULT_PER_HOST,
+                   retries: int = DEFAULT_RETRIES, verify: bool = True, deep: bool = False) -> List[Dict]:
+    """Download (url, output_path) pairs concurrently over one pooled session
+    
+    Prints a line per file with its throughput, then the aggregate.
+    """
+    session = new_session(workers)
+    limiter = HostLimiter(per_host)
+    results = []
+    started = time.perf_counter()
+    with instrumentation.span('download.batch', files=len(jobs), workers=workers) as span, \
+            ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(fetch, url, Path(path), session, limiter, retries, verify, deep)
+                   for url, path in jobs]
+        for future in as_completed(futures):
+            result = future.result()
+            results.append(result)
+            name = Path(result['path']).name
+            if result['ok']:
+                resumed = f", resumed at {result['resumed_from']:,} bytes" if result['resumed_from'] else ''
+                print(f"✓ {name}: {result['bytes']:,} bytes in {result['seconds']:.2f}s "
+                      f"({format_rate(result['bytes'], result['seconds'])}, {result['attempts']} attempt(s){resumed})")
+            else:
+                print(f"✗ {name}: {result['error']} after {result['attempts']} attempt(s)")
+        span.set(downloaded=sum(r['ok'] for r in results), bytes=sum(r['bytes'] for r in results))
+    elapsed = time.perf_counter() - started
+    session.close()
+    
+    ok = [r for r in results if r['ok']]
+    total_bytes = sum(r['bytes'] for r in results)
+    print(f"\n⏱️  {len(ok)}/{len(results)} files, {total_bytes / 1e6:.1f} MB in {elapsed:.2f}s "
+          f"({format_rate(total_bytes, elapsed)}, {len(ok) / max(elapsed, 1e-9):.1f} files/s)")
+    return results
+
+def source_jobs(sources: Dict[str, List[str]], out_dir: Path) -> List[tuple]:
+    """(url, output_path) for every URL in a mood -> URLs mapping"""
+    return [(url, out_dir / f"{mood}-{Path(urlsplit(url).path).name}")
+            for mood, urls in sources.items() for url in urls]
 
-def get_pixabay_tracks(mood: str, count: int = 5) -> List[Dict]:
+# Map moods to Pixabay search terms
+MOOD_SEARCH_TERMS = {
+    'melancholic': 'sad emotional instrumental',
+    'nostalgic': 'nostalgic retro vintage',
+    'reflective': 'calm peaceful ambient',
+    'content': 'happy peaceful acoustic',
+    'joyful': 'happy upbeat cheerful',
+    'euphoric': 'energetic exciting uplifting'
+}
+
+PIXABAY_API_URL = "https://pixabay.com/api/audio/"
+# Pixabay returns at most 200 hits per page and allows 100 requests a minute
+PIXABAY_MAX_PER_PAGE = 200
+PIXABAY_RATE_LIMIT = (100, 60.0)
+CACHE_DIR = Path(__file__).parent.parent / 'data' / '.pixabay_cache'
+CACHE_TTL = 24 * 3600
+CACHE_MAX_ENTRIES = 1000
+
+class ResponseCache:
+    """On-disk cache of Pixabay search responses, one JSON file per query page
+    
+    Entries older than ttl seconds are ignored and removed; past max_entries
+    the least recently written ones are evicted.
+    """
+    
+    def __init__(self, cache_dir: Path = CACHE_DIR, ttl: float = CACHE_TTL, max_entries: int = CACHE_MAX_ENTRIES):
+        self.cache_dir = Path(cache_dir)
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+    
+    def path(self, term: str, page: int, per_page: int) -> Path:
+        key = hashlib.sha1(json.dumps([term, page, per_page]).encode()).hexdigest()
+        return self.cache_dir / f"{key}.json"
+    
+    def get(self, term: str, page: int, per_page: int) -> Optional[Dict]:
+        path = self.path(term, page, per_page)
+        try:
+            with open(path, 'r') as f:
+                entry = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            self.misses += 1
+            return None
+        if time.time() - entry['fetched_at'] > self.ttl:
+            path.unlink(missing_ok=True)
+            self.misses += 1
+            return None
+        self.hits += 1
+        return entry['response']
+    
+    def put(self, term: str, page: int, per_page: int, response: Dict):
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        path = self.path(term, page, per_page)
+        tmp_path = path.with_suffix('.tmp')
+        with open(tmp_path, 'w') as f:
+            json.dump({'fetched_at': time.time(), 'term': term, 'page': page, 'response': response}, f)
+        os.replace(tmp_path, path)
+        self.evict()
+    
+    def evict(self):
+        """Drop expired entries, then the oldest ones past max_entries"""
+        entries = sorted(self.cache_dir.glob('*.json'), key=lambda p: p.stat().st_mtime)
+        cutoff = time.time() - self.ttl
+        for i, path in enumerate(entries):
+            if i < len(entries) - self.max_entries or path.stat().st_mtime < cutoff:
+                path.unlink(missing_ok=True)
+
+class TokenBucket:
+    """Blocks callers so no more than rate requests per period go out, with bursts up to rate"""
+    
+    def __init__(self, rate: int = PIXABAY_RATE_LIMIT[0], period: float = PIXABAY_RATE_LIMIT[1]):
+        self.capacity = rate
+        self.fill_rate = rate / period
+        self.tokens = float(rate)
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+    
+    def acquire(self):
+        with self.lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.fill_rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                time.sleep((1 - self.tokens) / self.fill_rate)
+
+def search_page(term: str, page: int = 1, per_page: int = PIXABAY_MAX_PER_PAGE,
+                session: Optional[requests.Session] = None, cache: Optional[ResponseCache] = None,
+                bucket: Optional[TokenBucket] = None, retries: int = DEFAULT_RETRIES,
+                api_url: str = PIXABAY_API_URL) -> Dict:
+    """One page of Pixabay search results, from the cache when it is fresh"""
+    if cache:
+        cached = cache.get(term, page, per_page)
+        if cached is not None:
+            return cached
+    
+    session = session or requests
+    params = {
+        'key': PIXABAY_API_KEY,
+        'q': term,
+        'category': 'music',
+        'page': page,
+        'per_page': per_page,
+        'safesearch': 'true'
+    }
+    for attempt in range(retries + 1):
+        if bucket:
+            bucket.acquire()
+        response = session.get(api_url, params=params, timeout=30)
+        if response.status_code not in RETRY_STATUSES or attempt == retries:
+            break
+        time.sleep(backoff_delay(attempt, response.headers.get('Retry-After')))
+    response.raise_for_status()
+    data = response.json()
+    if cache:
+        cache.put(term, page, per_page, data)
+    return data
+
+def get_pixabay_tracks(mood: str, count: int = 5, cache: Optional[ResponseCache] = None) -> List[Dict]:
     """Search Pixabay for tracks matching mood"""
     if not PIXABAY_API_KEY:
         print("⚠️  Pixabay API key not set. Using fallback method.")
         return []
     
-    # Map moods to Pixabay search terms
-    search_terms = {
-        'melancholic': 'sad emotional instrumental',
-        'nostalgic': 'nostalgic retro vintage',
-        'reflective': 'calm peaceful ambient',
-        'content': 'happy peaceful acoustic',
-        'joyful': 'happy upbeat cheerful',
-        'euphoric': 'energetic exciting uplifting'
-    }
-    
-    search = search_terms.get(mood.lower(), 'music')
+    search = MOOD_SEARCH_TERMS.get(mood.lower(), 'music')
     
     try:
-        url = f"https://pixabay.com/api/audio/"
-        params = {
-            'key': PIXABAY_API_KEY,
-            'q': search,
-            'category': 'music',
-            'per_page': count,
-            'safesearch': 'true'
-        }
-        
-        response = requests.get(url, params=params, timeout=30)
-        response.raise_for_status()
-        data = response.json()
-        
-        return data.get('hits', [])
+        return search_page(search, 1, count, cache=cache or ResponseCache())['hits']
     except Exception as e:
         print(f"Error querying Pixabay: {e}")
         return []
 
-def main():
+def harvest(moods: List[str], per_mood: int, cache: Optional[ResponseCache] = None,
+            bucket: Optional[TokenBucket] = None, api_url: str = PIXABAY_API_URL) -> Dict[str, List[Dict]]:
+    """Page through Pixabay results until each mood has per_mood hits
+    
+    A hit already claimed by an earlier mood is skipped, so every track
+    appears under exactly one mood. Pages come from the cache when fresh.
+    """
+    session = new_session(1)
+    bucket = bucket or TokenBucket()
+    seen = set()
+    library = {}
+    for mood in moods:
+        term = MOOD_SEARCH_TERMS.get(mood.lower(), 'music')
+        hits = library[mood] = []
+        page = 0
+        while len(hits) < per_mood:
+            page += 1
+            data = search_page(term, page, PIXABAY_MAX_PER_PAGE, session, cache, bucket, api_url=api_url)
+            for hit in data.get('hits', []):
+                if hit['id'] not in seen and len(hits) < per_mood:
+                    seen.add(hit['id'])
+                    hits.append(hit)
+            if not data.get('hits') or page * PIXABAY_MAX_PER_PAGE >= data.get('totalHits', 0):
+                break
+        print(f"✓ {mood}: {len(hits)} hits ({page} page(s))")
+    session.close()
+    return library
+
+def print_instructions():
     print("🎵 Royalty-Free Music Downloader")
     print("=" * 50)
     print("")
@@ -115,7 +418,57 @@ def main():
     print("- Manually download tracks and place in public/audio/")
     print("")
     print("Alternatively, set PIXABAY_API_KEY in this script for automation.")
+    print("Then run with --sources or --urls FILE to download in a batch.")
     print("=" * 50)
 
+def main():
+    parser = argparse.ArgumentParser(description='Download royalty-free music')
+    parser.add_argument('--sources', action='store_true', help='Download every URL in ROYALTY_FREE_SOURCES')
+    parser.add_argument('--urls', type=Path, help='File with one URL per line to download')
+    parser.add_argument('--out-dir', type=Path, default=Path('public/audio'))
+    parser.add_argument('--workers', type=int, default=DEFAULT_WORKERS, help='Concurrent downloads')
+    parser.add_argument('--per-host', type=int, default=DEFAULT_PER_HOST, help='Concurrent downloads per host')
+    parser.add_argument('--retries', type=int, default=DEFAULT_RETRIES, help='Retries per file, with backoff')
+    parser.add_argument('--no-verify', action='store_true', help='Skip the audio header check of downloaded files')
+    parser.add_argument('--deep-verify', action='store_true', help='Also require ffprobe to accept downloaded files')
+    parser.add_argument('--harvest', type=int, metavar='N',
+                        help='Collect up to N Pixabay hits per mood (needs PIXABAY_API_KEY) into --hits-file')
+    parser.add_argument('--hits-file', type=Path, default=Path('data/pixabay_hits.json'))
+    parser.add_argument('--api-url', default=PIXABAY_API_URL, help=argparse.SUPPRESS)
+    parser.add_argument('--cache-ttl', type=float, default=CACHE_TTL, help='Seconds a cached search page stays fresh')
+    instrumentation.add_arguments(parser)
+    args = parser.parse_args()
+    instrumentation.configure(args.metrics)
+    with instrumentation.profiled(args.profile, 'download_pixabay_music'):
+        run(args)
+
+def run(args):
+    if args.harvest:
+        if not PIXABAY_API_KEY:
+            print("⚠️  Set PIXABAY_API_KEY to harvest from Pixabay.")
+            return
+        cache = ResponseCache(ttl=args.cache_ttl)
+        print(f"🔎 Harvesting up to {args.harvest} hits per mood...")
+        library = harvest(list(MOOD_SEARCH_TERMS), args.harvest, cache, api_url=args.api_url)
+        args.hits_file.parent.mkdir(parents=True, exist_ok=True)
+        with open(args.hits_file, 'w') as f:
+            json.dump(library, f, indent=2)
+        print(f"\n✅ {sum(len(h) for h in library.values())} unique hits written to {args.hits_file} "
+              f"({cache.hits} cached pages, {cache.misses} fetched)")
+        return
+    
+    jobs = source_jobs(ROYALTY_FREE_SOURCES, args.out_dir) if args.sources else []
+    if args.urls:
+        urls = [line.strip() for line in args.urls.read_text().splitlines() if line.strip()]
+        jobs += [(url, args.out_dir / Path(urlsplit(url).path).name) for url in urls]
+    if not jobs:
+        print_instructions()
+        return
+    
+    args.out_dir.mkdir(parents=True, exist_ok=True)
+    print(f"⬇️  Downloading {len(jobs)} files ({args.workers} workers, {args.per_host} per host)...")
+    download_batch(jobs, args.workers, args.per_host, args.retries, not args.no_verify,
+                   args.deep_verify)
+
 if __name__ == '__main__':
     main()
@@ -4,11 +4,29 @@ Generate mood-matched audio tracks based on track metadata
 Each track's audio will reflect its mood tags (Melancholic, Joyful, etc.)
 """
 
+import argparse
+import contextlib
+import hashlib
 import json
 import subprocess
 import os
+import shutil
+import sys
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
+import instrumentation
+
+AUDIO_DIR = Path(__file__).parent.parent / 'public' / 'audio'
+TRACKS_FILE = Path(__file__).parent.parent / 'data' / 'mock' / 'tracks.json'
+# Kept outside public/ so it is never served alongside the audio files
+MANIFEST_FILE = Path(__file__).parent.parent / 'data' / 'audio_render_manifest.json'
+MANIFEST_VERSION = 1
+RENDITION_MANIFEST_FILE = AUDIO_DIR / 'renditions.json'
+RENDITION_MANIFEST_VERSION = 1
+
 # Mood to audio parameters mapping
 MOOD_AUDIO_CONFIG = {
     'Melancholic': {
@@ -85,8 +103,8 @@ FEELING_ADJUSTMENTS = {
     'Calm': {'freq_shift': -15, 'volume': -0.15, 'treble_adj': -1},
 }
 
-def generate_mood_audio(track_id, mood, feelings, vibe, duration_ms):
-    """Generate audio file that matches the track's mood"""
+def resolve_render_config(mood, feelings, vibe, duration_ms):
+    """Resolve the final render parameters (config, duration_sec) for a track"""
     
     duration_sec = duration_ms / 1000.0
     if duration_sec > 30:
@@ -116,93 +134,688 @@ def generate_mood_audio(track_id, mood, feelings, vibe, duration_ms):
     config['base_freq'] = max(100, min(600, config['base_freq']))
     config['volume'] = max(0.3, min(0.8, config['volume']))
     
+    return config, duration_sec
+
+# Encoder settings shared by every rendered track
+ENCODER_ARGS = ['-acodec', 'libmp3lame', '-b:a', '192k', '-ar', '44100', '-ac', '2']
+
+# Extra renditions (--renditions) encoded from the same synthesis pass as the
+# primary 192k MP3: the rendered stream is split once per output in a single
+# filter graph, so the tones are generated and filtered only once. They are
+# written to public/audio/renditions/<name>/ and listed, with the primary, in
+# public/audio/renditions.json for clients to pick from.
+PRIMARY_RENDITION = 'mp3-192'
+PREVIEW_SECONDS = 10
+RENDITIONS = {
+    'mp3-128': {'ext': 'mp3', 'codec': 'mp3', 'bitrate': '128k',
+                'encoder': ['-acodec', 'libmp3lame', '-b:a', '128k', '-ar', '44100', '-ac', '2']},
+    'mp3-64': {'ext': 'mp3', 'codec': 'mp3', 'bitrate': '64k',
+               'encoder': ['-acodec', 'libmp3lame', '-b:a', '64k', '-ar', '44100', '-ac', '2']},
+    'flac': {'ext': 'flac', 'codec': 'flac', 'bitrate': None,
+             'encoder': ['-acodec', 'flac', '-ar', '44100', '-ac', '2']},
+    # Every track is at least PREVIEW_SECONDS long, so previews all have
+    # the same length and end on a short fade
+    'preview': {'ext': 'mp3', 'codec': 'mp3', 'bitrate': '128k', 'seconds': PREVIEW_SECONDS,
+                'filter': f'atrim=end={PREVIEW_SECONDS},afade=t=out:st={PREVIEW_SECONDS - 1.5}:d=1.5',
+                'encoder': ['-acodec', 'libmp3lame', '-b:a', '128k', '-ar', '44100', '-ac', '2']},
+}
+
+# How each post-mix filter in a render plan is spelled in an ffmpeg graph
+FILTER_FORMATS = {
+    'volume': 'volume={}',
+    'treble': 'treble=g={}',
+    'bass': 'bass=g={}',
+    'highpass': 'highpass=f={}',
+    'lowpass': 'lowpass=f={}',
+}
+
+def build_render_plan(mood, config, duration_sec):
+    """Describe the tone stack, fades, mix and filters for a resolved config
+    
+    Both synthesis backends render from this plan: the ffmpeg backend turns it
+    into lavfi graphs and the NumPy backend (mood_synth.py) evaluates it
+    in-process. Fades are ('in', start_sample, duration) or
+    ('out', start_time, duration), matching afade's ss/st options.
+    """
+    
     # Adjust frequencies based on vibe
     freq1 = config['base_freq']
     freq2 = int(freq1 * 1.5)
     freq3 = int(freq1 * 2)
+    fade_out = ('out', duration_sec - config['fade_out'], config['fade_out'])
     
-    # Build ffmpeg command based on mood tempo
-    audio_dir = Path(__file__).parent.parent / 'public' / 'audio'
-    output_file = audio_dir / f'track-{track_id}.mp3'
-    
+    # Pick the voicing based on mood tempo
     if mood in ['Joyful', 'Euphoric']:
         # Upbeat: multiple harmonics, faster fades
         fade_in1 = max(0.1, min(config["fade_in"], duration_sec * 0.1))
         fade_in2 = max(0.1, min(config["fade_in"] - 0.2, duration_sec * 0.08))
         fade_in3 = max(0.1, min(config["fade_in"] - 0.4, duration_sec * 0.06))
-        cmd = [
-            'ffmpeg', '-y', '-f', 'lavfi',
-            '-i', f'sine=frequency={freq1}:duration={duration_sec},afade=t=in:ss=0:d={fade_in1}',
-            '-f', 'lavfi', '-i', f'sine=frequency={freq2}:duration={duration_sec},afade=t=in:ss=0.2:d={fade_in2}',
-            '-f', 'lavfi', '-i', f'sine=frequency={freq3}:duration={duration_sec},afade=t=in:ss=0.4:d={fade_in3}',
-            '-filter_complex', f'amix=inputs=3:duration=first:dropout_transition=1,volume={config["volume"]},treble=g={config["treble"]},bass=g={config["bass"]}',
-            '-acodec', 'libmp3lame', '-b:a', '192k', '-ar', '44100', '-ac', '2',
-            str(output_file)
+        voices = [
+            {'freq': freq1, 'fades': [('in', 0, fade_in1)]},
+            {'freq': freq2, 'fades': [('in', 0.2, fade_in2)]},
+            {'freq': freq3, 'fades': [('in', 0.4, fade_in3)]},
         ]
+        dropout_transition = 1
+        filters = [('volume', config['volume']), ('treble', config['treble']), ('bass', config['bass'])]
     elif mood in ['Melancholic', 'Reflective']:
         # Slow, somber: single or two tones, long fades
-        cmd = [
-            'ffmpeg', '-y', '-f', 'lavfi',
-            '-i', f'sine=frequency={freq1}:duration={duration_sec},afade=t=in:ss=0:d={config["fade_in"]},afade=t=out:st={duration_sec-config["fade_out"]}:d={config["fade_out"]}',
-            '-f', 'lavfi', '-i', f'sine=frequency={freq2}:duration={duration_sec},afade=t=in:ss={config["fade_in"]}:d=1,afade=t=out:st={duration_sec-config["fade_out"]}:d={config["fade_out"]}',
-            '-filter_complex', f'amix=inputs=2:duration=first:dropout_transition=3,volume={config["volume"]},treble=g={config["treble"]},bass=g={config["bass"]},lowpass=f=3000',
-            '-acodec', 'libmp3lame', '-b:a', '192k', '-ar', '44100', '-ac', '2',
-            str(output_file)
+        voices = [
+            {'freq': freq1, 'fades': [('in', 0, config['fade_in']), fade_out]},
+            {'freq': freq2, 'fades': [('in', config['fade_in'], 1), fade_out]},
         ]
+        dropout_transition = 3
+        filters = [('volume', config['volume']), ('treble', config['treble']), ('bass', config['bass']),
+                   ('lowpass', 3000)]
     else:  # Nostalgic, Content
         # Moderate: balanced mix
-        cmd = [
-            'ffmpeg', '-y', '-f', 'lavfi',
-            '-i', f'sine=frequency={freq1}:duration={duration_sec},afade=t=in:ss=0:d={config["fade_in"]},afade=t=out:st={duration_sec-config["fade_out"]}:d={config["fade_out"]}',
-            '-f', 'lavfi', '-i', f'sine=frequency={freq2}:duration={duration_sec},afade=t=in:ss={config["fade_in"]*0.7}:d={config["fade_in"]*0.3},afade=t=out:st={duration_sec-config["fade_out"]}:d={config["fade_out"]}',
-            '-filter_complex', f'amix=inputs=2:duration=first:dropout_transition=2,volume={config["volume"]},treble=g={config["treble"]},bass=g={config["bass"]},highpass=f=100,lowpass=f=6000',
-            '-acodec', 'libmp3lame', '-b:a', '192k', '-ar', '44100', '-ac', '2',
-            str(output_file)
+        voices = [
+            {'freq': freq1, 'fades': [('in', 0, config['fade_in']), fade_out]},
+            {'freq': freq2, 'fades': [('in', config['fade_in'] * 0.7, config['fade_in'] * 0.3), fade_out]},
         ]
+        dropout_transition = 2
+        filters = [('volume', config['volume']), ('treble', config['treble']), ('bass', config['bass']),
+                   ('highpass', 100), ('lowpass', 6000)]
+    
+    return {
+        'duration': duration_sec,
+        'voices': voices,
+        'dropout_transition': dropout_transition,
+        'filters': filters,
+    }
+
+def plan_to_ffmpeg_inputs(plan):
+    """lavfi input arguments (one sine + afade chain per voice) for a render plan"""
+    args = []
+    for voice in plan['voices']:
+        chain = [f"sine=frequency={voice['freq']}:duration={plan['duration']}"]
+        for kind, start, length in voice['fades']:
+            if kind == 'in':
+                chain.append(f'afade=t=in:ss={start}:d={length}')
+            else:
+                chain.append(f'afade=t=out:st={start}:d={length}')
+        args += ['-f', 'lavfi', '-i', ','.join(chain)]
+    return args
+
+def plan_to_filter_graph(plan):
+    """The amix + post-filter chain for a render plan"""
+    steps = [f"amix=inputs={len(plan['voices'])}:duration=first:dropout_transition={plan['dropout_transition']}"]
+    steps += [FILTER_FORMATS[name].format(value) for name, value in plan['filters']]
+    return ','.join(steps)
+
+def render_outputs(output_file, renditions=()):
+    """[(rendition, path)] a track renders to: the primary output_file, then each extra rendition"""
+    outputs = [(PRIMARY_RENDITION, output_file)]
+    for name in renditions:
+        spec = RENDITIONS[name]
+        outputs.append((name, output_file.parent / 'renditions' / name / f"{output_file.stem}.{spec['ext']}"))
+    return outputs
+
+def split_outputs(chain, outputs, label='out'):
+    """(filter graph, output argv) that encode every output from the one stream chain produces
     
-    # Run ffmpeg
+    chain is a filter chain ending in a single unlabelled stream (or just an
+    input label such as '[0:a]'). With several outputs it is split with
+    asplit, and renditions with a filter of their own (the preview trim) get
+    it on their branch only.
+    """
+    sep = '' if chain.endswith(']') else ','
+    if len(outputs) == 1:
+        return f'{chain}{sep}anull[{label}]', ['-map', f'[{label}]'] + ENCODER_ARGS + [str(outputs[0][1])]
+    graphs = [f"{chain}{sep}asplit={len(outputs)}" + ''.join(f'[{label}s{j}]' for j in range(len(outputs)))]
+    args = []
+    for j, (name, path) in enumerate(outputs):
+        spec = RENDITIONS.get(name, {})
+        stream = f'{label}s{j}'
+        if spec.get('filter'):
+            graphs.append(f"[{stream}]{spec['filter']}[{label}r{j}]")
+            stream = f'{label}r{j}'
+        args += ['-map', f'[{stream}]'] + spec.get('encoder', ENCODER_ARGS) + [str(path)]
+    return ';'.join(graphs), args
+
+def plan_to_ffmpeg_command(plan, output_file, renditions=()):
+    """The reference ffmpeg argv that renders a plan to output_file (and any extra renditions)"""
+    if not renditions:
+        return (['ffmpeg', '-y'] + plan_to_ffmpeg_inputs(plan) +
+                ['-filter_complex', plan_to_filter_graph(plan)] + ENCODER_ARGS + [str(output_file)])
+    labels = ''.join(f'[{v}:a]' for v in range(len(plan['voices'])))
+    graph, outputs = split_outputs(labels + plan_to_filter_graph(plan), render_outputs(output_file, renditions))
+    return ['ffmpeg', '-y'] + plan_to_ffmpeg_inputs(plan) + ['-filter_complex', graph] + outputs
+
+def build_ffmpeg_command(mood, config, duration_sec, output_file):
+    """Build the ffmpeg argv that renders a resolved config to output_file"""
+    return plan_to_ffmpeg_command(build_render_plan(mood, config, duration_sec), output_file)
+
+def build_render_job(track_id, mood, feelings, vibe, duration_ms, renditions=()):
+    """Resolve a track into (config, duration_sec, plan, cmd, output_file)"""
+    config, duration_sec = resolve_render_config(mood, feelings, vibe, duration_ms)
+    output_file = AUDIO_DIR / f'track-{track_id}.mp3'
+    plan = build_render_plan(mood, config, duration_sec)
+    cmd = plan_to_ffmpeg_command(plan, output_file, renditions)
+    return config, duration_sec, plan, cmd, output_file
+
+def render_hash(config, duration_sec, cmd, backend='ffmpeg'):
+    """Content hash of everything that determines a track's rendered audio"""
+    # The output path is reduced to its file name so moving the checkout
+    # does not invalidate the cache
+    argv = cmd[:-1] + [Path(cmd[-1]).name]
+    payload = json.dumps({'config': config, 'duration': duration_sec, 'argv': argv, 'backend': backend},
+                         sort_keys=True)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+def render_key(plan, backend='ffmpeg', renditions=()):
+    """Hash of a resolved render plan: tracks with equal keys render identical audio"""
+    fields = {'plan': plan, 'encoder': ENCODER_ARGS, 'backend': backend}
+    if renditions:
+        fields['renditions'] = {name: RENDITIONS[name] for name in renditions}
+    payload = json.dumps(fields, sort_keys=True)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+def run_ffmpeg(track_id, cmd):
+    """Run an ffmpeg render, returning True on success"""
+    started = time.perf_counter()
     try:
         subprocess.run(cmd, check=True, capture_output=True, text=True)
-        return True
+        ok = True
     except subprocess.CalledProcessError as e:
         print(f"Error generating track {track_id}: {e}")
+        ok = False
+    instrumentation.event('ffmpeg', seconds=round(time.perf_counter() - started, 6), track_id=track_id,
+                          tracks=1, ok=ok)
+    return ok
+
+def generate_mood_audio(track_id, mood, feelings, vibe, duration_ms):
+    """Generate audio file that matches the track's mood"""
+    _, _, _, cmd, _ = build_render_job(track_id, mood, feelings, vibe, duration_ms)
+    return run_ffmpeg(track_id, cmd)
+
+def synthesize_mood_audio(plan, output_file, renditions=()):
+    """Render a plan in-process with NumPy and pipe the PCM to the encoder"""
+    import mood_synth
+    with instrumentation.span('synth', output=output_file.name):
+        samples = mood_synth.render_plan(plan)
+    if not renditions:
+        return mood_synth.encode(samples, output_file, ENCODER_ARGS)
+    graph, outputs = split_outputs('[0:a]', render_outputs(output_file, renditions))
+    return mood_synth.encode_outputs([samples], ['-filter_complex', graph] + outputs, output_file.name)
+
+def load_manifest(path=MANIFEST_FILE):
+    """Load the render manifest, returning {track_key: entry}"""
+    try:
+        with open(path, 'r') as f:
+            manifest = json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+    if manifest.get('version') != MANIFEST_VERSION:
+        return {}
+    return manifest.get('tracks', {})
+
+def save_manifest(entries, path=MANIFEST_FILE):
+    """Atomically write the render manifest"""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix(path.suffix + '.tmp')
+    with open(tmp_path, 'w') as f:
+        json.dump({'version': MANIFEST_VERSION, 'tracks': entries}, f, indent=2, sort_keys=True)
+    os.replace(tmp_path, path)
+
+def save_rendition_manifest(entries, renditions, path=RENDITION_MANIFEST_FILE):
+    """Atomically write the client-facing list of each track's renditions
+    
+    Built from the render manifest, so it only lists tracks whose files all
+    rendered; URLs are relative to the site root like tracks.json's audioUrl.
+    """
+    specs = {PRIMARY_RENDITION: {'ext': 'mp3', 'codec': 'mp3', 'bitrate': '192k'}}
+    for name in renditions:
+        specs[name] = {field: value for field, value in RENDITIONS[name].items() if field not in ('encoder', 'filter')}
+    tracks = {}
+    for key, entry in sorted(entries.items()):
+        sizes = {PRIMARY_RENDITION: entry['size']}
+        sizes.update({name: fingerprint['size'] for name, fingerprint in entry.get('renditions', {}).items()})
+        if set(sizes) != set(specs):
+            continue
+        tracks[key] = {name: {'url': '/' + output_file.relative_to(AUDIO_DIR.parent).as_posix(), 'bytes': sizes[name]}
+                       for name, output_file in render_outputs(AUDIO_DIR / f'{key}.mp3', renditions)}
+    tmp_path = path.with_suffix(path.suffix + '.tmp')
+    with open(tmp_path, 'w') as f:
+        json.dump({'version': RENDITION_MANIFEST_VERSION, 'renditions': specs, 'tracks': tracks}, f, indent=2)
+    os.replace(tmp_path, path)
+
+def output_fingerprint(output_file):
+    """Size and mtime of a rendered file, or None if it is missing"""
+    try:
+        st = output_file.stat()
+    except FileNotFoundError:
+        return None
+    return {'size': st.st_size, 'mtime_ns': st.st_mtime_ns}
+
+def outputs_fingerprint(outputs):
+    """{rendition: fingerprint} for a track's outputs, or None if any is missing"""
+    fingerprints = {name: output_fingerprint(path) for name, path in outputs}
+    return None if None in fingerprints.values() else fingerprints
+
+def entry_fingerprint(entry):
+    """What outputs_fingerprint() returned when the manifest entry was recorded"""
+    return {PRIMARY_RENDITION: {'size': entry.get('size'), 'mtime_ns': entry.get('mtime_ns')},
+            **entry.get('renditions', {})}
+
+def is_up_to_date(entry, digest, outputs):
+    """True if the manifest entry matches the render hash and every output file on disk"""
+    if not entry or entry.get('hash') != digest:
         return False
+    return outputs_fingerprint(outputs) == entry_fingerprint(entry)
 
-def main():
-    # Load tracks data
-    tracks_file = Path(__file__).parent.parent / 'data' / 'mock' / 'tracks.json'
+def track_render_params(track):
+    """(track_id, mood, feelings, vibe, duration_ms) of a track record, as build_render_job() takes them"""
+    return (int(track['id'].split('-')[1]), track['moodTags']['mood'], track['moodTags'].get('feelings', []),
+            track['moodTags'].get('vibe', 50), track['duration'])
+
+def prepare_track(track, manifest, force=False, backend='ffmpeg', renditions=()):
+    """Resolve a track record into a render job
     
-    with open(tracks_file, 'r') as f:
-        tracks = json.load(f)
+    The job's 'cached' flag is set when the manifest says the output on disk
+    is already current, in which case it does not need rendering.
+    """
+    track_id, mood, feelings, vibe, duration = track_render_params(track)
     
-    audio_dir = Path(__file__).parent.parent / 'public' / 'audio'
-    audio_dir.mkdir(parents=True, exist_ok=True)
+    config, duration_sec, plan, cmd, output_file = build_render_job(track_id, mood, feelings, vibe, duration,
+                                                                     renditions)
+    # Rendition paths sit mid-argv where render_hash can't trim them, so the
+    # hash is taken over the command for a relative output path instead
+    digest = render_hash(config, duration_sec, plan_to_ffmpeg_command(plan, Path(output_file.name), renditions),
+                         backend)
+    outputs = render_outputs(output_file, renditions)
+    entry = manifest.get(track['id'])
     
-    print(f"🎵 Generating mood-matched audio for {len(tracks)} tracks...")
+    return {
+        'key': track['id'],
+        'track_id': track_id,
+        'mood': mood,
+        'feelings': feelings,
+        'vibe': vibe,
+        'plan': plan,
+        'cmd': cmd,
+        'output_file': output_file,
+        'outputs': outputs,
+        'renditions': renditions,
+        'digest': digest,
+        'render_key': render_key(plan, backend, renditions),
+        'cached': not force and is_up_to_date(entry, digest, outputs),
+    }
+
+def unshare_output(output_file):
+    """Unlink output_file if other tracks hard-link it, so rendering over it leaves theirs alone"""
+    try:
+        if output_file.stat().st_nlink > 1:
+            output_file.unlink()
+    except FileNotFoundError:
+        pass
+
+def materialize(source_file, output_file, mode='link'):
+    """Make output_file hold the audio already rendered to source_file, returning True on success
+    
+    Hard links fall back to copying where the filesystem can't link.
+    """
+    tmp_file = output_file.with_name(output_file.name + '.tmp')
+    try:
+        tmp_file.unlink(missing_ok=True)
+        if mode == 'link':
+            try:
+                os.link(source_file, tmp_file)
+            except OSError:
+                shutil.copyfile(source_file, tmp_file)
+        else:
+            shutil.copyfile(source_file, tmp_file)
+        os.replace(tmp_file, output_file)
+        return True
+    except OSError as e:
+        print(f"Error materializing {output_file.name} from {Path(source_file).name}: {e}")
+        return False
+
+def render_job(job, backend='ffmpeg'):
+    """Render a single job (called from the worker thread pool), returning True on success"""
+    if backend == 'numpy':
+        return synthesize_mood_audio(job['plan'], job['output_file'], job['renditions'])
+    return run_ffmpeg(job['track_id'], job['cmd'])
+
+def build_batch_command(chunk):
+    """One ffmpeg argv that renders every job in chunk as a separate output
+    
+    Each track keeps its own lavfi inputs and filter graph, labelled so the
+    graphs stay independent, and each of its outputs gets its encoder settings.
+    """
+    inputs = []
+    graphs = []
+    outputs = []
+    next_input = 0
+    for k, job in enumerate(chunk):
+        plan = job['plan']
+        labels = ''.join(f'[{next_input + v}:a]' for v in range(len(plan['voices'])))
+        next_input += len(plan['voices'])
+        inputs += plan_to_ffmpeg_inputs(plan)
+        graph, args = split_outputs(labels + plan_to_filter_graph(plan), job['outputs'], f'out{k}')
+        graphs.append(graph)
+        outputs += args
+    return ['ffmpeg', '-y'] + inputs + ['-filter_complex', ';'.join(graphs)] + outputs
+
+def render_chunk(chunk, backend='ffmpeg'):
+    """Render a chunk of jobs through one encoder session, returning a bool per job
+    
+    If the shared session fails, the chunk is retried track by track so one
+    bad render does not take the rest of the chunk down with it.
+    """
+    if len(chunk) == 1:
+        return [render_job(chunk[0], backend)]
+    
+    if backend == 'numpy':
+        import mood_synth
+        with instrumentation.span('synth', tracks=len(chunk)):
+            sample_arrays = [mood_synth.render_plan(job['plan']) for job in chunk]
+        graphs = []
+        outputs = []
+        for k, job in enumerate(chunk):
+            graph, args = split_outputs(f'[{k}:a]', job['outputs'], f'out{k}')
+            graphs.append(graph)
+            outputs += args
+        ok = mood_synth.encode_outputs(sample_arrays, ['-filter_complex', ';'.join(graphs)] + outputs,
+                                       f'batch of {len(chunk)} renders')
+    else:
+        started = time.perf_counter()
+        try:
+            subprocess.run(build_batch_command(chunk), check=True, capture_output=True, text=True)
+            ok = True
+        except subprocess.CalledProcessError as e:
+            print(f"Batch render failed ({e}); retrying {len(chunk)} tracks individually")
+            ok = False
+        instrumentation.event('ffmpeg', seconds=round(time.perf_counter() - started, 6),
+                              track_id=chunk[0]['track_id'], tracks=len(chunk), ok=ok)
+    
+    if ok:
+        return [True] * len(chunk)
+    return [render_job(job, backend) for job in chunk]
+
+def measure_spawn_overhead(samples=3):
+    """Median seconds to start ffmpeg and initialise libmp3lame for a trivial encode"""
+    cmd = ['ffmpeg', '-v', 'error', '-f', 'lavfi', '-i', 'anullsrc=r=44100:cl=stereo', '-t', '0.05'] + \
+        ENCODER_ARGS + ['-f', 'null', '-']
+    timings = []
+    for _ in range(samples):
+        started = time.perf_counter()
+        subprocess.run(cmd, capture_output=True)
+        timings.append(time.perf_counter() - started)
+    return sorted(timings)[len(timings) // 2]
+
+def parse_track_ids(value):
+    """Parse '1,2,track-3' into {'track-1', 'track-2', 'track-3'}"""
+    ids = set()
+    for part in value.split(','):
+        part = part.strip()
+        if not part:
+            continue
+        ids.add(part if part.startswith('track-') else f'track-{int(part)}')
+    return ids
+
+def parse_renditions(value):
+    """Parse 'mp3-64,preview' (or 'all') into rendition names in RENDITIONS order"""
+    names = {part.strip() for part in value.split(',') if part.strip()}
+    if 'all' in names:
+        return list(RENDITIONS)
+    unknown = names - set(RENDITIONS)
+    if unknown:
+        raise argparse.ArgumentTypeError(f"unknown rendition(s): {', '.join(sorted(unknown))} "
+                                         f"(choose from {', '.join(RENDITIONS)})")
+    return [name for name in RENDITIONS if name in names]
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Generate mood-matched audio tracks')
+    parser.add_argument('--jobs', '-j', type=int, default=os.cpu_count() or 1,
+                        help='Number of ffmpeg renders to run concurrently (default: CPU count)')
+    parser.add_argument('--force', action='store_true',
+                        help='Re-render every track even if the render manifest says it is current')
+    parser.add_argument('--only', type=parse_track_ids, metavar='TRACK_IDS',
+                        help='Comma-separated track ids (e.g. 1,2,track-3) to re-render; other tracks are left alone')
+    parser.add_argument('--backend', choices=['ffmpeg', 'numpy'], default='ffmpeg',
+                        help='Synthesis engine: ffmpeg lavfi graphs (reference) or in-process NumPy')
+    parser.add_argument('--batch-size', type=int, default=1,
+                        help='Tracks encoded per ffmpeg session; >1 shares one process and codec init across a chunk')
+    parser.add_argument('--materialize', choices=['link', 'copy', 'render'], default='link',
+                        help='How tracks sharing a render plan get their file: hard link (default) or copy of '
+                        'one render, or render every track separately')
+    parser.add_argument('--tracks-file', default=TRACKS_FILE, metavar='FILE',
+                        help='Track records as a JSON array or NDJSON; - reads NDJSON from stdin as it arrives '
+                        '(e.g. piped from generate_seed_data.py --stream-tracks)')
+    parser.add_argument('--renditions', type=parse_renditions, default=[], metavar='NAMES',
+                        help=f"Comma-separated extra renditions to encode alongside the {PRIMARY_RENDITION} "
+                        f"file, or 'all' ({', '.join(RENDITIONS)})")
+    parser.add_argument('--changes', type=Path, metavar='FILE',
+                        help='Only render the tracks a generate_seed_data.py --incremental run added or modified, '
+                        'as listed in its changes.json')
+    instrumentation.add_arguments(parser)
+    args = parser.parse_args()
+    args.delta = None
+    if args.changes:
+        with open(args.changes, 'r') as f:
+            changes = json.load(f)['tracks']
+        args.delta = set(changes['added']) | set(changes['modified'])
+    return args
+
+def iter_track_records(f):
+    """Yield track records from a JSON array or from NDJSON, one record per line
+    
+    NDJSON is parsed a line at a time as it arrives, so a pipe from
+    generate_seed_data.py --stream-tracks is rendered while it is still being
+    generated and the catalog is never held in memory. A JSON array (the
+    checked-in tracks.json) is loaded whole.
+    """
+    number = 0
+    for line in f:
+        number += 1
+        if not line.strip():
+            continue
+        if number == 1 and line.lstrip().startswith('['):
+            yield from json.loads(line + f.read())
+            return
+        try:
+            yield json.loads(line)
+        except json.JSONDecodeError as e:
+            print(f"⚠️  Skipping malformed track record on line {number}: {e}")
+
+def open_tracks(path):
+    """Open a tracks file for reading, or stdin for '-'"""
+    if str(path) == '-':
+        return contextlib.nullcontext(sys.stdin)
+    return open(path, 'r')
+
+def generate_all(args):
+    jobs = max(1, args.jobs)
+    batch_size = max(1, args.batch_size)
+    # --only names tracks explicitly, so they are always re-rendered
+    force = args.force or args.only is not None
+    # A --changes delta is only a filter: its tracks still reuse current renders
+    selected = args.only if args.only is not None else args.delta
+    
+    AUDIO_DIR.mkdir(parents=True, exist_ok=True)
+    for name in args.renditions:
+        (AUDIO_DIR / 'renditions' / name).mkdir(parents=True, exist_ok=True)
+    manifest = load_manifest()
+    source_name = 'stdin' if str(args.tracks_file) == '-' else args.tracks_file
+    
+    print(f"🎵 Generating mood-matched audio for tracks from {source_name} "
+          f"({jobs} parallel jobs, {args.backend} backend)...")
     print("Each track's audio will reflect its mood tags (Melancholic, Joyful, etc.)\n")
     
+    # Tracks whose plans resolve to the same render key get the same audio, so
+    # only the first pending track of each key is rendered and the rest reuse
+    # its files. Only keys are remembered for the whole run (rendered holds one
+    # set of outputs per key); tracks wait in `waiting` just while their key's render is
+    # in flight. Unless forced, up-to-date files from earlier runs count as
+    # renders of their key too, found through the manifest when needed.
+    rendered = {}
+    waiting = {}
+    manifest_keys = {} if force else {entry['render_key']: key for key, entry in manifest.items()
+                                      if 'render_key' in entry}
+    
+    total_tracks = 0
+    pending = 0
+    skipped = 0
+    unique_renders = 0
+    sessions = 0
     generated = 0
     failed = 0
+    failed_ids = []
+    started = time.perf_counter()
     
-    for track in tracks:
-        track_id = int(track['id'].split('-')[1])
-        mood = track['moodTags']['mood']
-        feelings = track['moodTags'].get('feelings', [])
-        vibe = track['moodTags'].get('vibe', 50)
-        duration = track['duration']
-        
-        print(f"Generating track-{track_id}... [{mood}] {feelings[:2] if feelings else []} (vibe: {vibe})")
-        
-        if generate_mood_audio(track_id, mood, feelings, vibe, duration):
+    # Reuses finish as soon as they are seen and followers when their render's
+    # chunk is collected, so each line waits until every earlier pending track
+    # has printed: the log stays in track order however the work interleaves
+    held_lines = {}
+    next_line = 0
+    
+    def emit(job, line):
+        nonlocal next_line
+        held_lines[job['seq']] = line
+        while next_line in held_lines:
+            print(held_lines.pop(next_line))
+            next_line += 1
+    
+    def record(job, ok, note=''):
+        nonlocal generated, failed
+        fingerprints = outputs_fingerprint(job['outputs']) if ok else None
+        ok = fingerprints is not None
+        emit(job, f"Generated track-{job['track_id']}... [{job['mood']}] "
+                  f"{job['feelings'][:2] if job['feelings'] else []} (vibe: {job['vibe']})"
+                  f"{note if ok else ' ❌'}")
+        if ok:
             generated += 1
+            entry = {'hash': job['digest'], 'render_key': job['render_key'], **fingerprints.pop(PRIMARY_RENDITION)}
+            if fingerprints:
+                entry['renditions'] = fingerprints
+            manifest[job['key']] = entry
         else:
             failed += 1
+            failed_ids.append(job['track_id'])
+            manifest.pop(job['key'], None)
+        return ok
+    
+    def rendered_outputs(key):
+        if key in rendered:
+            return rendered[key]
+        track_key = manifest_keys.get(key)
+        entry = manifest.get(track_key)
+        if entry and entry.get('render_key') == key:
+            outputs = render_outputs(AUDIO_DIR / f'{track_key}.mp3', args.renditions)
+            if outputs_fingerprint(outputs) == entry_fingerprint(entry):
+                rendered[key] = outputs
+                return outputs
+        return None
+    
+    def reuse(job, sources):
+        # Same render key means the same renditions, so outputs pair up in order
+        ok = all([materialize(source_file, output_file, args.materialize)
+                  for (_, source_file), (_, output_file) in zip(sources, job['outputs'])])
+        record(job, ok, f" (same audio as {sources[0][1].stem})")
+    
+    def collect(chunk, future):
+        for job, ok in zip(chunk, future.result()):
+            key = job['render_key']
+            if record(job, ok):
+                rendered[key] = job['outputs']
+                for follower in waiting.pop(key, ()):
+                    reuse(follower, job['outputs'])
+            else:
+                # Tracks sharing a failed render would fail the same way
+                for follower in waiting.pop(key, ()):
+                    record(follower, False)
+    
+    # Each chunk is an ffmpeg subprocess, so threads are enough to keep every
+    # core busy. Chunks are collected in submission order, and at most two per
+    # worker are in flight so a fast producer can't queue up the whole catalog.
+    in_flight = deque()
+    chunk = []
+    with instrumentation.span('audio.render', jobs=jobs) as stage, \
+            ThreadPoolExecutor(max_workers=jobs) as executor, open_tracks(args.tracks_file) as f:
+        
+        def submit(chunk):
+            nonlocal sessions
+            sessions += 1
+            in_flight.append((chunk, executor.submit(render_chunk, chunk, args.backend)))
+            while in_flight and (len(in_flight) > 2 * jobs or in_flight[0][1].done()):
+                collect(*in_flight.popleft())
+        
+        for track in iter_track_records(f):
+            total_tracks += 1
+            if selected is not None and track['id'] not in selected:
+                continue
+            job = prepare_track(track, manifest, force, args.backend, args.renditions)
+            key = job['render_key']
+            if job['cached']:
+                skipped += 1
+                rendered.setdefault(key, job['outputs'])
+                continue
+            job['seq'] = pending
+            pending += 1
+            # Its files are about to be replaced, so they must not stand in for its old key
+            manifest.pop(job['key'], None)
+            if args.materialize != 'render':
+                if key in waiting:
+                    waiting[key].append(job)
+                    continue
+                sources = rendered_outputs(key)
+                if sources is not None:
+                    reuse(job, sources)
+                    continue
+                waiting[key] = []
+            unique_renders += 1
+            for _, output_file in job['outputs']:
+                unshare_output(output_file)
+            chunk.append(job)
+            if len(chunk) == batch_size:
+                submit(chunk)
+                chunk = []
+        if chunk:
+            submit(chunk)
+        while in_flight:
+            collect(*in_flight.popleft())
+        stage.set(tracks=total_tracks, renders=unique_renders, sessions=sessions)
+    
+    elapsed = time.perf_counter() - started
+    with instrumentation.span('audio.manifest'):
+        save_manifest(manifest)
+        if args.renditions:
+            save_rendition_manifest(manifest, args.renditions)
     
     print(f"\n✅ Generated {generated} tracks successfully")
+    if skipped > 0:
+        print(f"⏭️  Skipped {skipped} unchanged tracks (use --force to re-render)")
     if failed > 0:
-        print(f"⚠️  Failed to generate {failed} tracks")
+        print(f"⚠️  Failed to generate {failed} tracks: {', '.join(f'track-{i}' for i in failed_ids)}")
+    
+    rate = generated / elapsed if elapsed > 0 else 0.0
+    print(f"⏱️  Rendered {generated} tracks in {elapsed:.1f}s ({rate:.2f} tracks/s, {jobs} jobs)")
+    if pending and unique_renders < pending:
+        ratio = f"dedupe ratio {pending / unique_renders:.2f}x" if unique_renders else "all from existing files"
+        print(f"📎 {pending} tracks from {unique_renders} unique renders ({ratio}, "
+              f"{pending - unique_renders} {'copied' if args.materialize == 'copy' else 'hard-linked'})")
+    if batch_size > 1 and unique_renders > sessions:
+        # Every track folded into a shared session is one process start and
+        # one libmp3lame init that did not happen
+        overhead = measure_spawn_overhead()
+        saved = (unique_renders - sessions) * overhead
+        print(f"📦 {unique_renders} tracks in {sessions} encoder sessions: ~{saved:.1f}s of process/codec "
+              f"startup avoided, ~{saved / jobs:.1f}s wall-clock at {jobs} jobs ({overhead * 1000:.0f} ms per spawn)")
     
-    print(f"\nTotal audio files: {len(list(audio_dir.glob('track-*.mp3')))}/{len(tracks)}")
+    print(f"\nTotal audio files: {len(list(AUDIO_DIR.glob('track-*.mp3')))}/{total_tracks}")
+    if args.renditions:
+        names = ', '.join([PRIMARY_RENDITION] + args.renditions)
+        print(f"🎚️  Renditions ({names}) listed in {RENDITION_MANIFEST_FILE}")
+    return failed
+
+def main():
+    args = parse_args()
+    instrumentation.configure(args.metrics)
+    with instrumentation.profiled(args.profile, 'generate_mood_matched_audio'), instrumentation.span('audio'):
+        failed = generate_all(args)
+    # A non-zero exit lets run_pipeline.py hold back the stages that read the audio
+    if failed:
+        sys.exit(1)
 
 if __name__ == '__main__':
     main()
@@ -4,125 +4,47 @@ Generate comprehensive seed data for EmPulse Music
 Creates tracks, artists, albums, playlists with diverse mood combinations
 """
 
+import argparse
+import contextlib
+import csv
+import itertools
 import json
+import os
 import random
-from typing import List, Dict
-
-# Mood configurations
-MOODS = ['Melancholic', 'Nostalgic', 'Reflective', 'Content', 'Joyful', 'Euphoric']
-NEGATIVE_FEELINGS = ['Anxious', 'Overwhelmed', 'Stressed', 'Frustrated', 'Tired', 'Lonely', 'Insecure']
-POSITIVE_FEELINGS = ['Great', 'Confident', 'Relaxed', 'Excited', 'Proud', 'Grateful', 'Optimistic']
-ALL_FEELINGS = NEGATIVE_FEELINGS + POSITIVE_FEELINGS
-GENRES = ['Pop', 'Rock', 'Electronic', 'Hip-Hop', 'Jazz', 'Classical', 'Ambient', 'R&B', 'Country', 'Indie', 'Metal', 'Punk', 'Blues', 'Folk', 'Reggae', 'Soul', 'Funk', 'Disco', 'House', 'Techno', 'Trap', 'Afrobeats', 'World', 'Latin', 'K-Pop']
-
-# Unsplash image IDs for royalty-free artwork (abstract/music themed)
-COVER_ART_IMAGES = [
-    "photo-1493225457124-a3eb161ffa5f",  # Abstract
-    "photo-1459749411175-04bf5292ceea",  # Music
-    "photo-1470229722913-7c0e2dbbafd3",  # Concert
-    "photo-1484704849700-f032a568e944",  # Vinyl
-    "photo-1511671782779-c97d3d27a1d4",  # Jazz
-    "photo-1508700115892-45ecd05ae2ad",  # World music
-    "photo-1461784180009-21121b2f2044",  # Indie
-    "photo-1514525253161-7a46d19cd819",  # Pop
-    "photo-1540747913346-19e32dc3e97e",  # Hip-hop
-    "photo-1571260899304-425eee4c7efc",  # Electronic
-    "photo-1464207687429-7505649dae38",  # Country
-    "photo-1492562080023-ab3db95bfbce",  # Portrait
-    "photo-1528607929212-2636ec44253e",  # Mental health
-    "photo-1506126613408-eca07ce68773",  # Wellness
-    "photo-1454165804606-c3d57bc86b40",  # Mindful
-    "photo-1541781774459-bb2af2f05b55",  # Calm
-    "photo-1534438327276-14e5300c3a48",  # Energy
-    "photo-1441974231531-c6227db76b6e",  # Nature
-    "photo-1488646953014-85cb44e25828",  # Travel
-    "photo-1506905925346-21bda4d32df4",  # Focus
-]
-
-ARTIST_IMAGES = [
-    "photo-1493225457124-a3eb161ffa5f",
-    "photo-1511671782779-c97d3d27a1d4",
-    "photo-1470229722913-7c0e2dbbafd3",
-    "photo-1528607929212-2636ec44253e",
-    "photo-1506126613408-eca07ce68773",
-    "photo-1492562080023-ab3db95bfbce",
-]
+import shutil
+import sqlite3
+import sys
+import tempfile
+from multiprocessing import Pool
+from typing import Dict, Iterable, Iterator, List, Optional
 
-# Track titles (inspired by royalty-free music)
-TRACK_TITLES = [
-    "Midnight Dreams", "Electric Soul", "Ocean Breeze", "Urban Nights", "Mountain View",
-    "Desert Highway", "City Lights", "Forest Path", "Starlight", "Golden Hour",
-    "Morning Dew", "Evening Glow", "Neon Signs", "Silent Streets", "Thunderstorm",
-    "Afternoon Rain", "Sunset Drive", "Winter Chill", "Spring Bloom", "Summer Heat",
-    "Autumn Leaves", "Storm Clouds", "Clear Skies", "Deep Blue", "Purple Haze",
-    "Green Fields", "Red Dawn", "Yellow Sun", "Orange Sunset", "Pink Clouds",
-    "Distant Echoes", "Close Encounters", "Inner Thoughts", "Outer Space", "Deep Dive",
-    "High Rise", "Low Tide", "Fast Lane", "Slow Motion", "Hard Rock",
-    "Soft Jazz", "Bright Pop", "Dark Ambient", "Light Folk", "Heavy Metal",
-    "Smooth R&B", "Rough Punk", "Calm Classical", "Chaos Electronic", "Order Indie",
-    "Warm Soul", "Cool Funk", "Hot Disco", "Cold Blues", "Neutral Jazz",
-    "Fire Dance", "Water Flow", "Earth Ground", "Air Lift", "Spirit Rise",
-    "Mind Bender", "Heart Opener", "Soul Keeper", "Body Mover", "Energy Shifter",
-    "Mood Swings", "Feeling Free", "Thought Clear", "Action Bold", "Reaction Swift",
-    "Creative Flow", "Analytic Mode", "Intuitive Leap", "Logical Step", "Emotional Wave",
-    "Peaceful Place", "Chaotic Zone", "Balanced State", "Unstable Ground", "Solid Rock",
-    "Liquid Dreams", "Gaseous Thoughts", "Plasma Energy", "Quantum Leap", "Classic Style",
-    "Modern Beat", "Retro Vibe", "Future Sound", "Past Memory", "Present Moment",
-    "Timeless Tune", "Seasonal Shift", "Circadian Rhythm", "Lunar Cycle", "Solar Power",
-    "Wind Chimes", "Rain Drops", "Snow Flakes", "Ice Crystals", "Steam Rising",
-    "Flame Burning", "Smoke Clearing", "Mist Lifting", "Fog Rolling", "Haze Settling",
-    "Breeze Blowing", "Gust Striking", "Hurricane Force", "Tornado Twist", "Cyclone Spin",
-    "Calm Before", "Storm During", "Peace After", "Chaos Within", "Order Without",
-    "Harmony Found", "Discord Resolved", "Rhythm Locked", "Beat Dropped", "Melody Soared",
-    "Bass Thumped", "Treble Sparkled", "Mid Range", "Full Spectrum", "Pure Tone"
-]
+import compact_catalog
+import instrumentation
+from seed_vocabulary import (ALBUM_TRACK_LIMIT, ARTIST_IMAGES, ARTIST_NAMES, COVER_ART_IMAGES, GENRES, MOODS,
+                             PLAYLIST_TRACK_LIMIT, TRACK_TITLES, get_mood_config)
 
-ARTIST_NAMES = [
-    "Luna Shadows", "Echo River", "Solar Flare", "Neon Nights", "Crystal Sound",
-    "Mystic Waves", "Electric Dreams", "Cosmic Harmony", "Urban Pulse", "Wild Sky",
-    "Deep Ocean", "High Mountain", "Dark Forest", "Bright City", "Quiet Valley",
-    "Loud Canyon", "Soft Breeze", "Hard Rain", "Gentle Wind", "Strong Current",
-    "Smooth Operator", "Rough Diamond", "Pure Gold", "Silver Lining", "Bronze Age",
-    "Iron Will", "Steel Mind", "Copper Wire", "Tin Can", "Lead Weight",
-    "Mercury Rising", "Venus Fly", "Mars Walk", "Jupiter Jump", "Saturn Ring",
-    "Uranus Spin", "Neptune Dive", "Pluto Orbit", "Star Light", "Moon Beam",
-    "Sun Ray", "Comet Tail", "Meteor Shower", "Asteroid Belt", "Galaxy Far",
-    "Nebula Near", "Black Hole", "White Dwarf", "Red Giant", "Blue Supergiant"
-]
-
-def get_mood_config(mood: str) -> Dict:
-    """Get typical vibe and feelings for each mood"""
-    configs = {
-        'Melancholic': {'vibe_range': (10, 35), 'feelings': NEGATIVE_FEELINGS + ['Reflective', 'Nostalgic']},
-        'Nostalgic': {'vibe_range': (15, 40), 'feelings': ['Nostalgic', 'Reflective', 'Grateful', 'Content']},
-        'Reflective': {'vibe_range': (20, 45), 'feelings': ['Reflective', 'Relaxed', 'Content', 'Thoughtful']},
-        'Content': {'vibe_range': (45, 65), 'feelings': POSITIVE_FEELINGS[:5]},
-        'Joyful': {'vibe_range': (65, 85), 'feelings': POSITIVE_FEELINGS},
-        'Euphoric': {'vibe_range': (85, 100), 'feelings': ['Excited', 'Great', 'Proud', 'Optimistic']}
-    }
-    return configs.get(mood, configs['Content'])
-
-def generate_track(track_id: int, mood: str, genres: List[str]) -> Dict:
+def generate_track(track_id: int, mood: str, genres: List[str], rng: random.Random = random,
+                   num_artists: int = 50, num_albums: int = 30) -> Dict:
     """Generate a single track with mood tags"""
     config = get_mood_config(mood)
-    vibe = random.randint(*config['vibe_range'])
-    num_feelings = random.randint(1, 3)
-    feelings = random.sample(config['feelings'], min(num_feelings, len(config['feelings'])))
-    track_genres = random.sample(genres, random.randint(1, 2))
+    vibe = rng.randint(*config['vibe_range'])
+    num_feelings = rng.randint(1, 3)
+    feelings = rng.sample(config['feelings'], min(num_feelings, len(config['feelings'])))
+    track_genres = rng.sample(genres, rng.randint(1, 2))
     
-    artist_id = f"artist-{(track_id % 50) + 1}"
-    album_id = f"album-{(track_id % 30) + 1}"
+    artist_id = f"artist-{(track_id % num_artists) + 1}"
+    album_id = f"album-{(track_id % num_albums) + 1}"
     
-    cover_img = random.choice(COVER_ART_IMAGES)
+    cover_img = rng.choice(COVER_ART_IMAGES)
     
     return {
         "id": f"track-{track_id}",
-        "name": random.choice(TRACK_TITLES),
-        "artist": random.choice(ARTIST_NAMES),
+        "name": rng.choice(TRACK_TITLES),
+        "artist": rng.choice(ARTIST_NAMES),
         "artistId": artist_id,
-        "album": f"{random.choice(TRACK_TITLES[:20])} Album",
+        "album": f"{rng.choice(TRACK_TITLES[:20])} Album",
         "albumId": album_id,
-        "duration": random.randint(150000, 300000),
+        "duration": rng.randint(150000, 300000),
         "audioUrl": f"/audio/track-{track_id}.mp3",
         "coverArt": f"https://images.unsplash.com/{cover_img}?w=400&h=400&fit=crop&q=80",
         "moodTags": {
@@ -131,159 +53,890 @@ def generate_track(track_id: int, mood: str, genres: List[str]) -> Dict:
             "vibe": vibe,
             "genres": track_genres
         },
-        "format": random.choice(["MP3", "WAV", "FLAC"]),
-        "quality": random.choice(["lossless", "high", "standard"]),
-        "releaseDate": f"2024-{random.randint(1,12):02d}-{random.randint(1,28):02d}"
+        "format": rng.choice(["MP3", "WAV", "FLAC"]),
+        "quality": rng.choice(["lossless", "high", "standard"]),
+        "releaseDate": f"2024-{rng.randint(1,12):02d}-{rng.randint(1,28):02d}"
     }
 
-def generate_seed_data():
-    """Generate comprehensive seed data"""
-    print("Generating seed data...")
+# Tracks are generated in fixed-size shards, each from its own random stream,
+# so the catalog is the same however many worker processes produce it
+DEFAULT_SHARD_SIZE = 100_000
+
+def shard_rng(base_seed: int, shard: int) -> random.Random:
+    """The random stream for one shard of the track-id range"""
+    return random.Random(f"{base_seed}:{shard}")
+
+def iter_track_range(start_id: int, stop_id: int, num_tracks: int, rng: random.Random,
+                     num_artists: int = 50, num_albums: int = 30) -> Iterator[Dict]:
+    """Yield tracks start_id..stop_id-1, covering all mood combinations
+    
+    The first ~80% of the catalog is split into equal blocks per mood (20 per
+    mood for the default 150 tracks); the rest get random moods.
+    """
+    per_mood = (num_tracks * 4 // 5) // len(MOODS)
+    for track_id in range(start_id, stop_id):
+        if track_id <= per_mood * len(MOODS):
+            # Ensure we have examples of each mood
+            mood = MOODS[(track_id - 1) // per_mood]
+            genres = rng.sample(GENRES, 5)
+        else:
+            # Fill the rest with random mood combinations
+            mood = rng.choice(MOODS)
+            genres = GENRES
+        yield generate_track(track_id, mood, genres, rng, num_artists, num_albums)
+
+def iter_shard_tracks(shard: int, start_id: int, stop_id: int, num_tracks: int, base_seed: int,
+                      num_artists: int = 50, num_albums: int = 30, engine: str = 'python') -> Iterator[Dict]:
+    """Yield one shard's tracks from its own random stream
     
-    # Generate 150 tracks - covering all mood combinations
-    tracks = []
-    track_id = 1
-    
-    # Ensure we have examples of each mood
-    for mood in MOODS:
-        for _ in range(20):  # 20 tracks per mood
-            genres_for_mood = random.sample(GENRES, 5)
-            tracks.append(generate_track(track_id, mood, genres_for_mood))
-            track_id += 1
-    
-    # Add 30 more tracks with random mood combinations
-    for _ in range(30):
-        mood = random.choice(MOODS)
-        tracks.append(generate_track(track_id, mood, GENRES))
-        track_id += 1
-    
-    # Generate 50 artists
-    artists = []
-    for i in range(50):
-        artist_img = random.choice(ARTIST_IMAGES)
-        artist_genres = random.sample(GENRES, random.randint(1, 3))
-        artists.append({
+    The numpy engine (vectorized_tracks.py) draws the same distributions in
+    batches; it uses a different random stream, so its catalog differs from
+    the python engine's for the same seed.
+    """
+    if engine == 'numpy':
+        import vectorized_tracks
+        return vectorized_tracks.iter_track_range(start_id, stop_id, num_tracks,
+                                                  vectorized_tracks.shard_generator(base_seed, shard),
+                                                  num_artists, num_albums)
+    return iter_track_range(start_id, stop_id, num_tracks, shard_rng(base_seed, shard), num_artists, num_albums)
+
+def shard_ranges(num_tracks: int, shard_size: int) -> List[tuple]:
+    """(shard, start_id, stop_id) for every shard of the catalog"""
+    return [(shard, start, min(start + shard_size, num_tracks + 1))
+            for shard, start in enumerate(range(1, num_tracks + 1, shard_size))]
+
+def iter_tracks(num_tracks: int, base_seed: int, num_artists: int = 50, num_albums: int = 30,
+                shard_size: int = DEFAULT_SHARD_SIZE, engine: str = 'python') -> Iterator[Dict]:
+    """Yield every track in id order, shard by shard, in this process"""
+    for shard, start, stop in shard_ranges(num_tracks, shard_size):
+        yield from iter_shard_tracks(shard, start, stop, num_tracks, base_seed, num_artists, num_albums, engine)
+
+def iter_artists(num_artists: int, rng: random.Random, start: int = 0) -> Iterator[Dict]:
+    """Yield artist records, from artist-{start+1} on"""
+    for i in range(start, num_artists):
+        artist_img = rng.choice(ARTIST_IMAGES)
+        artist_genres = rng.sample(GENRES, rng.randint(1, 3))
+        yield {
             "id": f"artist-{i+1}",
             "name": ARTIST_NAMES[i % len(ARTIST_NAMES)],
             "image": f"https://images.unsplash.com/{artist_img}?w=400&h=400&fit=crop&q=80",
-            "followers": random.randint(10000, 50000000),
-            "verified": random.choice([True, True, True, False]),  # 75% verified
+            "followers": rng.randint(10000, 50000000),
+            "verified": rng.choice([True, True, True, False]),  # 75% verified
             "bio": f"Award-winning artist specializing in {', '.join(artist_genres[:2])}",
             "genre": artist_genres
-        })
+        }
+
+PLAYLIST_NAMES = [
+    "Melancholic Reflections", "Nostalgic Memories", "Deep Thoughts", "Content Moments",
+    "Joyful Anthems", "Euphoric Beats", "Anxious Relief", "Stress-Free Zone",
+    "Confidence Boost", "Relaxed Vibes", "Excited Energy", "Grateful Heart",
+    "Optimistic Outlook", "Chill Electronic", "Energetic Rock", "Mellow Jazz",
+    "Uplifting Pop", "Calm Ambient", "High Energy Hip-Hop", "Smooth R&B",
+    "Mental Health Focus", "Wellness Soundtrack", "Therapy Playlist", "Healing Tunes",
+    "Morning Motivation", "Evening Wind Down", "Workout Mix", "Study Focus",
+    "Sleep Sounds", "Wake Up Call", "Road Trip Tunes", "Party Starters",
+    "Rainy Day Vibes", "Sunny Day Energy", "Winter Warmth", "Summer Cool",
+    "Spring Fresh", "Autumn Cozy", "Dark Mood", "Light Heart",
+    "Mixed Emotions", "Pure Joy", "Deep Sadness", "Neutral State",
+    "Genre Mix 2024", "New Releases", "Throwback Hits", "Underground Gems",
+    "Indie Discoveries", "World Music Journey"
+]
+
+def draw_playlist_specs(num_playlists: int, rng: random.Random) -> List[Dict]:
+    """Pick the mood tags each playlist will match tracks against"""
+    specs = []
+    for _ in range(num_playlists):
+        mood = rng.choice(MOODS)
+        config = get_mood_config(mood)
+        vibe = rng.randint(*config['vibe_range'])
+        feelings = rng.sample(config['feelings'], rng.randint(1, 3))
+        playlist_genres = rng.sample(GENRES, rng.randint(2, 4))
+        specs.append({"mood": mood, "feelings": feelings, "vibe": vibe, "genres": playlist_genres})
+    return specs
+
+def track_summary(track: Dict) -> Dict:
+    """The {id, name, duration} copy of a track embedded in albums and playlists"""
+    return {"id": track['id'], "name": track['name'], "duration": track['duration']}
+
+def playlist_keys(tags: Dict) -> List[tuple]:
+    """Index keys a playlist or track can match on: its mood, feelings and genres"""
+    return ([('mood', tags['mood'])] +
+            [('feeling', f) for f in tags['feelings']] +
+            [('genre', g) for g in tags['genres']])
+
+class TrackCollector:
+    """Collects what albums and playlists need from a single pass over the tracks
     
-    # Generate 30 albums
-    albums = []
-    for i in range(30):
-        album_img = random.choice(COVER_ART_IMAGES)
-        artist_id = f"artist-{(i % 50) + 1}"
-        artist_name = ARTIST_NAMES[i % len(ARTIST_NAMES)]
+    Only the first ALBUM_TRACK_LIMIT / PLAYLIST_TRACK_LIMIT matches per album
+    and playlist, plus the handful of tracks used as fallbacks, are kept, so
+    memory does not grow with the size of the catalog.
+    
+    With playlist_match='tags' (the default) a playlist takes the first
+    tracks that share its mood, any feeling or any genre, so playlists are
+    indexed by those keys: each track only visits the playlists it can
+    match, and a playlist leaves the index once it is full.
+    
+    With playlist_match='similarity' each playlist gets the
+    PLAYLIST_TRACK_LIMIT tracks nearest its moodTags, ranked, as chosen by
+    track_similarity.PlaylistRanker (needs NumPy); index_file also saves
+    every track's feature vector there for later queries.
+    """
+    
+    def __init__(self, num_tracks: int, num_albums: int, playlist_specs: List[Dict],
+                 playlist_match: str = 'tags', index_file: Optional[str] = None):
+        self.album_tracks = {f"album-{i+1}": [] for i in range(num_albums)}
+        self.playlist_specs = playlist_specs
+        self.playlist_tracks = [[] for _ in playlist_specs]
+        self.open_playlists = {}
+        self.ranker = None
+        if playlist_match == 'similarity':
+            import track_similarity
+            writer = track_similarity.IndexWriter(index_file) if index_file else None
+            self.ranker = track_similarity.PlaylistRanker(playlist_specs, PLAYLIST_TRACK_LIMIT, writer)
+        else:
+            for i, spec in enumerate(playlist_specs):
+                for key in playlist_keys(spec):
+                    self.open_playlists.setdefault(key, set()).add(i)
+        # Positions of the tracks used when an album or playlist matches nothing
+        self.fallback_positions = {i % num_tracks for i in range(num_albums)} if num_tracks else set()
+        for i in range(len(playlist_specs)):
+            self.fallback_positions.update(p for p in range(i * 3, (i + 1) * 3) if p < num_tracks)
+        self.fallback_tracks = {}
+        self.count = 0
+    
+    def _close_playlist(self, i: int):
+        for key in playlist_keys(self.playlist_specs[i]):
+            members = self.open_playlists.get(key)
+            if members is not None:
+                members.discard(i)
+                if not members:
+                    del self.open_playlists[key]
+    
+    def add(self, summary: Dict, album_id: str, tags: Dict):
+        """Record the next track (in id order) given its summary, albumId and moodTags"""
+        if self.count in self.fallback_positions:
+            self.fallback_tracks[self.count] = summary
+        self.count += 1
         
-        # Get tracks for this album
-        album_tracks = [t for t in tracks if t['albumId'] == f"album-{i+1}"]
-        if not album_tracks:
-            album_tracks = [tracks[i % len(tracks)]]
+        album = self.album_tracks.get(album_id)
+        if album is not None and len(album) < ALBUM_TRACK_LIMIT:
+            album.append(summary)
         
-        track_list = [{"id": t['id'], "name": t['name'], "duration": t['duration']} for t in album_tracks[:12]]
-        total_duration = sum(t['duration'] for t in album_tracks[:12])
+        if self.ranker:
+            self.ranker.add(summary, summary['id'], tags)
+            return
+        if not self.open_playlists:
+            return
+        matches = set()
+        for key in playlist_keys(tags):
+            members = self.open_playlists.get(key)
+            if members:
+                matches |= members
+        for i in matches:
+            matched = self.playlist_tracks[i]
+            matched.append(summary)
+            if len(matched) >= PLAYLIST_TRACK_LIMIT:
+                self._close_playlist(i)
+    
+    def observe(self, tracks: Iterable[Dict]) -> Iterator[Dict]:
+        """Pass tracks through unchanged while recording album/playlist membership"""
+        for track in tracks:
+            self.add(track_summary(track), track['albumId'], track['moodTags'])
+            yield track
+    
+    def tracks_for_album(self, i: int) -> List[Dict]:
+        album_tracks = self.album_tracks[f"album-{i+1}"]
+        if not album_tracks and self.count:
+            album_tracks = [self.fallback_tracks[i % self.count]]
+        return album_tracks
+    
+    def close(self):
+        """Finish ranking and write the feature index, if one was asked for"""
+        if self.ranker:
+            self.ranker.flush()
+            if self.ranker.writer:
+                self.ranker.writer.close()
+    
+    def tracks_for_playlist(self, i: int) -> List[Dict]:
+        matching_tracks = self.ranker.tracks_for_playlist(i) if self.ranker else self.playlist_tracks[i]
+        if not matching_tracks:
+            matching_tracks = [self.fallback_tracks[p] for p in range(i * 3, (i + 1) * 3) if p in self.fallback_tracks]
+        return matching_tracks
+
+def iter_albums(num_albums: int, num_artists: int, collector: TrackCollector, rng: random.Random,
+                start: int = 0) -> Iterator[Dict]:
+    """Yield album records from the collected album tracks, from album-{start+1} on"""
+    for i in range(start, num_albums):
+        album_img = rng.choice(COVER_ART_IMAGES)
+        artist_id = f"artist-{(i % num_artists) + 1}"
+        artist_name = ARTIST_NAMES[i % len(ARTIST_NAMES)]
         
-        albums.append({
+        track_list = collector.tracks_for_album(i)
+        total_duration = sum(t['duration'] for t in track_list)
+        
+        yield {
             "id": f"album-{i+1}",
-            "name": f"{random.choice(TRACK_TITLES[:20])} Album",
+            "name": f"{rng.choice(TRACK_TITLES[:20])} Album",
             "artist": {
                 "id": artist_id,
                 "name": artist_name,
-                "image": f"https://images.unsplash.com/{random.choice(ARTIST_IMAGES)}?w=400&h=400&fit=crop&q=80",
-                "followers": random.randint(10000, 50000000),
+                "image": f"https://images.unsplash.com/{rng.choice(ARTIST_IMAGES)}?w=400&h=400&fit=crop&q=80",
+                "followers": rng.randint(10000, 50000000),
                 "verified": True
             },
             "coverArt": f"https://images.unsplash.com/{album_img}?w=400&h=400&fit=crop&q=80",
             "tracks": track_list,
-            "releaseDate": f"2024-{random.randint(1,12):02d}-{random.randint(1,28):02d}",
-            "label": random.choice(["EmPulse Records", "NextEleven Label", "Independent", "Universal", "Sony Music"]),
-            "copyright": f"© 2024 {random.choice(['EmPulse Records', 'NextEleven Label'])}",
+            "releaseDate": f"2024-{rng.randint(1,12):02d}-{rng.randint(1,28):02d}",
+            "label": rng.choice(["EmPulse Records", "NextEleven Label", "Independent", "Universal", "Sony Music"]),
+            "copyright": f"© 2024 {rng.choice(['EmPulse Records', 'NextEleven Label'])}",
             "totalDuration": total_duration
-        })
-    
-    # Generate 50 playlists with diverse mood combinations
-    playlists = []
-    playlist_names = [
-        "Melancholic Reflections", "Nostalgic Memories", "Deep Thoughts", "Content Moments",
-        "Joyful Anthems", "Euphoric Beats", "Anxious Relief", "Stress-Free Zone",
-        "Confidence Boost", "Relaxed Vibes", "Excited Energy", "Grateful Heart",
-        "Optimistic Outlook", "Chill Electronic", "Energetic Rock", "Mellow Jazz",
-        "Uplifting Pop", "Calm Ambient", "High Energy Hip-Hop", "Smooth R&B",
-        "Mental Health Focus", "Wellness Soundtrack", "Therapy Playlist", "Healing Tunes",
-        "Morning Motivation", "Evening Wind Down", "Workout Mix", "Study Focus",
-        "Sleep Sounds", "Wake Up Call", "Road Trip Tunes", "Party Starters",
-        "Rainy Day Vibes", "Sunny Day Energy", "Winter Warmth", "Summer Cool",
-        "Spring Fresh", "Autumn Cozy", "Dark Mood", "Light Heart",
-        "Mixed Emotions", "Pure Joy", "Deep Sadness", "Neutral State",
-        "Genre Mix 2024", "New Releases", "Throwback Hits", "Underground Gems",
-        "Indie Discoveries", "World Music Journey"
-    ]
-    
-    for i in range(50):
-        playlist_name = playlist_names[i] if i < len(playlist_names) else f"Playlist {i+1}"
-        
-        # Select mood for playlist
-        mood = random.choice(MOODS)
-        config = get_mood_config(mood)
-        vibe = random.randint(*config['vibe_range'])
-        feelings = random.sample(config['feelings'], random.randint(1, 3))
-        playlist_genres = random.sample(GENRES, random.randint(2, 4))
-        
-        # Find matching tracks
-        matching_tracks = [
-            t for t in tracks 
-            if t['moodTags']['mood'] == mood or 
-               any(f in t['moodTags']['feelings'] for f in feelings) or
-               any(g in t['moodTags']['genres'] for g in playlist_genres)
-        ][:20]  # Limit to 20 tracks per playlist
-        
-        if not matching_tracks:
-            matching_tracks = tracks[i*3:(i+1)*3]
-        
-        track_list = [{"id": t['id'], "name": t['name'], "duration": t['duration']} for t in matching_tracks]
-        total_duration = sum(t['duration'] for t in matching_tracks)
+        }
+
+def iter_playlists(collector: TrackCollector, rng: random.Random, start: int = 0) -> Iterator[Dict]:
+    """Yield playlist records from the collected playlist matches, from playlist-{start+1} on"""
+    for i, spec in enumerate(collector.playlist_specs[start:], start):
+        playlist_name = PLAYLIST_NAMES[i] if i < len(PLAYLIST_NAMES) else f"Playlist {i+1}"
+        track_list = collector.tracks_for_playlist(i)
+        total_duration = sum(t['duration'] for t in track_list)
         
-        playlists.append({
+        yield {
             "id": f"playlist-{i+1}",
             "name": playlist_name,
-            "description": f"A curated collection of {mood.lower()} tracks for {', '.join(feelings).lower()} moments",
-            "coverArt": f"https://images.unsplash.com/{random.choice(COVER_ART_IMAGES)}?w=400&h=400&fit=crop&q=80",
-            "owner": random.choice(["EmPulse Music", "NextEleven", "System", ARTIST_NAMES[i % len(ARTIST_NAMES)]]),
+            "description": f"A curated collection of {spec['mood'].lower()} tracks for {', '.join(spec['feelings']).lower()} moments",
+            "coverArt": f"https://images.unsplash.com/{rng.choice(COVER_ART_IMAGES)}?w=400&h=400&fit=crop&q=80",
+            "owner": rng.choice(["EmPulse Music", "NextEleven", "System", ARTIST_NAMES[i % len(ARTIST_NAMES)]]),
             "ownerId": "system",
             "tracks": track_list,
-            "moodTags": {
-                "mood": mood,
-                "feelings": feelings,
-                "vibe": vibe,
-                "genres": playlist_genres
-            },
+            "moodTags": dict(spec),
             "totalDuration": total_duration,
-            "createdAt": f"2024-{random.randint(1,12):02d}-{random.randint(1,28):02d}T{random.randint(0,23):02d}:00:00Z",
-            "updatedAt": f"2024-{random.randint(1,12):02d}-{random.randint(1,28):02d}T{random.randint(0,23):02d}:00:00Z"
-        })
+            "createdAt": f"2024-{rng.randint(1,12):02d}-{rng.randint(1,28):02d}T{rng.randint(0,23):02d}:00:00Z",
+            "updatedAt": f"2024-{rng.randint(1,12):02d}-{rng.randint(1,28):02d}T{rng.randint(0,23):02d}:00:00Z"
+        }
+
+# Output formats: pretty JSON arrays (the checked-in layout), minified JSON
+# arrays, or newline-delimited JSON with one record per line. The columnar
+# format (compact_catalog.py) writes a catalog/ directory instead.
+OUTPUT_FORMATS = {'json': '.json', 'compact': '.json', 'ndjson': '.ndjson'}
+COLUMNAR_FORMAT = 'columnar'
+
+def format_record(record: Dict, fmt: str = 'json') -> str:
+    """One record as it appears inside an output file of the given format"""
+    if fmt == 'ndjson':
+        return json.dumps(record, separators=(',', ':')) + '\n'
+    if fmt == 'compact':
+        return json.dumps(record, separators=(',', ':'))
+    return '\n  ' + json.dumps(record, indent=2).replace('\n', '\n  ')
+
+def write_fragment(f, records: Iterable[Dict], fmt: str = 'json') -> int:
+    """Write records separated for the format, without the enclosing array"""
+    separator = '' if fmt == 'ndjson' else ','
+    count = 0
+    for record in records:
+        if count:
+            f.write(separator)
+        f.write(format_record(record, fmt))
+        count += 1
+    return count
+
+def stream_records(records: Iterable[Dict], f) -> Iterator[Dict]:
+    """Pass records through, also writing each to f as an NDJSON line as soon as it is made"""
+    for record in records:
+        f.write(format_record(record, 'ndjson'))
+        f.flush()
+        yield record
+
+def open_array(f, fmt: str):
+    if fmt != 'ndjson':
+        f.write('[')
+
+def close_array(f, fmt: str, count: int):
+    if fmt != 'ndjson':
+        f.write('\n]' if count and fmt == 'json' else ']')
+
+def write_records(path: str, records: Iterable[Dict], fmt: str = 'json') -> int:
+    """Stream records to path one at a time, returning how many were written
+    
+    The 'json' format is byte-for-byte what json.dump(records, f, indent=2)
+    would produce, without holding the whole list in memory.
+    """
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w') as f:
+        open_array(f, fmt)
+        count = write_fragment(f, records, fmt)
+        close_array(f, fmt, count)
+    os.replace(tmp_path, path)
+    return count
+
+def generate_shard(task: tuple) -> List[Dict]:
+    """Worker: write one shard's tracks as a fragment file
+    
+    The tracks are also returned so the parent can build albums and
+    playlists (and feed any database sink) without re-parsing the shard.
+    """
+    shard, start, stop, num_tracks, base_seed, num_artists, num_albums, engine, fmt, path = task
+    tracks = list(iter_shard_tracks(shard, start, stop, num_tracks, base_seed, num_artists, num_albums, engine))
+    if path:
+        with open(path, 'w') as f:
+            write_fragment(f, tracks, fmt)
+    return tracks
+
+def iter_tracks_sharded(num_tracks: int, base_seed: int, num_artists: int, num_albums: int,
+                        workers: int, shard_size: int, engine: str = 'python') -> Iterator[Dict]:
+    """Yield every track in id order, generated shard by shard in worker processes"""
+    tasks = [(shard, start, stop, num_tracks, base_seed, num_artists, num_albums, engine, None, None)
+             for shard, start, stop in shard_ranges(num_tracks, shard_size)]
+    with Pool(workers) as pool:
+        for tracks in pool.imap(generate_shard, tasks):
+            yield from tracks
+
+def write_tracks_sharded(path: str, observe, num_tracks: int, base_seed: int,
+                         num_artists: int, num_albums: int, fmt: str, workers: int, shard_size: int,
+                         engine: str = 'python') -> int:
+    """Generate shards in worker processes and merge them, in id order, into path
+    
+    observe is the same pass-through wrapper the single-process path streams
+    tracks through; every shard's tracks are run through it in order.
+    """
+    out_dir = os.path.dirname(path) or '.'
+    with tempfile.TemporaryDirectory(prefix='.shards-', dir=out_dir) as shard_dir:
+        tasks = [(shard, start, stop, num_tracks, base_seed, num_artists, num_albums, engine, fmt,
+                  os.path.join(shard_dir, f'shard-{shard:05d}'))
+                 for shard, start, stop in shard_ranges(num_tracks, shard_size)]
+        tmp_path = path + '.tmp'
+        count = 0
+        with Pool(workers) as pool, open(tmp_path, 'w') as f:
+            open_array(f, fmt)
+            # imap hands shards back in order, so merging is a straight append
+            for task, tracks in zip(tasks, pool.imap(generate_shard, tasks)):
+                for _ in observe(tracks):
+                    pass
+                if tracks and count and fmt != 'ndjson':
+                    f.write(',')
+                with open(task[-1], 'r') as shard_file:
+                    shutil.copyfileobj(shard_file, f)
+                count += len(tracks)
+            close_array(f, fmt, count)
+        os.replace(tmp_path, path)
+    return count
+
+# Seed tables live alongside the scraper's `tracks` table in data/music.db,
+# so they are prefixed rather than sharing its schema
+SEED_SCHEMA = {
+    'seed_tracks': """
+        position INTEGER PRIMARY KEY, id TEXT NOT NULL, name TEXT, artist TEXT, artist_id TEXT,
+        album TEXT, album_id TEXT, duration INTEGER, audio_url TEXT, cover_art TEXT, mood TEXT,
+        feelings TEXT, vibe INTEGER, genres TEXT, format TEXT, quality TEXT, release_date TEXT""",
+    'seed_artists': """
+        position INTEGER PRIMARY KEY, id TEXT NOT NULL, name TEXT, image TEXT, followers INTEGER,
+        verified INTEGER, bio TEXT, genre TEXT""",
+    'seed_albums': """
+        position INTEGER PRIMARY KEY, id TEXT NOT NULL, name TEXT, artist_id TEXT, artist_name TEXT,
+        artist_image TEXT, artist_followers INTEGER, artist_verified INTEGER, cover_art TEXT,
+        release_date TEXT, label TEXT, copyright TEXT, total_duration INTEGER""",
+    'seed_album_tracks': "album_id TEXT NOT NULL, position INTEGER NOT NULL, track_id TEXT NOT NULL",
+    'seed_playlists': """
+        position INTEGER PRIMARY KEY, id TEXT NOT NULL, name TEXT, description TEXT, cover_art TEXT,
+        owner TEXT, owner_id TEXT, mood TEXT, feelings TEXT, vibe INTEGER, genres TEXT,
+        total_duration INTEGER, created_at TEXT, updated_at TEXT""",
+    'seed_playlist_tracks': "playlist_id TEXT NOT NULL, position INTEGER NOT NULL, track_id TEXT NOT NULL",
+}
+
+# Created only after the bulk load, so inserts do not maintain them row by row
+SEED_INDEXES = [
+    "CREATE UNIQUE INDEX idx_seed_tracks_id ON seed_tracks (id)",
+    "CREATE INDEX idx_seed_tracks_mood ON seed_tracks (mood)",
+    "CREATE INDEX idx_seed_tracks_album ON seed_tracks (album_id)",
+    "CREATE UNIQUE INDEX idx_seed_artists_id ON seed_artists (id)",
+    "CREATE UNIQUE INDEX idx_seed_albums_id ON seed_albums (id)",
+    "CREATE UNIQUE INDEX idx_seed_album_tracks ON seed_album_tracks (album_id, position)",
+    "CREATE UNIQUE INDEX idx_seed_playlists_id ON seed_playlists (id)",
+    "CREATE UNIQUE INDEX idx_seed_playlist_tracks ON seed_playlist_tracks (playlist_id, position)",
+]
+
+def track_row(position: int, t: Dict) -> tuple:
+    tags = t['moodTags']
+    return (position, t['id'], t['name'], t['artist'], t['artistId'], t['album'], t['albumId'],
+            t['duration'], t['audioUrl'], t['coverArt'], tags['mood'], json.dumps(tags['feelings']),
+            tags['vibe'], json.dumps(tags['genres']), t['format'], t['quality'], t['releaseDate'])
+
+def artist_row(position: int, a: Dict) -> tuple:
+    return (position, a['id'], a['name'], a['image'], a['followers'], int(a['verified']), a['bio'],
+            json.dumps(a['genre']))
+
+def album_row(position: int, a: Dict) -> tuple:
+    artist = a['artist']
+    return (position, a['id'], a['name'], artist['id'], artist['name'], artist['image'],
+            artist['followers'], int(artist['verified']), a['coverArt'], a['releaseDate'], a['label'],
+            a['copyright'], a['totalDuration'])
+
+def playlist_row(position: int, p: Dict) -> tuple:
+    tags = p['moodTags']
+    return (position, p['id'], p['name'], p['description'], p['coverArt'], p['owner'], p['ownerId'],
+            tags['mood'], json.dumps(tags['feelings']), tags['vibe'], json.dumps(tags['genres']),
+            p['totalDuration'], p['createdAt'], p['updatedAt'])
+
+# entity kind -> (table, row builder, join table for its embedded track list)
+SEED_ENTITIES = {
+    'tracks': ('seed_tracks', track_row, None),
+    'artists': ('seed_artists', artist_row, None),
+    'albums': ('seed_albums', album_row, 'seed_album_tracks'),
+    'playlists': ('seed_playlists', playlist_row, 'seed_playlist_tracks'),
+}
+
+class SqliteSink:
+    """Bulk-loads the generated catalog into SQLite as it streams past
+    
+    Everything is inserted with batched executemany calls inside a single
+    transaction, with WAL and synchronous=OFF while loading; secondary indexes
+    are built once at the end.
+    """
+    
+    def __init__(self, path: str, batch_size: int = 10_000):
+        self.path = path
+        self.batch_size = batch_size
+        # Next position per entity kind; tracks may arrive over several tee() calls
+        self.positions = dict.fromkeys(SEED_ENTITIES, 0)
+        self.conn = sqlite3.connect(path, isolation_level=None)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=OFF")
+        self.conn.execute("PRAGMA temp_store=MEMORY")
+        self.conn.execute("PRAGMA cache_size=-262144")  # 256 MB
+        self.conn.execute("BEGIN")
+        for table, columns in SEED_SCHEMA.items():
+            self.conn.execute(f"DROP TABLE IF EXISTS {table}")
+            self.conn.execute(f"CREATE TABLE {table} ({columns})")
+    
+    def _insert(self, table: str, rows: List[tuple]):
+        if rows:
+            placeholders = ','.join('?' * len(rows[0]))
+            self.conn.executemany(f"INSERT INTO {table} VALUES ({placeholders})", rows)
+    
+    def tee(self, kind: str, records: Iterable[Dict]) -> Iterator[Dict]:
+        """Pass records through unchanged while loading them into the database"""
+        table, to_row, join_table = SEED_ENTITIES[kind]
+        rows = []
+        joins = []
+        for record in records:
+            rows.append(to_row(self.positions[kind], record))
+            self.positions[kind] += 1
+            if join_table:
+                joins.extend((record['id'], i, t['id']) for i, t in enumerate(record['tracks']))
+            if len(rows) >= self.batch_size:
+                self._insert(table, rows)
+                self._insert(join_table, joins)
+                rows, joins = [], []
+            yield record
+        self._insert(table, rows)
+        self._insert(join_table, joins)
+    
+    def close(self):
+        """Build indexes, commit, and leave the file in rollback-journal mode"""
+        for statement in SEED_INDEXES:
+            self.conn.execute(statement)
+        self.conn.execute("COMMIT")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        # Fold the WAL back in so the shipped database stays a single file
+        self.conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        self.conn.execute("PRAGMA journal_mode=DELETE")
+        self.conn.close()
+
+def iter_db_records(conn: sqlite3.Connection, kind: str) -> Iterator[Dict]:
+    """Rebuild generator records, in their original order, from the seed tables"""
+    if kind == 'tracks':
+        for row in conn.execute("SELECT * FROM seed_tracks ORDER BY position"):
+            (_, track_id, name, artist, artist_id, album, album_id, duration, audio_url, cover_art,
+             mood, feelings, vibe, genres, fmt, quality, release_date) = row
+            yield {
+                "id": track_id, "name": name, "artist": artist, "artistId": artist_id, "album": album,
+                "albumId": album_id, "duration": duration, "audioUrl": audio_url, "coverArt": cover_art,
+                "moodTags": {"mood": mood, "feelings": json.loads(feelings), "vibe": vibe,
+                             "genres": json.loads(genres)},
+                "format": fmt, "quality": quality, "releaseDate": release_date
+            }
+    elif kind == 'artists':
+        for _, artist_id, name, image, followers, verified, bio, genre in conn.execute(
+                "SELECT * FROM seed_artists ORDER BY position"):
+            yield {"id": artist_id, "name": name, "image": image, "followers": followers,
+                   "verified": bool(verified), "bio": bio, "genre": json.loads(genre)}
+    else:
+        table, _, join_table = SEED_ENTITIES[kind]
+        owner = 'album_id' if kind == 'albums' else 'playlist_id'
+        rows = conn.execute(f"""
+            SELECT e.*, t.id, t.name, t.duration FROM {table} e
+            LEFT JOIN {join_table} j ON j.{owner} = e.id
+            LEFT JOIN seed_tracks t ON t.id = j.track_id
+            ORDER BY e.position, j.position""")
+        for _, group in itertools.groupby(rows, key=lambda r: r[0]):
+            group = list(group)
+            entity = group[0][:-3]
+            track_list = [{"id": r[-3], "name": r[-2], "duration": r[-1]} for r in group if r[-3] is not None]
+            if kind == 'albums':
+                (_, album_id, name, artist_id, artist_name, artist_image, followers, verified, cover_art,
+                 release_date, label, copyright_, total_duration) = entity
+                yield {
+                    "id": album_id, "name": name,
+                    "artist": {"id": artist_id, "name": artist_name, "image": artist_image,
+                               "followers": followers, "verified": bool(verified)},
+                    "coverArt": cover_art, "tracks": track_list, "releaseDate": release_date,
+                    "label": label, "copyright": copyright_, "totalDuration": total_duration
+                }
+            else:
+                (_, playlist_id, name, description, cover_art, owner_name, owner_id, mood, feelings, vibe,
+                 genres, total_duration, created_at, updated_at) = entity
+                yield {
+                    "id": playlist_id, "name": name, "description": description, "coverArt": cover_art,
+                    "owner": owner_name, "ownerId": owner_id, "tracks": track_list,
+                    "moodTags": {"mood": mood, "feelings": json.loads(feelings), "vibe": vibe,
+                                 "genres": json.loads(genres)},
+                    "totalDuration": total_duration, "createdAt": created_at, "updatedAt": updated_at
+                }
+
+TRACKS_CSV_COLUMNS = ['id', 'name', 'artist', 'album', 'duration', 'mood', 'feelings', 'vibe', 'genres',
+                      'format', 'quality', 'release_date', 'audio_url', 'cover_art']
+
+def export_catalog(db_path: str, out_dir: str = 'data/mock', fmt: str = 'json'):
+    """Write the seed tables of db_path back out as files plus a tracks.csv"""
+    print(f"Exporting seed data from {db_path}...")
+    ext = OUTPUT_FORMATS[fmt]
+    os.makedirs(out_dir, exist_ok=True)
+    conn = sqlite3.connect(db_path)
+    try:
+        for kind in SEED_ENTITIES:
+            with instrumentation.span('seed.export', kind=kind, fmt=fmt) as stage:
+                count = write_records(os.path.join(out_dir, f'{kind}{ext}'), iter_db_records(conn, kind), fmt)
+                stage.set(records=count)
+            print(f"✓ Exported {count} {kind}")
+        
+        csv_path = os.path.join(out_dir, 'tracks.csv')
+        with open(csv_path, 'w', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(TRACKS_CSV_COLUMNS)
+            writer.writerows(conn.execute(
+                "SELECT id, name, artist, album, duration, mood, feelings, vibe, genres, format, quality, "
+                "release_date, audio_url, cover_art FROM seed_tracks ORDER BY position"))
+        print(f"✓ Exported {csv_path}")
+    finally:
+        conn.close()
+
+def generate_seed_data(num_tracks: int = 150, num_artists: int = 50, num_albums: int = 30,
+                       num_playlists: int = 50, seed: Optional[int] = None,
+                       out_dir: str = 'data/mock', fmt: str = 'json',
+                       workers: int = 1, shard_size: int = DEFAULT_SHARD_SIZE,
+                       sqlite_path: Optional[str] = None, engine: str = 'python', track_stream=None,
+                       playlist_match: str = 'tags'):
+    """Generate comprehensive seed data
+    
+    If track_stream is given, every track is also written to it as NDJSON
+    the moment it is generated, for a consumer such as the audio generator.
+    """
+    print("Generating seed data...")
+    rng = random.Random(seed)
+    # Tracks come from per-shard streams derived from this base seed
+    base_seed = rng.getrandbits(64)
+    os.makedirs(out_dir, exist_ok=True)
+    # A full run changes everything, so an earlier run's delta no longer applies
+    with contextlib.suppress(FileNotFoundError):
+        os.remove(os.path.join(out_dir, CHANGES_FILE))
+    columnar = compact_catalog.CatalogWriter(os.path.join(out_dir, 'catalog')) if fmt == COLUMNAR_FORMAT else None
+    
+    def emit(kind, records):
+        # With metrics on, the stage's time is split into producing records
+        # (generation, matching, loading) and formatting/writing them
+        source = instrumentation.TimedIterator(records) if instrumentation.enabled() else records
+        with instrumentation.span(f'seed.{kind}', fmt=fmt) as stage:
+            if columnar:
+                count = columnar.write(kind, source)
+            else:
+                count = write_records(os.path.join(out_dir, f'{kind}{OUTPUT_FORMATS[fmt]}'), source, fmt)
+            if source is not records:
+                stage.set(records=count, generate_seconds=round(source.seconds, 6),
+                          write_seconds=round(stage.elapsed() - source.seconds, 6))
+        return count
+    
+    # Playlist mood tags are drawn up front so tracks can be matched against
+    # them as they stream past, instead of keeping every track in memory
+    playlist_specs = draw_playlist_specs(num_playlists, rng)
+    index_file = os.path.join(out_dir, 'track_features.npy') if playlist_match == 'similarity' else None
+    collector = TrackCollector(num_tracks, num_albums, playlist_specs, playlist_match, index_file)
+    sink = SqliteSink(sqlite_path) if sqlite_path else None
+    
+    def load(kind, records):
+        return sink.tee(kind, records) if sink else records
+    
+    def observe(tracks):
+        tracks = collector.observe(tracks)
+        if track_stream:
+            tracks = stream_records(tracks, track_stream)
+        return load('tracks', tracks)
     
     # Write files
-    with open('data/mock/tracks.json', 'w') as f:
-        json.dump(tracks, f, indent=2)
-    print(f"✓ Generated {len(tracks)} tracks")
+    sharded = workers > 1 and num_tracks > shard_size
+    if sharded and not columnar:
+        tracks_path = os.path.join(out_dir, f'tracks{OUTPUT_FORMATS[fmt]}')
+        with instrumentation.span('seed.tracks', fmt=fmt, workers=workers) as stage:
+            count = write_tracks_sharded(tracks_path, observe, num_tracks, base_seed, num_artists,
+                                         num_albums, fmt, workers, shard_size, engine)
+            stage.set(records=count)
+    elif sharded:
+        count = emit('tracks', observe(iter_tracks_sharded(num_tracks, base_seed, num_artists, num_albums,
+                                                           workers, shard_size, engine)))
+    else:
+        count = emit('tracks', observe(iter_tracks(num_tracks, base_seed, num_artists, num_albums,
+                                                   shard_size, engine)))
+    print(f"✓ Generated {count} tracks")
+    if index_file:
+        with instrumentation.span('seed.similarity'):
+            collector.close()
+        print(f"✓ Indexed track features in {index_file}")
+    
+    count = emit('artists', load('artists', iter_artists(num_artists, rng)))
+    print(f"✓ Generated {count} artists")
     
-    with open('data/mock/artists.json', 'w') as f:
-        json.dump(artists, f, indent=2)
-    print(f"✓ Generated {len(artists)} artists")
+    count = emit('albums', load('albums', iter_albums(num_albums, num_artists, collector, rng)))
+    print(f"✓ Generated {count} albums")
     
-    with open('data/mock/albums.json', 'w') as f:
-        json.dump(albums, f, indent=2)
-    print(f"✓ Generated {len(albums)} albums")
+    count = emit('playlists', load('playlists', iter_playlists(collector, rng)))
+    print(f"✓ Generated {count} playlists")
     
-    with open('data/mock/playlists.json', 'w') as f:
-        json.dump(playlists, f, indent=2)
-    print(f"✓ Generated {len(playlists)} playlists")
+    with instrumentation.span('seed.finalize'):
+        if columnar:
+            columnar.close()
+        if sink:
+            sink.close()
+            print(f"✓ Loaded catalog into {sqlite_path}")
     
+    write_settings(out_dir, playlist_match=playlist_match)
     print("\n✅ Seed data generation complete!")
 
+# Written by --incremental next to the catalog: the ids each run added or
+# changed, per entity kind, so later stages can work on just the delta
+CHANGES_FILE = 'changes.json'
+CHANGES_VERSION = 1
+# Written next to every catalog: how it was built, so an --incremental run
+# matches it the same way instead of re-matching every playlist
+SETTINGS_FILE = 'seed_settings.json'
+SETTINGS_VERSION = 1
+
+def read_settings(out_dir: str) -> Dict:
+    """Settings the catalog in out_dir was built with, or {} if unknown"""
+    try:
+        with open(os.path.join(out_dir, SETTINGS_FILE), 'r') as f:
+            settings = json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+    return settings if settings.get('version') == SETTINGS_VERSION else {}
+
+def write_settings(out_dir: str, **settings):
+    path = os.path.join(out_dir, SETTINGS_FILE)
+    with open(path + '.tmp', 'w') as f:
+        json.dump({'version': SETTINGS_VERSION, **settings}, f, indent=2)
+    os.replace(path + '.tmp', path)
+
+def entity_number(record: Dict) -> int:
+    """N of an "<kind>-N" id"""
+    return int(record['id'].rsplit('-', 1)[1])
+
+def read_records(path: str) -> List[Dict]:
+    """Every record of an existing output file (JSON array or NDJSON), or [] if there is none"""
+    if not os.path.exists(path):
+        return []
+    with open(path, 'r') as f:
+        if path.endswith('.ndjson'):
+            return [json.loads(line) for line in f if line.strip()]
+        return json.load(f)
+
+def regenerate_track(track: Dict, rng: random.Random, num_artists: int, num_albums: int) -> Dict:
+    """New content for an existing track, keeping its id, mood, artist and album
+    
+    Fields added by later stages (e.g. waveformUrl) are kept in place.
+    """
+    fresh = generate_track(entity_number(track), track['moodTags']['mood'], GENRES, rng, num_artists, num_albums)
+    fresh.update(artistId=track['artistId'], albumId=track['albumId'])
+    return {**{key: fresh.get(key, value) for key, value in track.items()}, **fresh}
+
+def update_seed_data(num_tracks: int = 150, num_artists: int = 50, num_albums: int = 30,
+                     num_playlists: int = 50, seed: Optional[int] = None, out_dir: str = 'data/mock',
+                     fmt: str = 'json', regenerate: Iterable[str] = (), sqlite_path: Optional[str] = None,
+                     track_stream=None, playlist_match: Optional[str] = None) -> Dict:
+    """Grow an existing catalog in out_dir instead of generating it from scratch
+    
+    Every existing record keeps its id and content. Tracks, artists, albums
+    and playlists are appended up to the requested counts, each kind from a
+    random stream keyed by where it starts, so earlier ids never shift; the
+    tracks in regenerate get new content under the same id. Albums and
+    playlists are matched over the whole catalog again, so new tracks join
+    them exactly as in a full run; only their track lists can change. Files
+    are rewritten only if something in them changed, and the added and
+    modified ids go to changes.json (with track_stream, the added and
+    modified tracks are also written there as NDJSON).
+    
+    Playlists are matched the way the catalog was built (its
+    seed_settings.json, else 'tags') unless playlist_match says otherwise.
+    """
+    print("Updating seed data incrementally...")
+    playlist_match = playlist_match or read_settings(out_dir).get('playlist_match', 'tags')
+    base_seed = random.Random(seed).getrandbits(64)
+    regenerate = set(regenerate)
+    paths = {kind: os.path.join(out_dir, f'{kind}{OUTPUT_FORMATS[fmt]}') for kind in SEED_ENTITIES}
+    with instrumentation.span('seed.load', fmt=fmt) as stage:
+        catalog = {}
+        for kind, path in paths.items():
+            try:
+                catalog[kind] = read_records(path)
+            except ValueError as e:
+                sys.exit(f"✗ Existing catalog file {path} is unreadable ({e}); rerun without --incremental")
+        stage.set(records=sum(len(records) for records in catalog.values()))
+    changes = {kind: {'added': [], 'modified': []} for kind in SEED_ENTITIES}
+    
+    tracks = catalog['tracks']
+    missing = regenerate - {track['id'] for track in tracks}
+    if missing:
+        print(f"⚠️  Not in the catalog, not regenerated: {', '.join(sorted(missing, key=lambda i: (len(i), i)))}")
+    for i, track in enumerate(tracks):
+        if track['id'] in regenerate:
+            tracks[i] = regenerate_track(track, random.Random(f"{base_seed}:{track['id']}"), num_artists, num_albums)
+            changes['tracks']['modified'].append(track['id'])
+    first_id = max((entity_number(t) for t in tracks), default=0) + 1
+    added = list(iter_track_range(first_id, num_tracks + 1, num_tracks,
+                                  random.Random(f"{base_seed}:tracks:{first_id}"), num_artists, num_albums))
+    tracks.extend(added)
+    changes['tracks']['added'] = [track['id'] for track in added]
+    print(f"✓ {len(added)} tracks added, {len(changes['tracks']['modified'])} regenerated, {len(tracks)} in all")
+    
+    artists = catalog['artists']
+    start = len(artists)
+    artists.extend(iter_artists(num_artists, random.Random(f"{base_seed}:artists:{start}"), start))
+    changes['artists']['added'] = [artist['id'] for artist in artists[start:]]
+    
+    # Existing playlists keep the mood tags they were matched on
+    specs = [dict(playlist['moodTags']) for playlist in catalog['playlists']]
+    specs += draw_playlist_specs(max(0, num_playlists - len(specs)),
+                                 random.Random(f"{base_seed}:playlists:{len(specs)}"))
+    total_albums = max(num_albums, len(catalog['albums']))
+    index_file = os.path.join(out_dir, 'track_features.npy') if playlist_match == 'similarity' else None
+    collector = TrackCollector(len(tracks), total_albums, specs, playlist_match, index_file)
+    with instrumentation.span('seed.match', records=len(tracks)):
+        for _ in collector.observe(tracks):
+            pass
+        collector.close()
+    
+    for kind, tracks_for in (('albums', collector.tracks_for_album), ('playlists', collector.tracks_for_playlist)):
+        records = catalog[kind]
+        for i, record in enumerate(records):
+            track_list = tracks_for(i)
+            if track_list != record['tracks']:
+                records[i] = dict(record, tracks=track_list, totalDuration=sum(t['duration'] for t in track_list))
+                changes[kind]['modified'].append(record['id'])
+        start = len(records)
+        if kind == 'albums':
+            records.extend(iter_albums(total_albums, num_artists, collector,
+                                       random.Random(f"{base_seed}:albums:{start}"), start))
+        else:
+            records.extend(iter_playlists(collector, random.Random(f"{base_seed}:playlists:{start}"), start))
+        changes[kind]['added'] = [record['id'] for record in records[start:]]
+    
+    sink = SqliteSink(sqlite_path) if sqlite_path else None
+    for kind, records in catalog.items():
+        if changes[kind]['added'] or changes[kind]['modified']:
+            with instrumentation.span(f'seed.{kind}', fmt=fmt) as stage:
+                stage.set(records=write_records(paths[kind], sink.tee(kind, records) if sink else records, fmt))
+        elif sink:
+            for _ in sink.tee(kind, records):
+                pass
+        print(f"✓ {kind}: {len(changes[kind]['added'])} added, {len(changes[kind]['modified'])} modified")
+    if track_stream:
+        delta = set(changes['tracks']['added']) | set(changes['tracks']['modified'])
+        for _ in stream_records((track for track in tracks if track['id'] in delta), track_stream):
+            pass
+    if sink:
+        sink.close()
+        print(f"✓ Loaded catalog into {sqlite_path}")
+    
+    changes_path = os.path.join(out_dir, CHANGES_FILE)
+    with open(changes_path + '.tmp', 'w') as f:
+        json.dump({'version': CHANGES_VERSION, **changes}, f, indent=2)
+    os.replace(changes_path + '.tmp', changes_path)
+    write_settings(out_dir, playlist_match=playlist_match)
+    print(f"\n✅ Seed data updated; changes in {changes_path}")
+    return changes
+
+def parse_track_ids(value: str) -> set:
+    """Parse '1,2,track-3' into {'track-1', 'track-2', 'track-3'}"""
+    return {part if part.startswith('track-') else f'track-{int(part)}'
+            for part in (p.strip() for p in value.split(',')) if part}
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Generate seed data for EmPulse Music')
+    parser.add_argument('--tracks', type=int, default=150, help='Number of tracks (default: 150)')
+    parser.add_argument('--artists', type=int, default=50, help='Number of artists (default: 50)')
+    parser.add_argument('--albums', type=int, default=30, help='Number of albums (default: 30)')
+    parser.add_argument('--playlists', type=int, default=50, help='Number of playlists (default: 50)')
+    parser.add_argument('--seed', type=int, default=None, help='Random seed for reproducible output')
+    parser.add_argument('--format', dest='fmt', choices=sorted(OUTPUT_FORMATS) + [COLUMNAR_FORMAT], default='json',
+                        help='json (pretty, default), compact (minified JSON), ndjson (one record per line) '
+                        'or columnar (binary catalog/ directory, see compact_catalog.py)')
+    parser.add_argument('--out-dir', default='data/mock', help='Output directory (default: data/mock)')
+    parser.add_argument('--workers', type=int, default=1,
+                        help='Worker processes for track generation; output is identical for any value')
+    parser.add_argument('--shard-size', type=int, default=DEFAULT_SHARD_SIZE,
+                        help=f'Tracks per shard (default: {DEFAULT_SHARD_SIZE}); changing it changes the output')
+    parser.add_argument('--playlist-match', choices=['tags', 'similarity'], default=None,
+                        help='tags (default; with --incremental, whatever the catalog was built with): the first '
+                        "tracks sharing its mood, a feeling or a genre; similarity: each playlist's nearest "
+                        'tracks to its moodTags, ranked, with the feature index saved as track_features.npy '
+                        '(needs NumPy, see track_similarity.py)')
+    parser.add_argument('--engine', choices=['python', 'numpy'], default='python',
+                        help='Track generator: python (random module, default) or numpy (vectorized batches, '
+                        'same distributions, different output; see vectorized_tracks.py)')
+    parser.add_argument('--sqlite', metavar='DB', help='Also bulk-load the catalog into this SQLite database '
+                        '(seed_* tables, e.g. data/music.db)')
+    parser.add_argument('--stream-tracks', action='store_true',
+                        help='Also write tracks to stdout as NDJSON while generating (progress goes to stderr), '
+                        'e.g. | generate_mood_matched_audio.py --tracks-file -')
+    parser.add_argument('--incremental', action='store_true',
+                        help='Keep the catalog already in --out-dir and only add up to the requested counts '
+                        f'(ids stay stable), writing the added and modified ids to {CHANGES_FILE}')
+    parser.add_argument('--regenerate', type=parse_track_ids, default=set(), metavar='TRACK_IDS',
+                        help='With --incremental: give these tracks (e.g. 1,2,track-3) new content under the same id')
+    instrumentation.add_arguments(parser)
+    parser.add_argument('--export-from', metavar='DB', help='Skip generation and export the seed_* tables '
+                        'of DB to --out-dir, plus a tracks.csv')
+    args = parser.parse_args()
+    if min(args.tracks, args.artists, args.albums) < 1:
+        parser.error('--tracks, --artists and --albums must be at least 1')
+    if args.playlists < 0:
+        parser.error('--playlists cannot be negative')
+    if args.export_from and args.fmt == COLUMNAR_FORMAT:
+        parser.error('--export-from writes JSON formats; convert columnar catalogs with compact_catalog.py')
+    if args.workers < 1 or args.shard_size < 1:
+        parser.error('--workers and --shard-size must be at least 1')
+    if args.stream_tracks and args.export_from:
+        parser.error('--stream-tracks only applies when generating')
+    if args.incremental and (args.export_from or args.fmt == COLUMNAR_FORMAT):
+        parser.error('--incremental updates JSON or NDJSON catalogs generated earlier')
+    if args.regenerate and not args.incremental:
+        parser.error('--regenerate needs --incremental')
+    if args.incremental and (args.engine != 'python' or args.workers != 1):
+        parser.error('--engine and --workers apply to full runs; --incremental adds tracks with the python '
+                     'engine in one process')
+    return args
+
 if __name__ == '__main__':
-    generate_seed_data()
+    args = parse_args()
+    instrumentation.configure(args.metrics)
+    # With --stream-tracks stdout carries the track records, so everything
+    # else printed goes to stderr
+    track_stream = sys.stdout if args.stream_tracks else None
+    with contextlib.redirect_stdout(sys.stderr if track_stream else sys.stdout), \
+            instrumentation.profiled(args.profile, 'generate_seed_data'), \
+            instrumentation.span('seed', tracks=args.tracks, playlists=args.playlists, fmt=args.fmt,
+                                 workers=args.workers, engine=args.engine):
+        if args.export_from:
+            export_catalog(args.export_from, args.out_dir, args.fmt)
+        elif args.incremental:
+            update_seed_data(args.tracks, args.artists, args.albums, args.playlists, args.seed, args.out_dir,
+                             args.fmt, args.regenerate, args.sqlite, track_stream, args.playlist_match)
+        else:
+            generate_seed_data(args.tracks, args.artists, args.albums, args.playlists,
+                               args.seed, args.out_dir, args.fmt, args.workers, args.shard_size, args.sqlite,
+                               args.engine, track_stream, args.playlist_match or 'tags')
@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+"""
+Timing spans, metrics and profiling for the pipeline scripts
+Scripts wrap their stages in span() and report one-off measurements with
+event(); nothing is recorded unless a metrics file is configured, either with
+a script's --metrics FILE flag or the PIPELINE_METRICS environment variable.
+Records are JSON lines, one per span or event:
+
+    {"type": "span", "name": "seed.tracks", "seconds": 1.92, "cpu_seconds": 1.9, "records": 150, ...}
+    {"type": "event", "name": "ffmpeg", "seconds": 0.41, "track_id": 12, "ok": true, ...}
+
+--profile runs the script under cProfile and tracemalloc and prints where
+time and memory went, keeping the raw profile in data/profiles/.
+"""
+
+import atexit
+import cProfile
+import json
+import os
+import pstats
+import sys
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterable, Optional
+
+PROFILE_DIR = Path(__file__).parent.parent / 'data' / 'profiles'
+PROFILE_TOP = 15
+
+_sink = None
+_lock = threading.Lock()
+_local = threading.local()
+
+def configure(metrics_file: Optional[str] = None):
+    """Start appending metrics to metrics_file (default: $PIPELINE_METRICS, if set)"""
+    global _sink
+    path = metrics_file or os.environ.get('PIPELINE_METRICS')
+    if not path or _sink:
+        return
+    Path(path).parent.mkdir(parents=True, exist_ok=True)
+    _sink = open(path, 'a', buffering=1)
+    atexit.register(_sink.close)
+
+def enabled() -> bool:
+    return _sink is not None
+
+def _write(record: dict):
+    record.update({'ts': round(time.time(), 6), 'pid': os.getpid(), 'script': Path(sys.argv[0]).stem})
+    line = json.dumps(record, default=str)
+    with _lock:
+        _sink.write(line + '\n')
+
+def event(name: str, **fields):
+    """Record a single measurement"""
+    if _sink:
+        _write({'type': 'event', 'name': name, **fields})
+
+class Span:
+    """Wall-clock and process CPU time of a block; extra fields can be added with set()"""
+
+    def __init__(self, name: str, fields: dict):
+        self.name = name
+        self.fields = fields
+
+    def set(self, **fields):
+        self.fields.update(fields)
+
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.started
+
+    def __enter__(self):
+        stack = getattr(_local, 'stack', None)
+        if stack is None:
+            stack = _local.stack = []
+        self.parent = stack[-1].name if stack else None
+        stack.append(self)
+        self.started = time.perf_counter()
+        self.cpu_started = time.process_time()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        seconds = self.elapsed()
+        _local.stack.pop()
+        if _sink:
+            _write({'type': 'span', 'name': self.name, 'parent': self.parent, 'seconds': round(seconds, 6),
+                    'cpu_seconds': round(time.process_time() - self.cpu_started, 6),
+                    'ok': exc_type is None, **self.fields})
+        return False
+
+def span(name: str, **fields) -> Span:
+    """Time a stage: `with span('seed.tracks') as s: ...; s.set(records=n)`"""
+    return Span(name, fields)
+
+class TimedIterator:
+    """Passes items through while adding up the time spent producing them
+
+    Wrapped around the records a writer consumes, it splits a streaming stage
+    into time spent generating records (seconds) and the rest (writing).
+    """
+
+    def __init__(self, iterable: Iterable):
+        self.iterator = iter(iterable)
+        self.seconds = 0.0
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        started = time.perf_counter()
+        try:
+            return next(self.iterator)
+        finally:
+            self.seconds += time.perf_counter() - started
+
+def add_arguments(parser):
+    """Add the --metrics and --profile flags to a script's argument parser"""
+    parser.add_argument('--metrics', metavar='FILE',
+                        help='Append JSON-lines timing metrics to FILE (or set PIPELINE_METRICS)')
+    parser.add_argument('--profile', action='store_true',
+                        help=f'Run under cProfile and tracemalloc; raw stats go to data/{PROFILE_DIR.name}/')
+
+@contextmanager
+def profiled(active: bool, name: str):
+    """Run the block under cProfile and tracemalloc if active, then report both"""
+    if not active:
+        yield
+        return
+    profiler = cProfile.Profile()
+    tracemalloc.start()
+    profiler.enable()
+    try:
+        yield
+    finally:
+        profiler.disable()
+        snapshot = tracemalloc.take_snapshot()
+        current, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        PROFILE_DIR.mkdir(parents=True, exist_ok=True)
+        stats_file = PROFILE_DIR / f'{name}.prof'
+        profiler.dump_stats(stats_file)
+        print(f"\n🔬 Profile ({stats_file}): top {PROFILE_TOP} by cumulative time")
+        pstats.Stats(profiler, stream=sys.stdout).sort_stats('cumulative').print_stats(PROFILE_TOP)
+        print(f"🧠 Python allocations: peak {peak / 1e6:.1f} MB, {current / 1e6:.1f} MB still held; top sites:")
+        for stat in snapshot.statistics('lineno')[:10]:
+            print(f"  {stat}")
+        event('profile', stats_file=str(stats_file), peak_traced_bytes=peak, current_traced_bytes=current)
@@ -0,0 +1,205 @@
+#!/usr/bin/env python3
+"""
+In-process NumPy synthesis backend for mood-matched audio
+Renders the render plans built by generate_mood_matched_audio.py (tone stack,
+afade envelopes, amix, volume and shelf/pass filters) as vectorized arrays,
+so no ffmpeg process has to be started just to run a filter graph.
+
+Run directly to check numerical equivalence against the ffmpeg reference
+(test_mood_synth.py checks the same per mood under pytest):
+    python3 scripts/mood_synth.py --limit 50
+"""
+
+import argparse
+import json
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+import numpy as np
+
+SAMPLE_RATE = 44100
+# lavfi's sine source generates at 1/8 of full scale
+SINE_AMPLITUDE = 1.0 / 8.0
+# Extra samples appended before filtering so the FFT-based filtering does not
+# wrap the filters' decaying tails back onto the start of the clip
+FILTER_TAIL = SAMPLE_RATE // 10
+
+# ffmpeg's defaults for the biquad filters used by the render plans:
+# (center/cutoff frequency, Q)
+BIQUAD_DEFAULTS = {
+    'bass': (100.0, 0.5),
+    'treble': (3000.0, 0.5),
+    'highpass': (None, 0.707),
+    'lowpass': (None, 0.707),
+}
+
+def fade_envelope(fade, num_samples, sample_rate=SAMPLE_RATE):
+    """Gain curve of one linear ('tri') afade over num_samples samples"""
+    kind, start, length = fade
+    fade_samples = max(1, int(round(length * sample_rate)))
+    idx = np.arange(num_samples, dtype=np.float64)
+    if kind == 'in':
+        # afade's ss option is a sample index
+        first = int(round(start))
+        return np.clip((idx - first) / fade_samples, 0.0, 1.0)
+    first = int(round(start * sample_rate))
+    return np.clip(1.0 - (idx - first) / fade_samples, 0.0, 1.0)
+
+def render_voice(voice, num_samples, sample_rate=SAMPLE_RATE):
+    """One sine voice with its fades applied"""
+    t = np.arange(num_samples, dtype=np.float64) / sample_rate
+    samples = SINE_AMPLITUDE * np.sin(2 * np.pi * voice['freq'] * t)
+    for fade in voice['fades']:
+        samples *= fade_envelope(fade, num_samples, sample_rate)
+    return samples
+
+def biquad_coefficients(name, value, sample_rate=SAMPLE_RATE):
+    """RBJ cookbook (b, a) coefficients matching ffmpeg's bass/treble/highpass/lowpass"""
+    default_freq, q = BIQUAD_DEFAULTS[name]
+    if name in ('bass', 'treble'):
+        freq, gain = default_freq, float(value)
+    else:
+        freq, gain = float(value), 0.0
+
+    w0 = 2 * np.pi * freq / sample_rate
+    cos_w0 = np.cos(w0)
+    alpha = np.sin(w0) / (2 * q)
+    A = 10 ** (gain / 40)
+
+    if name == 'bass':
+        b = [A * ((A + 1) - (A - 1) * cos_w0 + 2 * np.sqrt(A) * alpha),
+             2 * A * ((A - 1) - (A + 1) * cos_w0),
+             A * ((A + 1) - (A - 1) * cos_w0 - 2 * np.sqrt(A) * alpha)]
+        a = [(A + 1) + (A - 1) * cos_w0 + 2 * np.sqrt(A) * alpha,
+             -2 * ((A - 1) + (A + 1) * cos_w0),
+             (A + 1) + (A - 1) * cos_w0 - 2 * np.sqrt(A) * alpha]
+    elif name == 'treble':
+        b = [A * ((A + 1) + (A - 1) * cos_w0 + 2 * np.sqrt(A) * alpha),
+             -2 * A * ((A - 1) + (A + 1) * cos_w0),
+             A * ((A + 1) + (A - 1) * cos_w0 - 2 * np.sqrt(A) * alpha)]
+        a = [(A + 1) - (A - 1) * cos_w0 + 2 * np.sqrt(A) * alpha,
+             2 * ((A - 1) - (A + 1) * cos_w0),
+             (A + 1) - (A - 1) * cos_w0 - 2 * np.sqrt(A) * alpha]
+    elif name == 'highpass':
+        b = [(1 + cos_w0) / 2, -(1 + cos_w0), (1 + cos_w0) / 2]
+        a = [1 + alpha, -2 * cos_w0, 1 - alpha]
+    else:  # lowpass
+        b = [(1 - cos_w0) / 2, 1 - cos_w0, (1 - cos_w0) / 2]
+        a = [1 + alpha, -2 * cos_w0, 1 - alpha]
+    return np.array(b) / a[0], np.array(a) / a[0]
+
+def apply_filters(samples, filters, sample_rate=SAMPLE_RATE):
+    """Apply a plan's post-mix filter chain
+
+    The biquads are linear and time-invariant, so the whole cascade is applied
+    as one multiplication by its combined frequency response instead of a
+    per-sample recursion in Python.
+    """
+    gain = 1.0
+    biquads = []
+    for name, value in filters:
+        if name == 'volume':
+            gain *= value
+        else:
+            biquads.append(biquad_coefficients(name, value, sample_rate))
+
+    if not biquads:
+        return samples * gain
+
+    num_samples = len(samples)
+    n_fft = 1 << (num_samples + FILTER_TAIL - 1).bit_length()
+    spectrum = np.fft.rfft(samples * gain, n_fft)
+    z_inv = np.exp(-2j * np.pi * np.arange(len(spectrum)) / n_fft)
+    for b, a in biquads:
+        spectrum *= (b[0] + b[1] * z_inv + b[2] * z_inv ** 2) / (a[0] + a[1] * z_inv + a[2] * z_inv ** 2)
+    return np.fft.irfft(spectrum, n_fft)[:num_samples]
+
+def render_plan(plan, sample_rate=SAMPLE_RATE):
+    """Render a plan to mono float32 samples at sample_rate"""
+    num_samples = int(round(plan['duration'] * sample_rate))
+    # amix divides by the number of inputs, and every voice lasts the full clip
+    mix = sum(render_voice(v, num_samples, sample_rate) for v in plan['voices']) / len(plan['voices'])
+    return apply_filters(mix, plan['filters'], sample_rate).astype(np.float32)
+
+def encode(samples, output_file, encoder_args, sample_rate=SAMPLE_RATE):
+    """Pipe rendered samples through an ffmpeg encoder, returning True on success"""
+    return encode_outputs([samples], encoder_args + [str(output_file)], Path(output_file).name, sample_rate)
+
+def encode_outputs(sample_arrays, output_args, description, sample_rate=SAMPLE_RATE):
+    """Run one ffmpeg with render k as input k and the given output argv, returning True on success
+
+    A single render is piped through stdin; several are staged as raw PCM
+    files. output_args can map, filter and split the inputs freely (e.g. one
+    render to several encodings).
+    """
+    input_args = ['-f', 'f32le', '-ar', str(sample_rate), '-ac', '1', '-i']
+    with tempfile.TemporaryDirectory(prefix='mood-synth-') as tmp:
+        cmd = ['ffmpeg', '-y']
+        stdin = None
+        if len(sample_arrays) == 1:
+            cmd += input_args + ['pipe:0']
+            stdin = sample_arrays[0].astype('<f4').tobytes()
+        else:
+            for k, samples in enumerate(sample_arrays):
+                raw = Path(tmp) / f'{k}.f32'
+                raw.write_bytes(samples.astype('<f4').tobytes())
+                cmd += input_args + [str(raw)]
+        try:
+            subprocess.run(cmd + output_args, input=stdin, check=True, capture_output=True)
+            return True
+        except subprocess.CalledProcessError as e:
+            print(f"Error encoding {description}: {e}")
+            return False
+
+def render_reference(inputs, filter_graph, sample_rate=SAMPLE_RATE):
+    """Render lavfi inputs + filter graph with ffmpeg to mono float32 samples"""
+    cmd = (['ffmpeg', '-v', 'error'] + inputs + ['-filter_complex', filter_graph] +
+           ['-f', 'f32le', '-ar', str(sample_rate), '-ac', '1', 'pipe:1'])
+    result = subprocess.run(cmd, check=True, capture_output=True)
+    return np.frombuffer(result.stdout, dtype='<f4')
+
+def compare(reference, candidate):
+    """(max_abs_error, snr_db) of candidate against reference"""
+    n = min(len(reference), len(candidate))
+    error = candidate[:n].astype(np.float64) - reference[:n]
+    signal_power = np.mean(reference[:n].astype(np.float64) ** 2)
+    noise_power = np.mean(error ** 2)
+    snr = float('inf') if noise_power == 0 else 10 * np.log10(signal_power / noise_power)
+    return float(np.max(np.abs(error))) if n else 0.0, snr
+
+def main():
+    import generate_mood_matched_audio as gen
+
+    parser = argparse.ArgumentParser(description='Compare the NumPy synthesis backend against ffmpeg')
+    parser.add_argument('--tracks-file', type=Path, default=gen.TRACKS_FILE)
+    parser.add_argument('--limit', type=int, default=None, help='Only compare the first N tracks')
+    parser.add_argument('--min-snr', type=float, default=40.0,
+                        help='Minimum signal-to-error ratio in dB for a track to count as equivalent')
+    args = parser.parse_args()
+
+    with open(args.tracks_file, 'r') as f:
+        tracks = json.load(f)[:args.limit]
+
+    print(f"🔬 Comparing NumPy and ffmpeg renders for {len(tracks)} tracks...")
+    mismatched = 0
+    for track in tracks:
+        tags = track['moodTags']
+        config, duration_sec = gen.resolve_render_config(
+            tags['mood'], tags.get('feelings', []), tags.get('vibe', 50), track['duration'])
+        plan = gen.build_render_plan(tags['mood'], config, duration_sec)
+        reference = render_reference(gen.plan_to_ffmpeg_inputs(plan), gen.plan_to_filter_graph(plan))
+        max_error, snr = compare(reference, render_plan(plan))
+        ok = snr >= args.min_snr and abs(len(reference) - round(duration_sec * SAMPLE_RATE)) <= 1
+        if not ok:
+            mismatched += 1
+        print(f"{'✓' if ok else '✗'} {track['id']} [{tags['mood']}] max error {max_error:.2e}, SNR {snr:.1f} dB")
+
+    if mismatched:
+        print(f"\n⚠️  {mismatched}/{len(tracks)} tracks below {args.min_snr} dB")
+        sys.exit(1)
+    print(f"\n✅ All {len(tracks)} tracks equivalent (>= {args.min_snr} dB)")
+
+if __name__ == '__main__':
+    main()
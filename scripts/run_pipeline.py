@@ -0,0 +1,355 @@
+#!/usr/bin/env python3
+"""
+Run the Python data pipeline as one dependency graph
+Stages are the existing scripts, run as subprocesses from the repo root:
+
+    seed ──► audio ──► validate
+      │        │  ┌──►
+      │        └──┼──► waveforms
+      └───────────┼──►
+    download ─────┘    (only with --download-urls)
+
+A stage is skipped when it is up to date: its outputs exist, its command is
+the one it last ran with, and its inputs (scripts, data files, audio
+directories) are unchanged since then. Stages whose dependencies are done
+run concurrently, sharing one worker budget: each gets a share of the free
+workers (capped at what it can use) as its -j/--workers. A per-stage timing
+summary is printed at the end.
+
+Usage:
+    python3 scripts/run_pipeline.py                       # everything that is out of date
+    python3 scripts/run_pipeline.py waveforms --jobs 4    # a stage and what it depends on
+    python3 scripts/run_pipeline.py --tracks 1000 --download-urls urls.txt --dry-run
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from pathlib import Path
+from typing import Dict, List, Optional
+from urllib.parse import urlsplit
+
+import generate_mood_matched_audio as gen
+import instrumentation
+
+ROOT = Path(__file__).parent.parent
+SCRIPTS = Path(__file__).parent
+STATE_FILE = ROOT / 'data' / 'pipeline_state.json'
+STATE_VERSION = 1
+TRACKS_FILE = 'data/mock/tracks.json'
+# The scraper catalog, whose waveform_url the waveforms stage fills in
+CATALOG_FILE = 'data/tracks.json'
+CATALOG_DB = 'data/music.db'
+SEED_FILES = [f'data/mock/{kind}.json' for kind in ('tracks', 'artists', 'albums', 'playlists')]
+# Audio only depends on the track fields it renders from; waveforms writes
+# waveformUrl into the same file, which must not make audio rerun
+TRACK_RENDER_FIELDS = f'{TRACKS_FILE}#render'
+# Audio is fingerprinted by name, size and mtime only; hashing every MP3 on
+# each run would cost more than most stages
+AUDIO_GLOBS = ['public/audio/*.mp3', 'public/audio/*.wav', 'public/audio/*.flac']
+print_lock = threading.Lock()
+
+class Stage:
+    """One pipeline step: a script invocation with its dependencies, inputs and outputs
+
+    cmd is a function of the worker count the stage is granted (at most
+    max_workers). Inputs are repo-relative files, hashed by content, glob
+    patterns, fingerprinted by file metadata, or TRACK_RENDER_FIELDS.
+    """
+
+    def __init__(self, name: str, cmd, deps: List[str] = (), inputs: List[str] = (), outputs: List[str] = (),
+                 max_workers: int = 1, enabled: bool = True):
+        self.name = name
+        self.cmd = cmd
+        self.deps = list(deps)
+        self.inputs = list(inputs)
+        self.outputs = list(outputs)
+        self.max_workers = max_workers
+        self.enabled = enabled
+
+def script(name: str, *args) -> List[str]:
+    return [sys.executable, str(SCRIPTS / name), *map(str, args)]
+
+def seed_catalog_readable() -> bool:
+    """True if every seed file exists and parses, so seed can extend the catalog incrementally"""
+    try:
+        for name in SEED_FILES:
+            with open(ROOT / name, 'r') as f:
+                json.load(f)
+    except (OSError, ValueError):
+        return False
+    return True
+
+def build_stages(args) -> Dict[str, Stage]:
+    """The pipeline's stages, in an order that respects their dependencies"""
+    cpus = os.cpu_count() or 1
+    # A missing or unreadable catalog (e.g. one with conflict markers) is
+    # generated from scratch instead
+    seed_args = ['--incremental'] if seed_catalog_readable() else []
+    seed_args += ['--tracks', args.tracks] if args.tracks else []
+    audio_args = ['--renditions', args.renditions] if args.renditions else []
+    # Stages run from the repo root, so the URL list is located once, here
+    download_urls = args.download_urls.resolve() if args.download_urls else None
+    urls = []
+    if download_urls and download_urls.exists():
+        urls = [line.strip() for line in download_urls.read_text().splitlines() if line.strip()]
+    stages = [
+        # Incremental where it can be, so existing ids and content are kept and only additions are generated
+        Stage('seed', lambda workers: script('generate_seed_data.py', *seed_args),
+              inputs=['scripts/generate_seed_data.py', 'scripts/seed_vocabulary.py', 'scripts/track_similarity.py',
+                      'scripts/vectorized_tracks.py', 'scripts/compact_catalog.py'],
+              outputs=SEED_FILES),
+        Stage('audio', lambda workers: script('generate_mood_matched_audio.py', *audio_args, '--jobs', workers),
+              deps=['seed'],
+              inputs=[TRACK_RENDER_FIELDS, 'scripts/generate_mood_matched_audio.py', 'scripts/mood_synth.py'],
+              outputs=['data/audio_render_manifest.json'], max_workers=cpus),
+        Stage('download', lambda workers: script('download_pixabay_music.py', '--urls', download_urls,
+                                                 '--out-dir', 'public/audio', '--workers', workers),
+              inputs=[str(download_urls or ''), 'scripts/download_pixabay_music.py'],
+              outputs=[f'public/audio/{Path(urlsplit(url).path).name}' for url in urls],
+              max_workers=8, enabled=bool(download_urls)),
+        Stage('validate', lambda workers: script('audio_probe.py', '--jobs', workers),
+              deps=['audio', 'download'],
+              inputs=AUDIO_GLOBS + ['scripts/audio_probe.py'],
+              outputs=['data/audio_validation_manifest.json'], max_workers=cpus),
+        # It fills in waveformUrl, so it also waits for seed to finish writing tracks.json
+        Stage('waveforms', lambda workers: script('audio_waveforms.py', '--jobs', workers),
+              deps=['seed', 'audio', 'download'],
+              inputs=AUDIO_GLOBS + [TRACKS_FILE, CATALOG_FILE, CATALOG_DB, 'scripts/audio_waveforms.py'],
+              max_workers=cpus),
+    ]
+    return {stage.name: stage for stage in stages}
+
+def select_stages(stages: Dict[str, Stage], targets: List[str]) -> List[Stage]:
+    """The targets and everything they depend on, in pipeline order"""
+    wanted = set()
+    todo = list(targets or stages)
+    while todo:
+        name = todo.pop()
+        if name not in wanted:
+            wanted.add(name)
+            todo.extend(stages[name].deps)
+    return [stage for name, stage in stages.items() if name in wanted]
+
+def file_digest(path: Path, previous: Optional[list]) -> Optional[list]:
+    """[size, mtime_ns, sha256] of a file, reusing the previous hash if size and mtime match"""
+    try:
+        st = path.stat()
+    except FileNotFoundError:
+        return None
+    if previous and previous[:2] == [st.st_size, st.st_mtime_ns]:
+        return previous
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        while chunk := f.read(1 << 20):
+            digest.update(chunk)
+    return [st.st_size, st.st_mtime_ns, digest.hexdigest()]
+
+def render_fields_digest(path: Path, previous: Optional[list]) -> Optional[list]:
+    """[size, mtime_ns, sha256] of what the audio stage renders from each track in a tracks file"""
+    try:
+        st = path.stat()
+    except FileNotFoundError:
+        return None
+    if previous and previous[:2] == [st.st_size, st.st_mtime_ns]:
+        return previous
+    digest = hashlib.sha256()
+    try:
+        with gen.open_tracks(path) as f:
+            for track in gen.iter_track_records(f):
+                digest.update(json.dumps(gen.track_render_params(track)).encode('utf-8'))
+    except (json.JSONDecodeError, KeyError, IndexError, TypeError):
+        # Not a catalog audio can render from; any edit to it counts as a change
+        return file_digest(path, None)
+    return [st.st_size, st.st_mtime_ns, digest.hexdigest()]
+
+def glob_digest(pattern: str) -> str:
+    """Hash of the names, sizes and mtimes of the files matching a repo-relative glob"""
+    digest = hashlib.sha256()
+    for path in sorted(ROOT.glob(pattern)):
+        st = path.stat()
+        digest.update(f'{path.name}\0{st.st_size}\0{st.st_mtime_ns}\n'.encode('utf-8'))
+    return digest.hexdigest()
+
+def input_digest(name: str, previous):
+    if '*' in name:
+        return glob_digest(name)
+    if name == TRACK_RENDER_FIELDS:
+        return render_fields_digest(ROOT / TRACKS_FILE, previous)
+    return file_digest(ROOT / name, previous)
+
+def fingerprint(stage: Stage, previous: Dict) -> Dict:
+    """Current fingerprint of every input of a stage"""
+    return {name: input_digest(name, previous.get(name)) for name in stage.inputs if name}
+
+def content_key(inputs: Dict) -> Dict:
+    """A fingerprint without file metadata, so a rewritten file with the same content still matches"""
+    return {name: digest[2] if isinstance(digest, list) else digest for name, digest in inputs.items()}
+
+def argv_key(stage: Stage) -> List[str]:
+    """The stage's command, minus the interpreter and worker count, which don't change its results
+
+    So is seed's --incremental: extending the catalog a full run just wrote
+    changes nothing.
+    """
+    argv = [Path(arg).name if i == 1 else arg for i, arg in enumerate(stage.cmd('{workers}'))][1:]
+    return [arg for arg in argv if arg != '--incremental']
+
+def is_up_to_date(stage: Stage, state: Dict) -> bool:
+    entry = state.get(stage.name)
+    if not entry or entry.get('argv') != argv_key(stage):
+        return False
+    if not all((ROOT / output).exists() for output in stage.outputs):
+        return False
+    inputs = fingerprint(stage, entry.get('inputs', {}))
+    if content_key(inputs) != content_key(entry.get('inputs', {})):
+        return False
+    # Keep the new metadata so an unchanged rewrite isn't hashed again next run
+    entry['inputs'] = inputs
+    return True
+
+def load_state(path: Path = STATE_FILE) -> Dict:
+    try:
+        with open(path, 'r') as f:
+            state = json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+    return state.get('stages', {}) if state.get('version') == STATE_VERSION else {}
+
+def save_state(stages: Dict, path: Path = STATE_FILE):
+    """Atomically write what each stage last ran with"""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix(path.suffix + '.tmp')
+    with open(tmp_path, 'w') as f:
+        json.dump({'version': STATE_VERSION, 'stages': stages}, f, indent=2, sort_keys=True)
+    os.replace(tmp_path, path)
+
+def run_stage(stage: Stage, workers: int) -> int:
+    """Run a stage's script from the repo root, prefixing its output with the stage name"""
+    env = dict(os.environ, PYTHONUNBUFFERED='1')
+    with instrumentation.span(f'pipeline.{stage.name}', workers=workers) as span:
+        process = subprocess.Popen(stage.cmd(workers), cwd=ROOT, env=env, stdout=subprocess.PIPE,
+                                   stderr=subprocess.STDOUT, text=True)
+        for line in process.stdout:
+            with print_lock:
+                print(f"[{stage.name}] {line}", end='')
+        returncode = process.wait()
+        span.set(returncode=returncode)
+    return returncode
+
+def run_pipeline(selected: List[Stage], budget: int, force: bool = False, dry_run: bool = False) -> Dict:
+    """Run every stage whose dependencies are done, sharing budget workers, returning {name: result}
+
+    A result is {'status', 'seconds', 'workers'}, status being 'ran',
+    'current' (up to date), 'disabled', 'failed', 'blocked' (a dependency
+    failed) or, for a dry run, 'would run'.
+    """
+    state = load_state()
+    results = {}
+    pending = list(selected)
+    running = {}
+    free = budget
+    names = {stage.name for stage in selected}
+    with ThreadPoolExecutor(max_workers=max(1, len(selected))) as executor:
+        while pending or running:
+            ready = [s for s in pending if all(d in results or d not in names for d in s.deps)]
+            launch = []
+            for stage in ready:
+                pending.remove(stage)
+                dep_statuses = {results.get(d, {}).get('status') for d in stage.deps}
+                if not stage.enabled:
+                    results[stage.name] = {'status': 'disabled', 'seconds': 0.0, 'workers': 0}
+                elif dep_statuses & {'failed', 'blocked'}:
+                    results[stage.name] = {'status': 'blocked', 'seconds': 0.0, 'workers': 0}
+                elif dry_run and 'would run' in dep_statuses:
+                    # Its inputs would change once its dependencies ran
+                    results[stage.name] = {'status': 'would run', 'seconds': 0.0, 'workers': 0}
+                elif not force and is_up_to_date(stage, state):
+                    results[stage.name] = {'status': 'current', 'seconds': 0.0, 'workers': 0}
+                    if not dry_run:
+                        save_state(state)
+                elif dry_run:
+                    results[stage.name] = {'status': 'would run', 'seconds': 0.0, 'workers': 0}
+                else:
+                    launch.append(stage)
+            if ready and not launch:
+                continue
+            # Stages that can start split the free workers between them
+            while launch and free:
+                stage = launch.pop(0)
+                pending_starts = len(launch) + 1
+                workers = max(1, min(stage.max_workers, free // pending_starts))
+                free -= workers
+                running[executor.submit(run_stage, stage, workers)] = (stage, workers, time.perf_counter())
+            # Whatever could not start yet goes back to wait for workers
+            pending[:0] = launch
+            if not running:
+                continue
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                stage, workers, started = running.pop(future)
+                free += workers
+                ok = future.result() == 0
+                results[stage.name] = {'status': 'ran' if ok else 'failed',
+                                       'seconds': time.perf_counter() - started, 'workers': workers}
+                if ok:
+                    state[stage.name] = {'argv': argv_key(stage),
+                                         'inputs': fingerprint(stage, state.get(stage.name, {}).get('inputs', {}))}
+                else:
+                    # Whatever it left behind is not trusted on the next run
+                    state.pop(stage.name, None)
+                save_state(state)
+    return results
+
+def print_summary(selected: List[Stage], results: Dict, budget: int, elapsed: float):
+    print(f"\n⏱️  Stage timings ({budget} worker budget):")
+    for stage in selected:
+        result = results[stage.name]
+        workers = f"{result['workers']} worker{'s' if result['workers'] != 1 else ''}" if result['workers'] else ''
+        print(f"  {stage.name:<10} {result['status']:<9} {result['seconds']:8.2f}s  {workers}")
+    busy = sum(result['seconds'] for result in results.values())
+    print(f"  {'total':<10} {'':<9} {elapsed:8.2f}s  ({busy:.2f}s of stage time)")
+
+def main():
+    parser = argparse.ArgumentParser(description='Run the data pipeline stages that are out of date')
+    parser.add_argument('stages', nargs='*', metavar='STAGE',
+                        help='Stages to bring up to date, with their dependencies (default: all); '
+                        'seed, audio, download, validate, waveforms')
+    parser.add_argument('--jobs', '-j', type=int, default=os.cpu_count() or 1,
+                        help='Worker budget shared by concurrently running stages (default: CPU count)')
+    parser.add_argument('--force', action='store_true', help='Run the selected stages even if up to date')
+    parser.add_argument('--dry-run', action='store_true', help='Only show which stages would run')
+    parser.add_argument('--tracks', type=int, help='Grow the seed catalog to this many tracks')
+    parser.add_argument('--renditions', metavar='NAMES',
+                        help='Extra audio renditions to encode (see generate_mood_matched_audio.py)')
+    parser.add_argument('--download-urls', type=Path, metavar='FILE',
+                        help='Enable the download stage for the URLs in FILE (one per line)')
+    instrumentation.add_arguments(parser)
+    args = parser.parse_args()
+    stages = build_stages(args)
+    unknown = [name for name in args.stages if name not in stages]
+    if unknown:
+        parser.error(f"unknown stage(s) {', '.join(unknown)}; choose from {', '.join(stages)}")
+    if args.metrics:
+        # Stage scripts append to the same metrics file
+        os.environ['PIPELINE_METRICS'] = str(Path(args.metrics).resolve())
+    instrumentation.configure(args.metrics)
+
+    budget = max(1, args.jobs)
+    selected = select_stages(stages, args.stages)
+    print(f"🚀 Pipeline: {' → '.join(stage.name for stage in selected)} ({budget} workers)")
+    started = time.perf_counter()
+    with instrumentation.profiled(args.profile, 'run_pipeline'), instrumentation.span('pipeline', workers=budget):
+        results = run_pipeline(selected, budget, args.force, args.dry_run)
+    print_summary(selected, results, budget, time.perf_counter() - started)
+    if any(result['status'] in ('failed', 'blocked') for result in results.values()):
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()
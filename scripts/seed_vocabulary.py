@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Vocabulary the EmPulse seed data is drawn from
+Moods with their typical vibe and feelings, genres, titles, artist names and
+artwork. generate_seed_data.py, vectorized_tracks.py and track_similarity.py
+all build on these, so they live here rather than in generate_seed_data.py,
+which imports the other two.
+"""
+
+from typing import Dict
+
+# Mood configurations
+MOODS = ['Melancholic', 'Nostalgic', 'Reflective', 'Content', 'Joyful', 'Euphoric']
+NEGATIVE_FEELINGS = ['Anxious', 'Overwhelmed', 'Stressed', 'Frustrated', 'Tired', 'Lonely', 'Insecure']
+POSITIVE_FEELINGS = ['Great', 'Confident', 'Relaxed', 'Excited', 'Proud', 'Grateful', 'Optimistic']
+ALL_FEELINGS = NEGATIVE_FEELINGS + POSITIVE_FEELINGS
+GENRES = ['Pop', 'Rock', 'Electronic', 'Hip-Hop', 'Jazz', 'Classical', 'Ambient', 'R&B', 'Country', 'Indie', 'Metal', 'Punk', 'Blues', 'Folk', 'Reggae', 'Soul', 'Funk', 'Disco', 'House', 'Techno', 'Trap', 'Afrobeats', 'World', 'Latin', 'K-Pop']
+
+# Unsplash image IDs for royalty-free artwork (abstract/music themed)
+COVER_ART_IMAGES = [
+    "photo-1493225457124-a3eb161ffa5f",  # Abstract
+    "photo-1459749411175-04bf5292ceea",  # Music
+    "photo-1470229722913-7c0e2dbbafd3",  # Concert
+    "photo-1484704849700-f032a568e944",  # Vinyl
+    "photo-1511671782779-c97d3d27a1d4",  # Jazz
+    "photo-1508700115892-45ecd05ae2ad",  # World music
+    "photo-1461784180009-21121b2f2044",  # Indie
+    "photo-1514525253161-7a46d19cd819",  # Pop
+    "photo-1540747913346-19e32dc3e97e",  # Hip-hop
+    "photo-1571260899304-425eee4c7efc",  # Electronic
+    "photo-1464207687429-7505649dae38",  # Country
+    "photo-1492562080023-ab3db95bfbce",  # Portrait
+    "photo-1528607929212-2636ec44253e",  # Mental health
+    "photo-1506126613408-eca07ce68773",  # Wellness
+    "photo-1454165804606-c3d57bc86b40",  # Mindful
+    "photo-1541781774459-bb2af2f05b55",  # Calm
+    "photo-1534438327276-14e5300c3a48",  # Energy
+    "photo-1441974231531-c6227db76b6e",  # Nature
+    "photo-1488646953014-85cb44e25828",  # Travel
+    "photo-1506905925346-21bda4d32df4",  # Focus
+]
+
+ARTIST_IMAGES = [
+    "photo-1493225457124-a3eb161ffa5f",
+    "photo-1511671782779-c97d3d27a1d4",
+    "photo-1470229722913-7c0e2dbbafd3",
+    "photo-1528607929212-2636ec44253e",
+    "photo-1506126613408-eca07ce68773",
+    "photo-1492562080023-ab3db95bfbce",
+]
+
+# Track titles (inspired by royalty-free music)
+TRACK_TITLES = [
+    "Midnight Dreams", "Electric Soul", "Ocean Breeze", "Urban Nights", "Mountain View",
+    "Desert Highway", "City Lights", "Forest Path", "Starlight", "Golden Hour",
+    "Morning Dew", "Evening Glow", "Neon Signs", "Silent Streets", "Thunderstorm",
+    "Afternoon Rain", "Sunset Drive", "Winter Chill", "Spring Bloom", "Summer Heat",
+    "Autumn Leaves", "Storm Clouds", "Clear Skies", "Deep Blue", "Purple Haze",
+    "Green Fields", "Red Dawn", "Yellow Sun", "Orange Sunset", "Pink Clouds",
+    "Distant Echoes", "Close Encounters", "Inner Thoughts", "Outer Space", "Deep Dive",
+    "High Rise", "Low Tide", "Fast Lane", "Slow Motion", "Hard Rock",
+    "Soft Jazz", "Bright Pop", "Dark Ambient", "Light Folk", "Heavy Metal",
+    "Smooth R&B", "Rough Punk", "Calm Classical", "Chaos Electronic", "Order Indie",
+    "Warm Soul", "Cool Funk", "Hot Disco", "Cold Blues", "Neutral Jazz",
+    "Fire Dance", "Water Flow", "Earth Ground", "Air Lift", "Spirit Rise",
+    "Mind Bender", "Heart Opener", "Soul Keeper", "Body Mover", "Energy Shifter",
+    "Mood Swings", "Feeling Free", "Thought Clear", "Action Bold", "Reaction Swift",
+    "Creative Flow", "Analytic Mode", "Intuitive Leap", "Logical Step", "Emotional Wave",
+    "Peaceful Place", "Chaotic Zone", "Balanced State", "Unstable Ground", "Solid Rock",
+    "Liquid Dreams", "Gaseous Thoughts", "Plasma Energy", "Quantum Leap", "Classic Style",
+    "Modern Beat", "Retro Vibe", "Future Sound", "Past Memory", "Present Moment",
+    "Timeless Tune", "Seasonal Shift", "Circadian Rhythm", "Lunar Cycle", "Solar Power",
+    "Wind Chimes", "Rain Drops", "Snow Flakes", "Ice Crystals", "Steam Rising",
+    "Flame Burning", "Smoke Clearing", "Mist Lifting", "Fog Rolling", "Haze Settling",
+    "Breeze Blowing", "Gust Striking", "Hurricane Force", "Tornado Twist", "Cyclone Spin",
+    "Calm Before", "Storm During", "Peace After", "Chaos Within", "Order Without",
+    "Harmony Found", "Discord Resolved", "Rhythm Locked", "Beat Dropped", "Melody Soared",
+    "Bass Thumped", "Treble Sparkled", "Mid Range", "Full Spectrum", "Pure Tone"
+]
+
+ARTIST_NAMES = [
+    "Luna Shadows", "Echo River", "Solar Flare", "Neon Nights", "Crystal Sound",
+    "Mystic Waves", "Electric Dreams", "Cosmic Harmony", "Urban Pulse", "Wild Sky",
+    "Deep Ocean", "High Mountain", "Dark Forest", "Bright City", "Quiet Valley",
+    "Loud Canyon", "Soft Breeze", "Hard Rain", "Gentle Wind", "Strong Current",
+    "Smooth Operator", "Rough Diamond", "Pure Gold", "Silver Lining", "Bronze Age",
+    "Iron Will", "Steel Mind", "Copper Wire", "Tin Can", "Lead Weight",
+    "Mercury Rising", "Venus Fly", "Mars Walk", "Jupiter Jump", "Saturn Ring",
+    "Uranus Spin", "Neptune Dive", "Pluto Orbit", "Star Light", "Moon Beam",
+    "Sun Ray", "Comet Tail", "Meteor Shower", "Asteroid Belt", "Galaxy Far",
+    "Nebula Near", "Black Hole", "White Dwarf", "Red Giant", "Blue Supergiant"
+]
+
+def get_mood_config(mood: str) -> Dict:
+    """Get typical vibe and feelings for each mood"""
+    configs = {
+        'Melancholic': {'vibe_range': (10, 35), 'feelings': NEGATIVE_FEELINGS + ['Reflective', 'Nostalgic']},
+        'Nostalgic': {'vibe_range': (15, 40), 'feelings': ['Nostalgic', 'Reflective', 'Grateful', 'Content']},
+        'Reflective': {'vibe_range': (20, 45), 'feelings': ['Reflective', 'Relaxed', 'Content', 'Thoughtful']},
+        'Content': {'vibe_range': (45, 65), 'feelings': POSITIVE_FEELINGS[:5]},
+        'Joyful': {'vibe_range': (65, 85), 'feelings': POSITIVE_FEELINGS},
+        'Euphoric': {'vibe_range': (85, 100), 'feelings': ['Excited', 'Great', 'Proud', 'Optimistic']}
+    }
+    return configs.get(mood, configs['Content'])
+
+# Albums and playlists embed at most this many tracks
+ALBUM_TRACK_LIMIT = 12
+PLAYLIST_TRACK_LIMIT = 20
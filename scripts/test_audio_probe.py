@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+"""
+Checks for audio_probe.py's header parsers against synthetic files
+Each file is assembled byte by byte (MPEG frame headers, Xing/Info/VBRI
+frames, ID3 tags, RIFF chunks, FLAC STREAMINFO), so the expected duration,
+sample rate, channels and bitrate are known exactly without any encoder.
+
+Usage:
+    python3 -m pytest scripts/test_audio_probe.py
+"""
+
+import struct
+import sys
+
+import pytest
+
+import audio_probe
+
+MPEG_VERSION_BITS = {1: 0b11, 2: 0b10, 2.5: 0b00}
+MPEG_LAYER_BITS = {1: 0b11, 2: 0b10, 3: 0b01}
+
+def mpeg_header(version=1, layer=3, bitrate=128, sample_rate=44100, channels=2, padding=0) -> bytes:
+    """A 4-byte MPEG audio frame header (no CRC)"""
+    bitrate_index = audio_probe.MPEG_BITRATES[(min(version, 2), layer)].index(bitrate)
+    rate_index = audio_probe.MPEG_SAMPLE_RATES[version].index(sample_rate)
+    return bytes([0xff,
+                  0xe0 | MPEG_VERSION_BITS[version] << 3 | MPEG_LAYER_BITS[layer] << 1 | 1,
+                  bitrate_index << 4 | rate_index << 2 | padding << 1,
+                  (0b11 if channels == 1 else 0b00) << 6])
+
+def mp3_frames(count: int, first_frame: bytes = b'', **header) -> bytes:
+    """count frames of silence, the first one carrying first_frame after its header"""
+    head = mpeg_header(**header)
+    length = audio_probe.parse_mpeg_header(head)['frame_length']
+    frames = [head + first_frame.ljust(length - 4, b'\0')]
+    frames += [head + bytes(length - 4)] * (count - 1)
+    return b''.join(frames)
+
+def xing_frame(num_frames: int, side_info: int, tag: bytes = b'Xing') -> bytes:
+    """First-frame payload: side info, then a Xing/Info header with only the frame count"""
+    return bytes(side_info) + tag + struct.pack('>II', 1, num_frames)
+
+def vbri_frame(num_frames: int) -> bytes:
+    """First-frame payload with a VBRI header 32 bytes after the frame header"""
+    return bytes(32) + b'VBRI' + struct.pack('>HHHI', 1, 0, 0, 0) + struct.pack('>I', num_frames)
+
+def id3v2_tag(size: int) -> bytes:
+    """An ID3v2.3 tag with a size-byte body containing stray frame-sync bytes"""
+    syncsafe = bytes([size >> 21 & 0x7f, size >> 14 & 0x7f, size >> 7 & 0x7f, size & 0x7f])
+    body = (b'\xff\xfb\x90\x00' + b'APIC').ljust(size, b'\xff')
+    return b'ID3\x03\x00\x00' + syncsafe + body
+
+def wav_file(data: bytes, sample_rate=22050, channels=2, bits=16, extra_chunk: bytes = b'') -> bytes:
+    """A PCM WAV, with an optional chunk (padded if odd-sized) before fmt"""
+    block_align = channels * bits // 8
+    fmt = struct.pack('<HHIIHH', 1, channels, sample_rate, sample_rate * block_align, block_align, bits)
+    chunks = b''
+    if extra_chunk:
+        chunks += b'LIST' + struct.pack('<I', len(extra_chunk)) + extra_chunk + bytes(len(extra_chunk) & 1)
+    chunks += b'fmt ' + struct.pack('<I', len(fmt)) + fmt
+    chunks += b'data' + struct.pack('<I', len(data)) + data
+    return b'RIFF' + struct.pack('<I', 4 + len(chunks)) + b'WAVE' + chunks
+
+def flac_file(sample_rate=48000, channels=2, bits=16, total_samples=96000, frames: bytes = bytes(1000)) -> bytes:
+    """fLaC marker, a last-block STREAMINFO and some frame bytes"""
+    packed = sample_rate << 44 | (channels - 1) << 41 | (bits - 1) << 36 | total_samples
+    streaminfo = struct.pack('>HH', 4096, 4096) + bytes(6) + packed.to_bytes(8, 'big') + bytes(16)
+    return b'fLaC' + bytes([0x80]) + len(streaminfo).to_bytes(3, 'big') + streaminfo + frames
+
+@pytest.fixture
+def probe_bytes(tmp_path):
+    def probe(data: bytes, name: str = 'track.mp3'):
+        path = tmp_path / name
+        path.write_bytes(data)
+        return audio_probe.probe(path)
+    return probe
+
+def test_mpeg_header_fields():
+    frame = audio_probe.parse_mpeg_header(mpeg_header(padding=1))
+    assert frame == {'version': 1, 'layer': 3, 'bitrate': 128000, 'sample_rate': 44100, 'channels': 2,
+                     'samples_per_frame': 1152, 'frame_length': 418}
+    frame = audio_probe.parse_mpeg_header(mpeg_header(version=2.5, bitrate=8, sample_rate=8000, channels=1))
+    assert (frame['samples_per_frame'], frame['frame_length'], frame['channels']) == (576, 72, 1)
+
+@pytest.mark.parametrize('header', [
+    b'\xff\xfb\xf0\x00',  # bitrate index 15
+    b'\xff\xfb\x0c\x00',  # reserved sample rate
+    b'\xff\xeb\x90\x00',  # reserved MPEG version
+    b'\xff\xf9\x90\x00',  # reserved layer
+    b'\xfe\xfb\x90\x00',  # no frame sync
+    b'\xff\xfb\x90',      # too short
+])
+def test_mpeg_header_rejects_reserved_values(header):
+    assert audio_probe.parse_mpeg_header(header) is None
+
+def test_cbr_mp3(probe_bytes):
+    info = probe_bytes(mp3_frames(100))
+    assert (info['format'], info['sample_rate'], info['channels'], info['bitrate']) == ('mp3', 44100, 2, 128000)
+    assert info['duration'] == pytest.approx(100 * 417 * 8 / 128000)
+
+@pytest.mark.parametrize('tag', [b'Xing', b'Info'])
+def test_xing_vbr_mp3(probe_bytes, tag):
+    # Declares more frames than are present, so the duration can only come from the header
+    data = mp3_frames(20, xing_frame(5000, side_info=32, tag=tag))
+    info = probe_bytes(data)
+    assert info['duration'] == pytest.approx(5000 * 1152 / 44100)
+    assert info['bitrate'] == int(len(data) * 8 / info['duration'])
+
+def test_vbri_vbr_mp3(probe_bytes):
+    info = probe_bytes(mp3_frames(20, vbri_frame(3000)))
+    assert info['duration'] == pytest.approx(3000 * 1152 / 44100)
+
+def test_mpeg2_mono_mp3(probe_bytes):
+    header = {'version': 2, 'bitrate': 64, 'sample_rate': 22050, 'channels': 1}
+    info = probe_bytes(mp3_frames(50, **header))
+    assert (info['sample_rate'], info['channels'], info['bitrate']) == (22050, 1, 64000)
+    assert info['duration'] == pytest.approx(50 * 208 * 8 / 64000)
+    # MPEG-2 mono side info is 9 bytes, so that's where its Xing header sits
+    info = probe_bytes(mp3_frames(50, xing_frame(4000, side_info=9), **header))
+    assert info['duration'] == pytest.approx(4000 * 576 / 22050)
+
+def test_id3v2_prefixed_mp3(probe_bytes):
+    frames = mp3_frames(100)
+    info = probe_bytes(id3v2_tag(2000) + frames + b'TAG' + bytes(125))
+    # Neither tag counts as audio, and the stray sync bytes in the ID3 body are skipped
+    assert info['duration'] == pytest.approx(len(frames) * 8 / 128000)
+
+def test_id3v2_prefixed_flac(probe_bytes):
+    info = probe_bytes(id3v2_tag(500) + flac_file(), 'track.flac')
+    assert (info['format'], info['sample_rate'], info['channels']) == ('flac', 48000, 2)
+
+def test_wav(probe_bytes):
+    info = probe_bytes(wav_file(bytes(22050 * 4), extra_chunk=b'odd'), 'track.wav')
+    assert info == {'format': 'wav', 'duration': 1.0, 'sample_rate': 22050, 'channels': 2,
+                    'bitrate': 22050 * 4 * 8}
+
+def test_streamed_wav_uses_actual_data_size(probe_bytes):
+    data = bytearray(wav_file(bytes(22050 * 2)))
+    data[-22050 * 2 - 4:-22050 * 2] = struct.pack('<I', 0xffffffff)
+    assert probe_bytes(bytes(data), 'track.wav')['duration'] == pytest.approx(0.5)
+
+def test_flac_streaminfo(probe_bytes):
+    data = flac_file(sample_rate=44100, channels=1, total_samples=441000)
+    info = probe_bytes(data, 'track.flac')
+    assert (info['format'], info['sample_rate'], info['channels']) == ('flac', 44100, 1)
+    assert info['duration'] == pytest.approx(10.0)
+    assert info['bitrate'] == int(len(data) * 8 / 10.0)
+
+@pytest.mark.parametrize('data', [
+    b'',
+    b'definitely not audio\n' * 200,
+    # A frame sync whose next frame isn't where its length says
+    mpeg_header() + b'garbage' * 100,
+    # ID3 tag claiming more bytes than the file has
+    id3v2_tag(2000)[:300],
+    wav_file(bytes(1000))[:30],
+    wav_file(bytes(1000), channels=0),
+    b'RIFF\x00\x00\x00\x00WAVEfmt ',
+    flac_file()[:20],
+    flac_file(sample_rate=0),
+    flac_file(total_samples=0),
+], ids=['empty', 'text', 'false-sync', 'truncated-id3', 'truncated-fmt', 'zero-channels', 'no-data-chunk',
+        'truncated-streaminfo', 'zero-rate-flac', 'empty-flac'])
+def test_rejects_garbage_and_truncated_files(probe_bytes, data):
+    with pytest.raises(audio_probe.InvalidAudio):
+        probe_bytes(data)
+
+if __name__ == '__main__':
+    sys.exit(pytest.main([__file__, '-q']))
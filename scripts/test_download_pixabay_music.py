@@ -0,0 +1,300 @@
+#!/usr/bin/env python3
+"""
+Checks for download_pixabay_music.py against an in-process HTTP server
+The server's responses are scripted per path, so resuming a .part file,
+retrying 503/429, recovering from a truncated body and coping with a server
+that ignores Range can all be exercised without the network, as can the
+search cache, rate limiting and paginated harvest against a fake Pixabay API.
+Runs standalone (exits non-zero if any check fails) or under pytest.
+
+Usage:
+    python3 scripts/test_download_pixabay_music.py
+"""
+
+import http.server
+import io
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+import traceback
+import wave
+from contextlib import contextmanager, redirect_stdout
+from pathlib import Path
+from urllib.parse import parse_qs, urlsplit
+
+import download_pixabay_music as dl
+
+def make_wav(seconds: float = 1.0) -> bytes:
+    """A silent mono 16-bit WAV that passes the downloader's header check"""
+    buffer = io.BytesIO()
+    with wave.open(buffer, 'wb') as w:
+        w.setnchannels(1)
+        w.setsampwidth(2)
+        w.setframerate(44100)
+        w.writeframes(b'\0\0' * int(44100 * seconds))
+    return buffer.getvalue()
+
+BODY = make_wav()
+
+def requested_offset(handler) -> int:
+    """Start of a 'bytes=N-' Range header, or 0"""
+    spec = handler.headers.get('Range', '')
+    return int(spec[len('bytes='):].split('-')[0]) if spec.startswith('bytes=') else 0
+
+def send(body: bytes = BODY, honour_range: bool = True, cut: int = None):
+    """Response that sends body (from the requested offset unless honour_range
+    is False), closing the connection after cut bytes if given"""
+    def respond(handler):
+        start = requested_offset(handler) if honour_range else 0
+        payload = body[start:]
+        handler.send_response(206 if start else 200)
+        if start:
+            handler.send_header('Content-Range', f'bytes {start}-{len(body) - 1}/{len(body)}')
+        handler.send_header('Content-Length', str(len(payload)))
+        handler.end_headers()
+        handler.wfile.write(payload[:cut])
+        if cut is not None:
+            handler.close_connection = True
+    return respond
+
+def status(code: int, retry_after: str = None):
+    """Empty response with the given status code"""
+    def respond(handler):
+        handler.send_response(code)
+        if retry_after is not None:
+            handler.send_header('Retry-After', retry_after)
+        handler.send_header('Content-Length', '0')
+        handler.end_headers()
+    return respond
+
+def search_api(catalog: dict, log: list = None):
+    """Response acting as the Pixabay search endpoint over {term: [hit id, ...]},
+    appending (term, page) to log for every request"""
+    def respond(handler):
+        query = {key: values[0] for key, values in parse_qs(urlsplit(handler.path).query).items()}
+        ids = catalog.get(query['q'], [])
+        page, per_page = int(query['page']), int(query['per_page'])
+        if log is not None:
+            log.append((query['q'], page))
+        hits = [{'id': hit_id, 'tags': query['q']} for hit_id in ids[(page - 1) * per_page:page * per_page]]
+        body = json.dumps({'total': len(ids), 'totalHits': len(ids), 'hits': hits}).encode('utf-8')
+        handler.send_response(200)
+        handler.send_header('Content-Type', 'application/json')
+        handler.send_header('Content-Length', str(len(body)))
+        handler.end_headers()
+        handler.wfile.write(body)
+    return respond
+
+class ScriptedHandler(http.server.BaseHTTPRequestHandler):
+    """Answers each request to a path with that path's next scripted response
+    (the last one repeats) and records the Range header it was sent"""
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        path = urlsplit(self.path).path
+        script = self.server.routes.get(path)
+        if not script:
+            status(404)(self)
+            return
+        self.server.requests.append((path, self.headers.get('Range')))
+        (script.pop(0) if len(script) > 1 else script[0])(self)
+
+    def log_message(self, *args):
+        pass
+
+@contextmanager
+def fake_server(routes: dict):
+    """Serve {path: [response, ...]} on a free local port, yielding (base URL, server)"""
+    server = http.server.ThreadingHTTPServer(('127.0.0.1', 0), ScriptedHandler)
+    server.routes = {path: list(script) for path, script in routes.items()}
+    server.requests = []
+    threading.Thread(target=server.serve_forever, args=(0.05,), daemon=True).start()
+    try:
+        yield f'http://127.0.0.1:{server.server_address[1]}', server
+    finally:
+        server.shutdown()
+        server.server_close()
+
+def fetch(base: str, name: str, out_dir: Path, **kwargs) -> dict:
+    return dl.fetch(f'{base}/{name}', Path(out_dir) / name, retries=3, **kwargs)
+
+def test_resumes_part_file():
+    with tempfile.TemporaryDirectory() as tmp, fake_server({'/song.wav': [send()]}) as (base, server):
+        dl.part_path(Path(tmp) / 'song.wav').write_bytes(BODY[:1000])
+        result = fetch(base, 'song.wav', tmp)
+        assert result['ok'], result['error']
+        assert result['resumed_from'] == 1000 and result['bytes'] == len(BODY) - 1000
+        assert server.requests == [('/song.wav', 'bytes=1000-')]
+        assert (Path(tmp) / 'song.wav').read_bytes() == BODY
+        assert not dl.part_path(Path(tmp) / 'song.wav').exists()
+
+def test_retries_503_and_429():
+    routes = {'/busy.wav': [status(503, retry_after='0'), status(429, retry_after='0'), send()]}
+    with tempfile.TemporaryDirectory() as tmp, fake_server(routes) as (base, server):
+        result = fetch(base, 'busy.wav', tmp)
+        assert result['ok'], result['error']
+        assert result['attempts'] == 3
+        assert (Path(tmp) / 'busy.wav').read_bytes() == BODY
+
+def test_gives_up_after_retries():
+    with tempfile.TemporaryDirectory() as tmp, fake_server({'/down.wav': [status(503, '0')]}) as (base, server):
+        result = fetch(base, 'down.wav', tmp)
+        assert not result['ok'] and result['error'] == 'HTTP 503'
+        assert result['attempts'] == 4 and len(server.requests) == 4
+        assert not (Path(tmp) / 'down.wav').exists()
+
+def test_permanent_error_is_not_retried():
+    with tempfile.TemporaryDirectory() as tmp, fake_server({'/gone.wav': [status(403)]}) as (base, server):
+        result = fetch(base, 'gone.wav', tmp)
+        assert not result['ok'] and result['attempts'] == 1
+
+def test_truncated_body_resumes():
+    # Only whole chunks reach the .part file, so the cut comes a few chunks in
+    body = make_wav(3 * dl.CHUNK_SIZE / 88200)
+    cut = 2 * dl.CHUNK_SIZE + 1000
+    routes = {'/cut.wav': [send(body, cut=cut), send(body)]}
+    with tempfile.TemporaryDirectory() as tmp, fake_server(routes) as (base, server):
+        result = fetch(base, 'cut.wav', tmp)
+        assert result['ok'], result['error']
+        assert result['attempts'] == 2
+        assert server.requests == [('/cut.wav', None), ('/cut.wav', f'bytes={2 * dl.CHUNK_SIZE}-')]
+        assert (Path(tmp) / 'cut.wav').read_bytes() == body
+
+def test_server_ignoring_range_restarts():
+    with tempfile.TemporaryDirectory() as tmp, \
+            fake_server({'/plain.wav': [send(honour_range=False)]}) as (base, server):
+        dl.part_path(Path(tmp) / 'plain.wav').write_bytes(b'stale partial data')
+        result = fetch(base, 'plain.wav', tmp)
+        assert result['ok'], result['error']
+        assert server.requests == [('/plain.wav', f'bytes={len(b"stale partial data")}-')]
+        # The 200 carries the whole file, so it replaces the part instead of being appended
+        assert (Path(tmp) / 'plain.wav').read_bytes() == BODY
+
+def test_invalid_audio_is_removed():
+    with tempfile.TemporaryDirectory() as tmp, fake_server({'/junk.wav': [send(b'<html>')]}) as (base, server):
+        result = fetch(base, 'junk.wav', tmp)
+        assert not result['ok'] and result['error'] == 'not a valid audio file'
+        assert not (Path(tmp) / 'junk.wav').exists()
+
+def test_download_batch():
+    routes = {'/a.wav': [send()], '/b.wav': [status(503, '0'), send()], '/c.wav': [status(404)]}
+    with tempfile.TemporaryDirectory() as tmp, fake_server(routes) as (base, server):
+        jobs = [(f'{base}/{name}', Path(tmp) / name) for name in ('a.wav', 'b.wav', 'c.wav')]
+        with redirect_stdout(io.StringIO()):
+            results = dl.download_batch(jobs, workers=3, retries=2)
+        ok = {Path(r['path']).name: r['ok'] for r in results}
+        assert ok == {'a.wav': True, 'b.wav': True, 'c.wav': False}
+        assert all((Path(tmp) / name).read_bytes() == BODY for name in ('a.wav', 'b.wav'))
+
+def test_search_page_uses_cache():
+    log = []
+    with tempfile.TemporaryDirectory() as tmp, \
+            fake_server({'/api/': [search_api({'calm': [1, 2, 3]}, log)]}) as (base, server):
+        cache = dl.ResponseCache(Path(tmp) / 'cache')
+        first = dl.search_page('calm', 1, 2, cache=cache, api_url=f'{base}/api/')
+        second = dl.search_page('calm', 1, 2, cache=cache, api_url=f'{base}/api/')
+        assert first == second and [hit['id'] for hit in first['hits']] == [1, 2]
+        assert log == [('calm', 1)]
+        assert (cache.hits, cache.misses) == (1, 1)
+        # A different page is a different entry
+        dl.search_page('calm', 2, 2, cache=cache, api_url=f'{base}/api/')
+        assert log == [('calm', 1), ('calm', 2)]
+
+def test_cache_expires_after_ttl():
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = dl.ResponseCache(Path(tmp), ttl=60)
+        cache.put('calm', 1, 200, {'hits': []})
+        assert cache.get('calm', 1, 200) == {'hits': []}
+        path = cache.path('calm', 1, 200)
+        entry = json.loads(path.read_text())
+        entry['fetched_at'] -= 61
+        path.write_text(json.dumps(entry))
+        assert cache.get('calm', 1, 200) is None
+        assert not path.exists()
+
+def test_cache_evicts_oldest_past_max_entries():
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = dl.ResponseCache(Path(tmp), max_entries=3)
+        for page in range(1, 6):
+            cache.put('calm', page, 200, {'hits': [page]})
+            # Entries are evicted in mtime order, so space them out explicitly
+            written = time.time() - 10 + page
+            os.utime(cache.path('calm', page, 200), (written, written))
+        assert len(list(Path(tmp).glob('*.json'))) <= 3
+        assert [cache.get('calm', page, 200) is not None for page in range(1, 6)] == [False, False, True, True, True]
+
+def test_token_bucket_paces_requests():
+    bucket = dl.TokenBucket(rate=5, period=0.5)
+    started = time.monotonic()
+    for _ in range(5):
+        bucket.acquire()
+    burst = time.monotonic() - started
+    for _ in range(5):
+        bucket.acquire()
+    paced = time.monotonic() - started
+    # The first five are the burst; the next five wait for one refill each
+    assert burst < 0.05
+    assert 0.45 <= paced < 1.0
+
+def test_harvest_pages_until_enough():
+    term = dl.MOOD_SEARCH_TERMS['melancholic']
+    per_page = dl.PIXABAY_MAX_PER_PAGE
+    log = []
+    routes = {'/api/': [search_api({term: list(range(2 * per_page + 50))}, log)]}
+    with tempfile.TemporaryDirectory() as tmp, fake_server(routes) as (base, server):
+        with redirect_stdout(io.StringIO()):
+            wanted = dl.harvest(['melancholic'], per_page + 10, dl.ResponseCache(Path(tmp)), api_url=f'{base}/api/')
+            everything = dl.harvest(['melancholic'], 10 * per_page, dl.ResponseCache(Path(tmp) / 'fresh'),
+                                    api_url=f'{base}/api/')
+        assert len(wanted['melancholic']) == per_page + 10
+        # Stops once totalHits is covered, even though more were asked for
+        assert len(everything['melancholic']) == 2 * per_page + 50
+        assert log == [(term, 1), (term, 2), (term, 1), (term, 2), (term, 3)]
+
+def test_harvest_stops_on_empty_page():
+    term = dl.MOOD_SEARCH_TERMS['joyful']
+    log = []
+
+    def lying_api(handler):
+        # Claims more hits than it ever returns
+        query = parse_qs(urlsplit(handler.path).query)
+        log.append(int(query['page'][0]))
+        body = json.dumps({'totalHits': 10000, 'hits': [{'id': 1}] if query['page'] == ['1'] else []}).encode()
+        handler.send_response(200)
+        handler.send_header('Content-Length', str(len(body)))
+        handler.end_headers()
+        handler.wfile.write(body)
+
+    with tempfile.TemporaryDirectory() as tmp, fake_server({'/api/': [lying_api]}) as (base, server):
+        with redirect_stdout(io.StringIO()):
+            library = dl.harvest(['joyful'], 50, dl.ResponseCache(Path(tmp)), api_url=f'{base}/api/')
+        assert [hit['id'] for hit in library['joyful']] == [1] and log == [1, 2]
+
+def test_harvest_dedupes_across_moods():
+    catalog = {dl.MOOD_SEARCH_TERMS['melancholic']: [1, 2, 3], dl.MOOD_SEARCH_TERMS['nostalgic']: [2, 3, 4, 5]}
+    with tempfile.TemporaryDirectory() as tmp, fake_server({'/api/': [search_api(catalog)]}) as (base, server):
+        with redirect_stdout(io.StringIO()):
+            library = dl.harvest(['melancholic', 'nostalgic'], 3, dl.ResponseCache(Path(tmp)),
+                                 api_url=f'{base}/api/')
+        assert {mood: [hit['id'] for hit in hits] for mood, hits in library.items()} == \
+            {'melancholic': [1, 2, 3], 'nostalgic': [4, 5]}
+
+def main():
+    checks = [(name, check) for name, check in globals().items() if name.startswith('test_')]
+    failed = 0
+    for name, check in checks:
+        try:
+            check()
+            print(f"✓ {name}")
+        except Exception:
+            failed += 1
+            print(f"✗ {name}")
+            traceback.print_exc()
+    print(f"\n{'✅' if not failed else '❌'} {len(checks) - failed}/{len(checks)} checks passed")
+    sys.exit(1 if failed else 0)
+
+if __name__ == '__main__':
+    main()
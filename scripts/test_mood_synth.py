@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+Checks that the NumPy synthesis backend (mood_synth.py) matches ffmpeg
+The FFT-based filter cascade is checked against a direct per-sample biquad
+recursion, which needs nothing but NumPy; each mood's full render is checked
+against ffmpeg's own filter graph where ffmpeg is installed.
+
+Usage:
+    python3 -m pytest scripts/test_mood_synth.py
+"""
+
+import shutil
+import sys
+
+import numpy as np
+import pytest
+
+import generate_mood_matched_audio as gen
+import mood_synth
+
+MIN_SNR_DB = 40.0
+
+def mood_plan(mood: str) -> dict:
+    """The render plan of a plain track of the given mood"""
+    config, duration_sec = gen.resolve_render_config(mood, [], 50, 10000)
+    return gen.build_render_plan(mood, config, duration_sec)
+
+def direct_filters(samples: np.ndarray, filters) -> np.ndarray:
+    """A plan's filter chain run as ffmpeg runs it: one biquad recursion after another"""
+    gain = 1.0
+    output = samples.astype(np.float64)
+    for name, value in filters:
+        if name == 'volume':
+            gain *= value
+            continue
+        b, a = mood_synth.biquad_coefficients(name, value)
+        filtered = np.empty_like(output)
+        x1 = x2 = y1 = y2 = 0.0
+        for i, x in enumerate(output.tolist()):
+            y = b[0] * x + b[1] * x1 + b[2] * x2 - a[1] * y1 - a[2] * y2
+            x2, x1, y2, y1 = x1, x, y1, y
+            filtered[i] = y
+        output = filtered
+    return output * gain
+
+@pytest.mark.parametrize('mood', list(gen.MOOD_AUDIO_CONFIG))
+def test_fft_filters_match_direct_biquads(mood):
+    plan = mood_plan(mood)
+    # A second is plenty for the filters' tails, and keeps the Python recursion quick
+    num_samples = mood_synth.SAMPLE_RATE
+    mix = sum(mood_synth.render_voice(voice, num_samples) for voice in plan['voices']) / len(plan['voices'])
+    max_error, snr = mood_synth.compare(direct_filters(mix, plan['filters']),
+                                        mood_synth.apply_filters(mix, plan['filters']))
+    assert snr >= 120.0, f"SNR {snr:.1f} dB, max error {max_error:.2e}"
+
+@pytest.mark.skipif(shutil.which('ffmpeg') is None, reason='needs ffmpeg for the reference render')
+@pytest.mark.parametrize('mood', list(gen.MOOD_AUDIO_CONFIG))
+def test_render_matches_ffmpeg(mood):
+    plan = mood_plan(mood)
+    reference = mood_synth.render_reference(gen.plan_to_ffmpeg_inputs(plan), gen.plan_to_filter_graph(plan))
+    max_error, snr = mood_synth.compare(reference, mood_synth.render_plan(plan))
+    assert abs(len(reference) - round(plan['duration'] * mood_synth.SAMPLE_RATE)) <= 1
+    assert snr >= MIN_SNR_DB, f"SNR {snr:.1f} dB, max error {max_error:.2e}"
+
+if __name__ == '__main__':
+    sys.exit(pytest.main([__file__, '-q']))
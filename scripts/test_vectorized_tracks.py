@@ -0,0 +1,28 @@
+#!/usr/bin/env python3
+"""
+Checks that the vectorized track generator matches generate_track()
+A two-sample chi-square test per track feature, on a fixed seed and a sample
+small enough for every run; vectorized_tracks.py runs the same test on as
+many tracks as you like.
+
+Usage:
+    python3 -m pytest scripts/test_vectorized_tracks.py
+"""
+
+import sys
+
+import pytest
+
+import vectorized_tracks
+
+SAMPLES = 20000
+SEED = 1
+
+def test_distributions_match_reference_generator():
+    results = vectorized_tracks.compare_generators(SAMPLES, SEED)
+    differing = {feature: f"chi2={stat:.1f} > {critical:.1f} (dof={dof})"
+                 for feature, (stat, dof, critical) in results.items() if stat > critical}
+    assert not differing, differing
+
+if __name__ == '__main__':
+    sys.exit(pytest.main([__file__, '-q']))
@@ -0,0 +1,313 @@
+#!/usr/bin/env python3
+"""
+Mood/feeling/genre/vibe feature vectors and nearest-neighbour track queries
+Every track becomes one float32 row: one-hot mood, multi-hot feelings and
+genres (each group scaled to unit length and weighted) and vibe / 100. A
+query is the same vector built from a playlist's moodTags, and tracks are
+ranked by squared Euclidean distance to it - one matrix product per block
+of tracks, so ranking a very large catalog takes milliseconds.
+
+generate_seed_data.py --playlist-match similarity builds playlists this way
+and writes the matrix to data/mock/track_features.npy (ids in
+track_features.ids) for later queries.
+
+Usage:
+    python3 scripts/track_similarity.py --mood Joyful --feelings Excited,Great --vibe 75 -k 20
+    python3 scripts/track_similarity.py --playlists data/mock/playlists.json
+    python3 scripts/track_similarity.py --build data/mock/tracks.json
+"""
+
+import argparse
+import json
+import os
+import shutil
+import time
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+
+import seed_vocabulary as vocab
+
+INDEX_FILE = Path(__file__).parent.parent / 'data' / 'mock' / 'track_features.npy'
+INDEX_VERSION = 1
+
+MOODS = list(vocab.MOODS)
+# Mood configs add a few feelings (Reflective, Thoughtful, ...) beyond ALL_FEELINGS
+FEELINGS = list(dict.fromkeys(vocab.ALL_FEELINGS + [f for m in MOODS for f in vocab.get_mood_config(m)['feelings']]))
+GENRES = list(vocab.GENRES)
+FEATURE_NAMES = ([f'mood:{m}' for m in MOODS] + [f'feeling:{f}' for f in FEELINGS] +
+                 [f'genre:{g}' for g in GENRES] + ['vibe'])
+
+# Group weights: a different mood costs 2 * MOOD_WEIGHT**2, disjoint
+# feelings 2 * FEELING_WEIGHT**2, disjoint genres 2 * GENRE_WEIGHT**2 and a
+# vibe gap of d points (VIBE_WEIGHT * d / 100)**2, so mood and feelings
+# dominate, then vibe, with genres breaking the remaining ties
+MOOD_WEIGHT = 1.0
+FEELING_WEIGHT = 1.0
+GENRE_WEIGHT = 0.5
+VIBE_WEIGHT = 2.0
+
+FEELING_OFFSET = len(MOODS)
+GENRE_OFFSET = FEELING_OFFSET + len(FEELINGS)
+VIBE_COLUMN = GENRE_OFFSET + len(GENRES)
+MOOD_INDEX = {m: i for i, m in enumerate(MOODS)}
+FEELING_INDEX = {f: FEELING_OFFSET + i for i, f in enumerate(FEELINGS)}
+GENRE_INDEX = {g: GENRE_OFFSET + i for i, g in enumerate(GENRES)}
+# Value of each of n labels in a group, keeping the group at unit length
+FEELING_SCALES = [0.0] + [FEELING_WEIGHT / n ** 0.5 for n in range(1, len(FEELINGS) + 1)]
+GENRE_SCALES = [0.0] + [GENRE_WEIGHT / n ** 0.5 for n in range(1, len(GENRES) + 1)]
+
+# Tracks are scored in blocks of about this many track-query distances,
+# so memory stays flat however many playlists are ranked at once
+BLOCK_DISTANCES = 1 << 20
+DISTANCE_DECIMALS = 6
+
+def encode(tags_list: Iterable[Dict]) -> np.ndarray:
+    """(n, len(FEATURE_NAMES)) float32 feature rows for moodTags dicts (distinct labels; unknown ones are ignored)"""
+    tags_list = list(tags_list)
+    rows, cols, values = [], [], []
+    vibes = np.empty(len(tags_list), dtype=np.float32)
+    for row, tags in enumerate(tags_list):
+        mood = MOOD_INDEX.get(tags.get('mood'))
+        if mood is not None:
+            rows.append(row)
+            cols.append(mood)
+            values.append(MOOD_WEIGHT)
+        for labels, index, weights in ((tags.get('feelings'), FEELING_INDEX, FEELING_SCALES),
+                                       (tags.get('genres'), GENRE_INDEX, GENRE_SCALES)):
+            hits = [index[label] for label in labels or () if label in index]
+            if hits:
+                rows += [row] * len(hits)
+                cols += hits
+                values += [weights[len(hits)]] * len(hits)
+        vibes[row] = tags.get('vibe', 50)
+    features = np.zeros((len(tags_list), len(FEATURE_NAMES)), dtype=np.float32)
+    features[rows, cols] = values
+    features[:, VIBE_COLUMN] = vibes * (VIBE_WEIGHT / 100)
+    return features
+
+def squared_distances(features: np.ndarray, queries: np.ndarray) -> np.ndarray:
+    """(queries, tracks) squared Euclidean distances, via |x|^2 - 2 q.x + |q|^2
+
+    Rounded to DISTANCE_DECIMALS so tracks with equal features tie exactly,
+    whatever rounding the matrix product's blocking introduced.
+    """
+    features = features.astype(np.float64)
+    queries = queries.astype(np.float64)
+    distances = features @ (-2 * queries.T)
+    distances += np.einsum('ij,ij->i', features, features)[:, None]
+    distances += np.einsum('ij,ij->i', queries, queries)[None, :]
+    return np.maximum(distances.T, 0).round(DISTANCE_DECIMALS)
+
+class TopK:
+    """The k nearest tracks to each query over a stream of track blocks
+
+    Only the current best k per query (and their items) are kept. Ties go to
+    the earlier track, so results do not depend on how tracks were blocked.
+    """
+
+    def __init__(self, queries: np.ndarray, k: int):
+        self.queries = queries
+        self.k = k
+        self.block_size = max(256, BLOCK_DISTANCES // max(1, len(queries)))
+        self.distances = np.empty((len(queries), 0))
+        self.positions = np.empty((len(queries), 0), dtype=np.int64)
+        self.items = {}
+
+    def add(self, features: np.ndarray, start: int, items: Optional[List] = None):
+        """Score tracks start, start+1, ... (one feature row each) against every query"""
+        if not len(features) or not len(self.queries):
+            return
+        positions = np.arange(start, start + len(features))
+        distances = np.hstack([self.distances, squared_distances(features, self.queries)])
+        positions = np.hstack([self.positions, np.broadcast_to(positions, (len(self.queries), len(positions)))])
+        if distances.shape[1] > self.k:
+            # Keep the k smallest per row without sorting the block: everything
+            # under the k-th distance, then the first columns that tie with it.
+            # Kept results come first and precede the new block, so among equal
+            # distances the first columns are the earliest tracks.
+            kth = np.partition(distances, self.k - 1, axis=1)[:, self.k - 1:self.k]
+            below = distances < kth
+            ties = distances == kth
+            room = self.k - below.sum(axis=1, keepdims=True)
+            keep = below | (ties & (np.cumsum(ties, axis=1) <= room))
+            distances = distances[keep].reshape(len(self.queries), self.k)
+            positions = positions[keep].reshape(len(self.queries), self.k)
+        order = np.argsort(distances, axis=1, kind='stable')
+        self.distances = np.take_along_axis(distances, order, axis=1)
+        self.positions = np.take_along_axis(positions, order, axis=1)
+        if items is not None:
+            new_items = dict(zip(range(start, start + len(items)), items))
+            self.items = {p: self.items.get(p) or new_items[p] for p in np.unique(self.positions).tolist()}
+
+    def results(self, query: int) -> List[tuple]:
+        """[(position, distance)] nearest first for one query"""
+        return list(zip(self.positions[query].tolist(), self.distances[query].tolist()))
+
+class PlaylistRanker:
+    """Picks each playlist's k nearest tracks in one pass over a track stream
+
+    Tracks are buffered into blocks and scored against every playlist at
+    once; with a writer, each block's feature rows are also written to the
+    index, so the feature matrix is built without a second pass.
+    """
+
+    def __init__(self, playlist_tags: List[Dict], k: int, writer: Optional['IndexWriter'] = None):
+        self.top = TopK(encode(playlist_tags), k)
+        self.writer = writer
+        self.pending = []
+        self.count = 0
+
+    def add(self, item, track_id: str, tags: Dict):
+        self.pending.append((item, track_id, tags))
+        if len(self.pending) >= self.top.block_size:
+            self.flush()
+
+    def flush(self):
+        if not self.pending:
+            return
+        items, ids, tags = zip(*self.pending)
+        features = encode(tags)
+        self.top.add(features, self.count, list(items))
+        if self.writer:
+            self.writer.write(features, ids)
+        self.count += len(self.pending)
+        self.pending = []
+
+    def tracks_for_playlist(self, i: int) -> List:
+        self.flush()
+        return [self.top.items[position] for position, _ in self.top.results(i)]
+
+def ids_path(index_file: Path) -> Path:
+    return Path(index_file).with_suffix('.ids')
+
+class IndexWriter:
+    """Streams feature rows and ids to disk as they are produced
+
+    Rows go to a raw float32 scratch file and become a .npy (which can be
+    memory-mapped) on close, once the row count is known. The ids file
+    starts with a JSON header naming the features, then has one track id
+    per line, in row order.
+    """
+
+    def __init__(self, index_file: Path):
+        self.index_file = Path(index_file)
+        self.index_file.parent.mkdir(parents=True, exist_ok=True)
+        self.rows_file = self.index_file.with_suffix('.rows.tmp')
+        self.ids_file = ids_path(self.index_file).with_suffix('.ids.tmp')
+        self.rows = open(self.rows_file, 'wb')
+        self.ids = open(self.ids_file, 'w')
+        self.ids.write(json.dumps({'version': INDEX_VERSION, 'features': FEATURE_NAMES}) + '\n')
+        self.count = 0
+
+    def write(self, features: np.ndarray, ids: Iterable[str]):
+        self.rows.write(np.ascontiguousarray(features, dtype='<f4').tobytes())
+        self.ids.writelines(f'{track_id}\n' for track_id in ids)
+        self.count += len(features)
+
+    def close(self):
+        """Write the .npy and move both files into place"""
+        self.rows.close()
+        self.ids.close()
+        tmp_file = self.index_file.with_suffix('.tmp')
+        with open(tmp_file, 'wb') as f, open(self.rows_file, 'rb') as rows:
+            np.lib.format.write_array_header_1_0(f, {'descr': '<f4', 'fortran_order': False,
+                                                     'shape': (self.count, len(FEATURE_NAMES))})
+            shutil.copyfileobj(rows, f)
+        os.replace(tmp_file, self.index_file)
+        os.replace(self.ids_file, ids_path(self.index_file))
+        os.unlink(self.rows_file)
+
+class SimilarityIndex:
+    """Feature matrix of a catalog with top-k nearest-neighbour queries"""
+
+    def __init__(self, features: np.ndarray, ids: List[str]):
+        self.features = features
+        self.ids = ids
+
+    @classmethod
+    def from_tracks(cls, tracks: Iterable[Dict]) -> 'SimilarityIndex':
+        tracks = list(tracks)
+        return cls(encode(t['moodTags'] for t in tracks), [t['id'] for t in tracks])
+
+    @classmethod
+    def load(cls, index_file: Path = INDEX_FILE) -> 'SimilarityIndex':
+        """Memory-map a saved index; raises ValueError if it was built with other features"""
+        with open(ids_path(index_file), 'r') as f:
+            header = json.loads(f.readline())
+            ids = f.read().splitlines()
+        if header.get('version') != INDEX_VERSION or header.get('features') != FEATURE_NAMES:
+            raise ValueError(f'{index_file} was built with different features; rebuild it with --build')
+        return cls(np.load(index_file, mmap_mode='r'), ids)
+
+    def save(self, index_file: Path = INDEX_FILE):
+        writer = IndexWriter(index_file)
+        writer.write(np.asarray(self.features), self.ids)
+        writer.close()
+
+    def top_k_many(self, tags_list: List[Dict], k: int = vocab.PLAYLIST_TRACK_LIMIT) -> List[List[tuple]]:
+        """For each moodTags dict, [(track_id, distance)] of its k nearest tracks, nearest first"""
+        top = TopK(encode(tags_list), k)
+        for start in range(0, len(self.ids), top.block_size):
+            top.add(np.asarray(self.features[start:start + top.block_size]), start)
+        return [[(self.ids[p], d) for p, d in top.results(i)] for i in range(len(tags_list))]
+
+    def top_k(self, tags: Dict, k: int = vocab.PLAYLIST_TRACK_LIMIT) -> List[tuple]:
+        return self.top_k_many([tags], k)[0]
+
+def load_records(path: Path) -> List[Dict]:
+    """Records from a JSON array or NDJSON file"""
+    with open(path, 'r') as f:
+        text = f.read()
+    if text.lstrip().startswith('['):
+        return json.loads(text)
+    return [json.loads(line) for line in text.splitlines() if line.strip()]
+
+def main():
+    parser = argparse.ArgumentParser(description='Build or query the track similarity index')
+    parser.add_argument('--index', type=Path, default=INDEX_FILE)
+    parser.add_argument('--build', type=Path, metavar='TRACKS_FILE', help='Build the index from a tracks file')
+    parser.add_argument('--playlists', type=Path, metavar='FILE', help="Rank tracks for every playlist's moodTags")
+    parser.add_argument('--mood', choices=MOODS)
+    parser.add_argument('--feelings', default='', help='Comma-separated feelings')
+    parser.add_argument('--genres', default='', help='Comma-separated genres')
+    parser.add_argument('--vibe', type=int, default=50)
+    parser.add_argument('-k', type=int, default=vocab.PLAYLIST_TRACK_LIMIT, help='Tracks per query')
+    args = parser.parse_args()
+
+    if args.build:
+        started = time.perf_counter()
+        index = SimilarityIndex.from_tracks(load_records(args.build))
+        index.save(args.index)
+        print(f"✅ Indexed {len(index.ids)} tracks ({len(FEATURE_NAMES)} features) in "
+              f"{time.perf_counter() - started:.2f}s: {args.index}")
+        return
+
+    index = SimilarityIndex.load(args.index)
+    if args.playlists:
+        playlists = load_records(args.playlists)
+        started = time.perf_counter()
+        results = index.top_k_many([p['moodTags'] for p in playlists], args.k)
+        elapsed = time.perf_counter() - started
+        for playlist, nearest in zip(playlists, results):
+            print(f"{playlist['id']} [{playlist['moodTags']['mood']}]: {', '.join(t for t, _ in nearest[:5])}"
+                  f"{' ...' if len(nearest) > 5 else ''}")
+        print(f"\n⏱️  Top {args.k} for {len(playlists)} playlists over {len(index.ids)} tracks "
+              f"in {elapsed * 1000:.1f} ms")
+        return
+
+    if not args.mood:
+        parser.error('give --mood (and optionally --feelings, --genres, --vibe), --playlists or --build')
+    tags = {'mood': args.mood, 'vibe': args.vibe,
+            'feelings': [f.strip() for f in args.feelings.split(',') if f.strip()],
+            'genres': [g.strip() for g in args.genres.split(',') if g.strip()]}
+    started = time.perf_counter()
+    nearest = index.top_k(tags, args.k)
+    elapsed = time.perf_counter() - started
+    for rank, (track_id, distance) in enumerate(nearest, 1):
+        print(f"{rank:3d}. {track_id} (distance {distance:.3f})")
+    print(f"\n⏱️  Top {args.k} of {len(index.ids)} tracks in {elapsed * 1000:.1f} ms")
+
+if __name__ == '__main__':
+    main()
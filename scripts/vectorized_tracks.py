@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+"""
+Vectorized track generation for generate_seed_data.py
+Draws every per-track attribute (vibe, feelings, genres, cover, title, artist,
+album, format, quality, release date) for a whole batch of tracks at once as
+NumPy arrays, then emits the same track records lazily from those columns.
+
+The distributions match generate_track(); run directly to check that with a
+two-sample chi-square test against the random-module generator
+(test_vectorized_tracks.py runs it on a fixed sample under pytest):
+    python3 scripts/vectorized_tracks.py --samples 200000
+"""
+
+import argparse
+import math
+import random
+import sys
+from collections import Counter
+
+import numpy as np
+
+import seed_vocabulary as vocab
+
+BATCH_SIZE = 65536
+
+MOOD_VIBE_LOW = np.array([vocab.get_mood_config(m)['vibe_range'][0] for m in vocab.MOODS])
+MOOD_VIBE_HIGH = np.array([vocab.get_mood_config(m)['vibe_range'][1] for m in vocab.MOODS])
+MOOD_FEELINGS = [vocab.get_mood_config(m)['feelings'] for m in vocab.MOODS]
+MOOD_FEELING_COUNTS = np.array([len(f) for f in MOOD_FEELINGS])
+MAX_FEELINGS = int(MOOD_FEELING_COUNTS.max())
+ALBUM_TITLES = vocab.TRACK_TITLES[:20]
+FORMATS = ["MP3", "WAV", "FLAC"]
+QUALITIES = ["lossless", "high", "standard"]
+
+def shard_generator(base_seed, shard):
+    """The NumPy random stream for one shard of the track-id range"""
+    return np.random.default_rng([base_seed, shard])
+
+def draw_columns(ids, num_tracks, rng):
+    """Draw every random attribute for the track ids in one go"""
+    n = len(ids)
+    per_mood = (num_tracks * 4 // 5) // len(vocab.MOODS)
+
+    # Mood blocks first, then random moods, exactly as iter_track_range
+    in_block = ids <= per_mood * len(vocab.MOODS)
+    mood = rng.integers(0, len(vocab.MOODS), n)
+    if per_mood:
+        mood[in_block] = (ids[in_block] - 1) // per_mood
+
+    vibe = rng.integers(MOOD_VIBE_LOW[mood], MOOD_VIBE_HIGH[mood] + 1)
+
+    # random.sample(feelings, min(randint(1, 3), len)): order the mood's
+    # feelings by random keys (padding slots sort last) and keep the first k
+    num_feelings = np.minimum(rng.integers(1, 4, n), MOOD_FEELING_COUNTS[mood])
+    keys = rng.random((n, MAX_FEELINGS))
+    keys[np.arange(MAX_FEELINGS) >= MOOD_FEELING_COUNTS[mood][:, None]] = np.inf
+    feeling_order = np.argsort(keys, axis=1)[:, :3]
+
+    # Sampling 1-2 genres from a random 5-genre subset is the same as sampling
+    # them from all genres, so both track kinds use one ordered draw
+    num_genres = rng.integers(1, 3, n)
+    genre1 = rng.integers(0, len(vocab.GENRES), n)
+    genre2 = rng.integers(0, len(vocab.GENRES) - 1, n)
+    genre2 += genre2 >= genre1
+
+    return {
+        'mood': mood,
+        'vibe': vibe,
+        'num_feelings': num_feelings,
+        'feeling_order': feeling_order,
+        'num_genres': num_genres,
+        'genre1': genre1,
+        'genre2': genre2,
+        'cover': rng.integers(0, len(vocab.COVER_ART_IMAGES), n),
+        'name': rng.integers(0, len(vocab.TRACK_TITLES), n),
+        'artist': rng.integers(0, len(vocab.ARTIST_NAMES), n),
+        'album': rng.integers(0, len(ALBUM_TITLES), n),
+        'duration': rng.integers(150000, 300001, n),
+        'format': rng.integers(0, len(FORMATS), n),
+        'quality': rng.integers(0, len(QUALITIES), n),
+        'month': rng.integers(1, 13, n),
+        'day': rng.integers(1, 29, n),
+    }
+
+def iter_track_range(start_id, stop_id, num_tracks, rng, num_artists=50, num_albums=30):
+    """Yield tracks start_id..stop_id-1 (same records as generate_track) from batched draws"""
+    for lo in range(start_id, stop_id, BATCH_SIZE):
+        ids = np.arange(lo, min(lo + BATCH_SIZE, stop_id))
+        cols = {name: values.tolist() for name, values in draw_columns(ids, num_tracks, rng).items()}
+        for i, track_id in enumerate(ids.tolist()):
+            mood = cols['mood'][i]
+            feelings = MOOD_FEELINGS[mood]
+            genres = [vocab.GENRES[cols['genre1'][i]], vocab.GENRES[cols['genre2'][i]]][:cols['num_genres'][i]]
+            yield {
+                "id": f"track-{track_id}",
+                "name": vocab.TRACK_TITLES[cols['name'][i]],
+                "artist": vocab.ARTIST_NAMES[cols['artist'][i]],
+                "artistId": f"artist-{(track_id % num_artists) + 1}",
+                "album": f"{ALBUM_TITLES[cols['album'][i]]} Album",
+                "albumId": f"album-{(track_id % num_albums) + 1}",
+                "duration": cols['duration'][i],
+                "audioUrl": f"/audio/track-{track_id}.mp3",
+                "coverArt": f"https://images.unsplash.com/{vocab.COVER_ART_IMAGES[cols['cover'][i]]}?w=400&h=400&fit=crop&q=80",
+                "moodTags": {
+                    "mood": vocab.MOODS[mood],
+                    "feelings": [feelings[j] for j in cols['feeling_order'][i][:cols['num_feelings'][i]]],
+                    "vibe": cols['vibe'][i],
+                    "genres": genres
+                },
+                "format": FORMATS[cols['format'][i]],
+                "quality": QUALITIES[cols['quality'][i]],
+                "releaseDate": f"2024-{cols['month'][i]:02d}-{cols['day'][i]:02d}"
+            }
+
+def track_features(track):
+    """Categorical features whose distributions both generators must share"""
+    tags = track['moodTags']
+    yield 'mood', tags['mood']
+    yield 'vibe', (tags['mood'], tags['vibe'])
+    yield 'feelings', (tags['mood'], tuple(tags['feelings']))
+    yield 'genre count', len(tags['genres'])
+    yield 'first genre', tags['genres'][0]
+    yield 'name', track['name']
+    yield 'artist', track['artist']
+    yield 'album', track['album']
+    yield 'cover', track['coverArt']
+    yield 'duration decile', (track['duration'] - 150000) * 10 // 150001
+    yield 'format', track['format']
+    yield 'quality', track['quality']
+    yield 'month', track['releaseDate'][5:7]
+    yield 'day', track['releaseDate'][8:]
+
+def chi_square_critical(dof, z=3.09):
+    """Wilson-Hilferty approximation of the chi-square critical value (z=3.09: p=0.001)"""
+    return dof * (1 - 2 / (9 * dof) + z * math.sqrt(2 / (9 * dof))) ** 3
+
+def homogeneity_test(a, b):
+    """Two-sample chi-square statistic and degrees of freedom for two Counters"""
+    n_a, n_b = sum(a.values()), sum(b.values())
+    stat = 0.0
+    categories = set(a) | set(b)
+    for category in categories:
+        total = a[category] + b[category]
+        for observed, n in ((a[category], n_a), (b[category], n_b)):
+            expected = total * n / (n_a + n_b)
+            stat += (observed - expected) ** 2 / expected
+    return stat, max(1, len(categories) - 1)
+
+def compare_generators(samples, seed):
+    """{feature: (chi2, dof, critical)} of samples tracks from each generator"""
+    # The reference generator; imported here since generate_seed_data imports this module
+    import generate_seed_data
+
+    reference = {}
+    candidate = {}
+    for counters, tracks in (
+            (reference, generate_seed_data.iter_track_range(1, samples + 1, samples, random.Random(seed))),
+            (candidate, iter_track_range(1, samples + 1, samples, shard_generator(seed, 0)))):
+        for track in tracks:
+            for feature, value in track_features(track):
+                counters.setdefault(feature, Counter())[value] += 1
+    results = {}
+    for feature in reference:
+        stat, dof = homogeneity_test(reference[feature], candidate[feature])
+        results[feature] = (stat, dof, chi_square_critical(dof))
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description='Check vectorized track distributions against generate_track()')
+    parser.add_argument('--samples', type=int, default=100000, help='Tracks drawn from each generator')
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+
+    print(f"🔬 Chi-square homogeneity over {args.samples} tracks per generator (p=0.001)")
+    failed = 0
+    for feature, (stat, dof, critical) in compare_generators(args.samples, args.seed).items():
+        ok = stat <= critical
+        failed += not ok
+        print(f"{'✓' if ok else '✗'} {feature:<16} chi2={stat:10.1f}  dof={dof:4d}  critical={critical:8.1f}")
+
+    if failed:
+        print(f"\n⚠️  {failed} feature distributions differ")
+        sys.exit(1)
+    print("\n✅ Distributions match")
+
+if __name__ == '__main__':
+    main()
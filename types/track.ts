@@ -89,6 +89,7 @@ export interface Track {
 <<<<<<< HEAD
   audioUrl: string;
   coverArt: string;
+  waveformUrl?: string; // Precomputed peaks (audiowaveform .dat or JSON), if the audio has them
   format?: "WAV" | "FLAC" | "MP3" | "M4A" | "MP4";
   quality?: "lossless" | "high" | "standard" | "data-saver";
   releaseDate?: string;
@@ -100,6 +101,7 @@ export interface Track {
 =======
   audioUrl?: string; // Optional - for UI-only mode without media
   coverArt?: string; // Optional - fallback to music icon
+  waveformUrl?: string; // Precomputed peaks (audiowaveform .dat or JSON), if the audio has them
   moodTags: MoodTags;
   format?: 'WAV' | 'FLAC' | 'MP3' | 'M4A' | 'MP4';
   quality?: 'lossless' | 'high' | 'standard' | 'data-saver';